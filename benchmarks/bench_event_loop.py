@@ -0,0 +1,150 @@
+"""
+Event-loop profile: default asyncio vs uvloop (when installed) for frame
+decode + dispatch throughput through ``WSConnection._loop`` / ``Dispatcher``,
+and timer jitter while the traffic is flowing.
+
+A local websockets server replays the traffic as fast as possible to a client
+wired like ``IQOption`` (candle stream + close timer, order tracker, underlying
+list listeners). Traffic is a JSONL file of raw frames as received from the
+broker (``--traffic``), or a synthetic mix shaped like a live session.
+
+    python benchmarks/bench_event_loop.py --frames 50000
+    python benchmarks/bench_event_loop.py --traffic recorded.jsonl
+"""
+import sys
+import os
+import json
+import time
+import random
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import websockets
+import structlog
+from myiq import IQOption
+from myiq.core.connection import WSConnection
+from myiq.core.loop import run, loop_name, UVLOOP_AVAILABLE
+
+END_EVENT = "bench-end"
+
+
+def synthetic_traffic(n: int, seed: int = 1) -> list:
+    """~90% candle-generated, plus timeSync, position-changed and underlying-list frames."""
+    rnd = random.Random(seed)
+    now = int(time.time())
+    frames = []
+    for i in range(n):
+        r = rnd.random()
+        if r < 0.90:
+            active = 76 + rnd.randrange(10)
+            price = 1.08 + rnd.random() / 100
+            start = now - now % 60
+            frames.append({"name": "candle-generated", "microserviceName": "quotes", "msg": {
+                "active_id": active, "size": 60, "at": now * 10**9 + i, "from": start, "to": start + 60,
+                "id": 1000 + i // 500, "open": 1.08, "close": price, "min": 1.07, "max": price + 0.001,
+                "ask": price + 0.00001, "bid": price - 0.00001, "volume": 0, "phase": "T"
+            }})
+        elif r < 0.95:
+            frames.append({"name": "timeSync", "msg": (now * 1000) + i})
+        elif r < 0.98:
+            frames.append({"name": "position-changed", "microserviceName": "portfolio", "msg": {
+                "id": f"pos-{i}", "external_id": 10**9 + i, "status": "open", "pnl": 0,
+                "raw_event": {"binary_options_option_changed1": {"active_id": 76, "direction": "call", "amount": 1.0, "result": "opened"}}
+            }})
+        else:
+            frames.append({"name": "underlying-list-changed", "msg": {"type": "blitz-option", "items": [
+                {"active_id": 76 + k, "name": f"A{k}", "is_suspended": False, "enabled": True, "profit_percent": 85 + k}
+                for k in range(10)
+            ]}})
+    return [json.dumps(f) for f in frames]
+
+
+def load_traffic(path: str) -> list:
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+async def _replay_server(frames: list):
+    async def handler(ws):
+        await ws.recv() # cliente pronto
+        for frame in frames:
+            await ws.send(frame)
+        await ws.send(json.dumps({"name": END_EVENT, "msg": {}}))
+        await ws.wait_closed()
+
+    return await websockets.serve(handler, "127.0.0.1", 0, max_size=None)
+
+
+async def _timer_jitter(stop: asyncio.Event, interval: float, samples: list):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        target = loop.time() + interval
+        await asyncio.sleep(interval)
+        samples.append(loop.time() - target)
+
+
+async def profile(frames: list, interval: float) -> dict:
+    server = await _replay_server(frames)
+    port = list(server.sockets)[0].getsockname()[1]
+
+    # Cliente montado como no start(): mesmos listeners que o tráfego real atravessa
+    iq = IQOption("bench", "bench")
+    conn = WSConnection(iq.dispatcher, f"ws://127.0.0.1:{port}")
+    conn.on_message_hook = iq._on_ws_message
+    iq.dispatcher.add_listener("underlying-list-changed", iq._on_underlying_list_changed)
+    iq.ws.send = lambda data: asyncio.sleep(0)
+    for active in range(76, 86):
+        await iq.start_candles_stream(active, 60, lambda data: None, on_close=lambda data: None)
+
+    done = asyncio.Event()
+    iq.dispatcher.add_listener(END_EVENT, lambda _: done.set())
+    jitter, stop = [], asyncio.Event()
+
+    await conn.connect()
+    jitter_task = asyncio.create_task(_timer_jitter(stop, interval, jitter))
+    t0 = time.perf_counter()
+    await conn.ws.send("ready")
+    await done.wait()
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    await jitter_task
+
+    await conn.close()
+    for tracker, *_ in iq._candle_streams.values():
+        tracker.stop()
+    server.close()
+    await server.wait_closed()
+
+    jitter.sort()
+    pick = lambda q: round(jitter[min(len(jitter) - 1, int(q * len(jitter)))] * 1e6, 1) if jitter else None
+    return {
+        "loop": loop_name(),
+        "frames_per_second": round(len(frames) / elapsed, 1),
+        "us_per_frame": round(elapsed / len(frames) * 1e6, 2),
+        "timer_jitter_us": {"samples": len(jitter), "p50": pick(0.5), "p99": pick(0.99), "max": pick(1.0)},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=20000, help="synthetic frames (ignored with --traffic)")
+    parser.add_argument("--traffic", help="JSONL file with one raw received frame per line")
+    parser.add_argument("--timer-interval", type=float, default=0.005, help="jitter probe period (s)")
+    args = parser.parse_args()
+
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(40))
+    frames = load_traffic(args.traffic) if args.traffic else synthetic_traffic(args.frames)
+
+    results = {"frames": len(frames), "asyncio": run(profile(frames, args.timer_interval), use_uvloop=False)}
+    if UVLOOP_AVAILABLE:
+        results["uvloop"] = run(profile(frames, args.timer_interval), use_uvloop=True)
+        results["speedup"] = round(results["uvloop"]["frames_per_second"] / results["asyncio"]["frames_per_second"], 2)
+    else:
+        results["uvloop"] = "not installed (pip install myiq[uvloop])"
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Orders/second benchmark: ``place_orders`` (one burst) vs ``open_blitz`` called
+sequentially and concurrently, against :class:`myiq.testing.FakeIQServer`
+(full ``start()``: login, authenticate, subscriptions).
+
+    python benchmarks/bench_place_orders.py --orders 200 --ack-delay 0.005
+    python benchmarks/bench_place_orders.py --latency broker
+"""
+import sys
+import os
+import json
+import time
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import structlog
+from myiq import IQOption
+from myiq.core.ratelimit import RateLimiter
+from myiq.testing import FakeIQServer, LATENCY_PROFILES
+
+
+async def _client(server: FakeIQServer) -> IQOption:
+    iq = IQOption("bench", "bench", ws_url=server.ws_url, http_url=server.http_url)
+    await iq.start()
+    await iq.change_balance(1004)
+    # Mede o caminho de envio, não a cota do rate limiter
+    iq.limiter = RateLimiter(quotas={}, global_quota=(1e9, 1e9), reserve=0)
+    return iq
+
+
+async def run(n_orders: int, latency: tuple) -> dict:
+    # Posições não fecham durante a medição
+    server = await FakeIQServer(latency=latency, result_delay=3600).start()
+    iq = await _client(server)
+    actives = list(server.actives)
+    orders = [{"active_id": actives[i % len(actives)], "direction": "call" if i % 2 else "put", "amount": 1.0} for i in range(n_orders)]
+    results = {}
+
+    try:
+        t0 = time.perf_counter()
+        for o in orders:
+            await iq.open_blitz(o["active_id"], o["direction"], o["amount"])
+        results["open_blitz_sequential"] = n_orders / (time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(iq.open_blitz(o["active_id"], o["direction"], o["amount"]) for o in orders))
+        results["open_blitz_gather"] = n_orders / (time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        handles = await iq.place_orders(orders)
+        results["place_orders"] = n_orders / (time.perf_counter() - t0)
+        assert all(not isinstance(h, Exception) for h in handles)
+    finally:
+        await iq.close()
+        await server.close()
+
+    return {k: round(v, 1) for k, v in results.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=200)
+    parser.add_argument("--ack-delay", type=float, default=0.005, help="server-side reply delay (s)")
+    parser.add_argument("--latency", choices=sorted(LATENCY_PROFILES), help="latency profile (overrides --ack-delay)")
+    args = parser.parse_args()
+    latency = LATENCY_PROFILES[args.latency] if args.latency else (args.ack_delay, 0.0)
+
+    # Logs por ordem distorcem a medição
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(40))
+    res = asyncio.run(run(args.orders, latency))
+    print(json.dumps({"orders": args.orders, "latency": latency, "orders_per_second": res}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+"""
+Offline benchmark suite for the hot paths. Results are written as JSON so two
+runs (e.g. two releases) can be compared automatically.
+
+    python benchmarks/suite.py run                          # -> benchmarks/results/myiq-<version>.json
+    python benchmarks/suite.py run --only dispatch models -o new.json --baseline old.json
+    python benchmarks/suite.py compare old.json new.json --threshold 0.10
+
+Metric names carry their direction: ``*_per_second`` is better when higher,
+``*_ms`` / ``*_us`` when lower; other values are informative only. ``compare``
+(and ``run --baseline``) exits with status 1 when any metric regressed by more
+than ``--threshold``.
+"""
+import sys
+import os
+import gc
+import json
+import time
+import random
+import asyncio
+import argparse
+import platform
+import statistics
+import subprocess
+from datetime import datetime, timezone
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+import structlog
+from myiq import IQOption
+from myiq.core.connection import WSConnection
+from myiq.core.dispatcher import Dispatcher
+from myiq.core.metrics import MetricsRegistry
+from myiq.core.candle_fetcher import fetch_all_candles
+from myiq.core.ratelimit import RateLimiter
+from myiq.models.base import Balance, Candle
+from myiq.testing import FakeIQServer
+from bench_event_loop import synthetic_traffic, _replay_server, END_EVENT
+
+BENCHMARKS = {}
+
+
+class Skip(Exception):
+    """Raised by a benchmark whose optional dependency is missing."""
+
+
+def benchmark(name: str):
+    def register(fn):
+        BENCHMARKS[name] = fn
+        return fn
+    return register
+
+
+def _best_rate(fn, number: int, repeat: int = 5) -> float:
+    """Calls per second of ``fn`` (best of ``repeat`` rounds of ``number`` calls, GC off)."""
+    best = float("inf")
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            for _ in range(number):
+                fn()
+            best = min(best, time.perf_counter() - t0)
+    finally:
+        gc.enable()
+    return number / best
+
+
+def _percentiles_ms(samples: list) -> dict:
+    ordered = sorted(samples)
+    pick = lambda q: round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 3)
+    return {"p50_ms": pick(0.5), "p99_ms": pick(0.99), "mean_ms": round(statistics.fmean(ordered) * 1000, 3)}
+
+
+def _candle_frame(i: int = 0) -> dict:
+    return {"name": "candle-generated", "microserviceName": "quotes", "msg": {
+        "active_id": 76, "size": 60, "at": 1700000000 * 10**9 + i, "from": 1700000000, "to": 1700000060,
+        "id": 28333333, "open": 1.08, "close": 1.0812, "min": 1.079, "max": 1.0815,
+        "ask": 1.08121, "bid": 1.08119, "volume": 0, "phase": "T"
+    }}
+
+
+# --- BENCHMARKS ---
+@benchmark("ws_decode")
+async def bench_ws_decode(quick: bool) -> dict:
+    """Frame decode + dispatch in ``WSConnection._loop`` (local server replaying candle traffic)."""
+    frames = synthetic_traffic(5000 if quick else 50000)
+    server = await _replay_server(frames)
+    port = list(server.sockets)[0].getsockname()[1]
+    dispatcher = Dispatcher()
+    done = asyncio.Event()
+    dispatcher.add_listener(END_EVENT, lambda _: done.set())
+    conn = WSConnection(dispatcher, f"ws://127.0.0.1:{port}")
+    try:
+        await conn.connect()
+        t0 = time.perf_counter()
+        await conn.ws.send("ready")
+        await done.wait()
+        elapsed = time.perf_counter() - t0
+    finally:
+        await conn.close()
+        server.close()
+        await server.wait_closed()
+    return {"frames": len(frames), "frames_per_second": round(len(frames) / elapsed, 1),
+            "frame_us": round(elapsed / len(frames) * 1e6, 3)}
+
+
+@benchmark("dispatch")
+async def bench_dispatch(quick: bool) -> dict:
+    """``Dispatcher.dispatch`` throughput vs. number of listeners on the event."""
+    number = 2000 if quick else 20000
+    message = _candle_frame()
+    results = {}
+    for n_listeners in (0, 1, 10, 100):
+        dispatcher = Dispatcher()
+        for _ in range(n_listeners):
+            dispatcher.add_listener("candle-generated", lambda msg: None)
+        rate = _best_rate(lambda: dispatcher.dispatch(message), max(number // max(n_listeners, 1), 200))
+        results[f"listeners_{n_listeners}_per_second"] = round(rate, 1)
+    # Mesmo caminho com o MetricsRegistry ligado (custo da instrumentação)
+    dispatcher = Dispatcher(MetricsRegistry())
+    dispatcher.add_listener("candle-generated", lambda msg: None)
+    results["listeners_1_metrics_per_second"] = round(_best_rate(lambda: dispatcher.dispatch(message), number), 1)
+    return results
+
+
+@benchmark("models")
+async def bench_models(quick: bool) -> dict:
+    """Pydantic model construction from raw payloads."""
+    number = 5000 if quick else 50000
+    candle = dict(_candle_frame()["msg"])
+    balance = {"id": 1004, "type": 4, "amount": 10000.0, "currency": "USD", "user_id": 1}
+    return {
+        "candle_per_second": round(_best_rate(lambda: Candle(**candle), number), 1),
+        "balance_per_second": round(_best_rate(lambda: Balance(**balance), number), 1),
+    }
+
+
+def _init_data(n_actives: int) -> dict:
+    actives = {str(i): {"id": i, "name": f"front.A{i}", "enabled": True, "is_suspended": i % 7 == 0,
+                        "option": {"profit": {"commission": 10 + i % 15}}, "schedule": [[0, 86400]] * 7}
+               for i in range(1, n_actives + 1)}
+    return {"name": "initialization-data", "msg": {
+        cat: {"actives": {k: dict(v) for k, v in actives.items()}} for cat in ("blitz", "turbo", "binary", "digital")
+    }}
+
+
+def _underlying(n_actives: int, version: int = 0) -> dict:
+    return {"name": "underlying-list-changed", "msg": {
+        "name": "blitz-option-instruments.underlying-list-changed", "type": "blitz-option",
+        "underlying": [{"active_id": i, "name": f"A{i}", "is_suspended": False, "enabled": True,
+                        "profit_percent": 80 + (i + version * (i % 10 == 0)) % 15} for i in range(1, n_actives + 1)]
+    }}
+
+
+@benchmark("market_payloads")
+async def bench_market_payloads(quick: bool) -> dict:
+    """``_on_initialization_data`` / ``_on_underlying_list_changed`` on large payloads."""
+    n_actives = 300 if quick else 1500
+    repeat = 3 if quick else 10
+    init = _init_data(n_actives)
+    full, delta = _underlying(n_actives), _underlying(n_actives, version=1)
+
+    init_samples, full_samples, delta_samples = [], [], []
+    for _ in range(repeat):
+        iq = IQOption("bench", "bench")
+        t0 = time.perf_counter()
+        iq._on_initialization_data(init)
+        init_samples.append(time.perf_counter() - t0)
+
+        iq = IQOption("bench", "bench")
+        t0 = time.perf_counter()
+        iq._on_underlying_list_changed(full) # todos os ativos novos
+        full_samples.append(time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        iq._on_underlying_list_changed(delta) # ~10% com payout alterado
+        delta_samples.append(time.perf_counter() - t0)
+    return {
+        "actives_per_category": n_actives,
+        "initialization_data_ms": round(min(init_samples) * 1000, 3),
+        "underlying_full_ms": round(min(full_samples) * 1000, 3),
+        "underlying_delta_ms": round(min(delta_samples) * 1000, 3),
+    }
+
+
+async def _fake_session(**server_kwargs):
+    server = await FakeIQServer(seed=1, **server_kwargs).start()
+    iq = IQOption("bench", "bench", ws_url=server.ws_url, http_url=server.http_url)
+    await iq.start()
+    return server, iq
+
+
+@benchmark("fetch_candles")
+async def bench_fetch_candles(quick: bool) -> dict:
+    """``fetch_all_candles`` end to end against :class:`FakeIQServer` (1000 per request)."""
+    total = 2000 if quick else 5000
+    server, iq = await _fake_session()
+    try:
+        t0 = time.perf_counter()
+        candles = await fetch_all_candles(iq, 76, 60, total)
+        elapsed = time.perf_counter() - t0
+    finally:
+        await iq.close()
+        await server.close()
+    return {"candles": len(candles), "total_ms": round(elapsed * 1000, 3),
+            "candles_per_second": round(len(candles) / elapsed, 1)}
+
+
+@benchmark("order_ack")
+async def bench_order_ack(quick: bool) -> dict:
+    """
+    ACK latency of ``buy_blitz`` (the ``open_blitz`` part: send to ACK), sequential
+    orders against a zero-latency :class:`FakeIQServer`, i.e. the client overhead.
+    """
+    n_orders = 50 if quick else 500
+    server, iq = await _fake_session(result_delay=3600)
+    await iq.change_balance(1004)
+    iq.limiter = RateLimiter(quotas={}, global_quota=(1e9, 1e9), reserve=0) # mede o cliente, não a cota
+    samples = []
+    try:
+        for i in range(n_orders):
+            t0 = time.perf_counter()
+            await iq.open_blitz(76, "call" if i % 2 else "put", 1.0)
+            samples.append(time.perf_counter() - t0)
+    finally:
+        await iq.close()
+        await server.close()
+    return {"orders": n_orders, **_percentiles_ms(samples)}
+
+
+@benchmark("jma_update")
+async def bench_jma_update(quick: bool) -> dict:
+    """Per-candle JMA update of ``jma_strategy`` (fast + slow JMA over the buffer)."""
+    try:
+        import pandas as pd
+        import pandas_ta as ta
+    except ImportError:
+        raise Skip("pandas_ta not installed")
+    # Mesmos parâmetros e cálculo de LogicWorker.calculate_single_candle (sem importar a GUI)
+    fast, slow, phase, buffer = 7, 15, 50, 300
+    rnd = random.Random(1)
+    closes = [1.08 + rnd.gauss(0, 0.001) for _ in range(buffer)]
+
+    def update():
+        series = pd.Series(closes)
+        ta.jma(series, length=fast, phase=phase).iloc[-1]
+        ta.jma(series, length=slow, phase=phase).iloc[-1]
+
+    rate = _best_rate(update, 20 if quick else 200, repeat=3)
+    return {"buffer": buffer, "update_ms": round(1000 / rate, 3)}
+
+
+# --- EXECUÇÃO / COMPARAÇÃO ---
+def _metadata() -> dict:
+    version = "unknown"
+    try:
+        import tomllib # 3.11+
+        with open(os.path.join(ROOT, "pyproject.toml"), "rb") as f:
+            version = tomllib.load(f)["project"]["version"]
+    except Exception:
+        pass
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, timeout=10).stdout.strip() or None
+    except Exception:
+        commit = None
+    return {"version": version, "commit": commit, "python": platform.python_version(),
+            "platform": platform.platform(), "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds")}
+
+
+def run_suite(names: list, quick: bool = False) -> dict:
+    results = {}
+    for name in names:
+        try:
+            results[name] = asyncio.run(BENCHMARKS[name](quick))
+        except Skip as e:
+            results[name] = {"skipped": str(e)}
+        print(f"{name}: {json.dumps(results[name])}", file=sys.stderr)
+    return {"meta": {**_metadata(), "quick": quick}, "results": results}
+
+
+def _direction(metric: str) -> int:
+    if metric.endswith("_per_second"):
+        return 1
+    if metric.endswith("_ms") or metric.endswith("_us"):
+        return -1
+    return 0
+
+
+def compare(baseline: dict, current: dict, threshold: float = 0.10) -> list:
+    """
+    Returns ``[(benchmark, metric, old, new, change, regressed)]`` for every
+    comparable metric present in both runs; ``change`` is the relative
+    improvement (negative = worse).
+    """
+    rows = []
+    for name, new_metrics in current.get("results", {}).items():
+        old_metrics = baseline.get("results", {}).get(name, {})
+        for metric, new in new_metrics.items():
+            old = old_metrics.get(metric)
+            sign = _direction(metric)
+            if not sign or not isinstance(old, (int, float)) or not isinstance(new, (int, float)) or not old:
+                continue
+            change = sign * (new - old) / old
+            rows.append((name, metric, old, new, change, change < -threshold))
+    return rows
+
+
+def print_comparison(baseline: dict, current: dict, threshold: float) -> bool:
+    """Prints the comparison table. Returns True if any metric regressed beyond ``threshold``."""
+    if baseline.get("meta", {}).get("quick") != current.get("meta", {}).get("quick"):
+        print("warning: comparing a --quick run with a full run (different workload sizes)")
+    rows = compare(baseline, current, threshold)
+    for name, metric, old, new, change, regressed in rows:
+        flag = "REGRESSION" if regressed else ""
+        print(f"{name:16} {metric:32} {old:>14} -> {new:<14} {change:+8.1%} {flag}")
+    regressions = [r for r in rows if r[5]]
+    print(f"{len(rows)} metrics compared, {len(regressions)} regressed more than {threshold:.0%}")
+    return bool(regressions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    run_p = sub.add_parser("run", help="run the suite and write the JSON results")
+    run_p.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="subset of benchmarks")
+    run_p.add_argument("--quick", action="store_true", help="smaller workloads (smoke run)")
+    run_p.add_argument("-o", "--output", help="results file (default benchmarks/results/myiq-<version>.json)")
+    run_p.add_argument("--baseline", help="compare against this results file after running")
+    run_p.add_argument("--threshold", type=float, default=0.10)
+    cmp_p = sub.add_parser("compare", help="compare two results files")
+    cmp_p.add_argument("baseline")
+    cmp_p.add_argument("current")
+    cmp_p.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        with open(args.current, encoding="utf-8") as f:
+            current = json.load(f)
+        sys.exit(1 if print_comparison(baseline, current, args.threshold) else 0)
+
+    # Logs por operação distorcem a medição
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(40))
+    report = run_suite(args.only or list(BENCHMARKS), quick=args.quick)
+    output = args.output or os.path.join(os.path.dirname(os.path.abspath(__file__)), "results",
+                                         f"myiq-{report['meta']['version']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        sys.exit(1 if print_comparison(baseline, report, args.threshold) else 0)
+
+
+if __name__ == "__main__":
+    main()
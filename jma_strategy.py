@@ -13,7 +13,8 @@ import pyqtgraph as pg
 import os
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 try:
-    from myiq import IQOption, Candle, get_all_actives_status
+    from myiq import IQOption, Candle, run
+    from myiq.core.explorer import is_market_open
 except ImportError:
     pass
 
@@ -23,6 +24,8 @@ PASSWORD = "sua_senha"
 DEFAULT_ASSET_ID = 76 # EURUSD (padrão)
 TIMEFRAME = 60
 MIN_PAYOUT = 86
+SNAPSHOT_PATH = "myiq_snapshot.json" # Warm-start do cache de ativos entre execuções
+BALANCE_MAX_AGE = 300 # s; entre refreshes o saldo vem dos eventos balance-changed
 
 JMA_FAST = 7
 JMA_SLOW = 15
@@ -90,21 +93,22 @@ class LogicWorker(QObject):
     async def update_gui_header(self):
         """Atualiza dados do cabeçalho (Saldo, Ativo, Payout)."""
         try:
-            bals = await self.iq.get_balances()
-            tgt = next((b for b in bals if b.type == 4), None) # Practice
-            if not tgt: tgt = next((b for b in bals if b.type == 1), None) # Real
-            if tgt: self.current_balance = tgt.amount
+            # Saldo mantido por eventos balance-changed; só vai à rede se o cache estiver velho
+            await self.iq.get_balances(max_age=BALANCE_MAX_AGE)
+            bal = self.iq.get_balance()
+            if bal: self.current_balance = bal.amount
         except: pass 
         
         self.signal_header_info.emit(self.active_ticker, f"{self.payout}%", f"${self.current_balance:,.2f}")
 
     async def run(self):
-        self.iq = IQOption(EMAIL, PASSWORD)
+        self.iq = IQOption(EMAIL, PASSWORD, snapshot_path=SNAPSHOT_PATH)
         await self.iq.start()
         self.signal_log.emit("Conectado. Aguardando lista de ativos Blitz...")
         
         # --- WAIT FOR CACHE POPULATION ---
         # Espera até detectar ativos no cache, especialmente Blitz
+        # (com snapshot em disco o cache já vem preenchido e o loop sai na 1ª volta)
         for _ in range(30):
             # Verifica se já recebeu initialize-data para Blitz ou Turbo
             has_blitz = self.iq.actives_cache.get("blitz")
@@ -134,7 +138,7 @@ class LogicWorker(QObject):
             if not self.buffer:
                 await self.initialize_buffer()
             
-            # Atualiza saldo periodicamente (a cada ~10s)
+            # Atualiza cabeçalho periodicamente (a cada ~10s; saldo vem do cache local)
             if int(datetime.now().timestamp()) % 10 == 0:
                 await self.update_gui_header()
 
@@ -180,21 +184,21 @@ class LogicWorker(QObject):
         self.signal_log.emit("Buscando lista de ativos BLITZ...")
         try:
             # Busca apenas BLITZ pois a lib só tem buy_blitz
-            all_actives = await get_all_actives_status(self.iq, "blitz")
-            
+            # Ranking ao vivo da lib (sem rede); só baixa a lista se o ranking ainda estiver vazio
+            best = self.pick_tradable()
+            if not best:
+                await self.iq.get_actives("blitz")
+                best = self.pick_tradable()
+
             best_id = None
             best_pay = 0
             best_ticker = ""
-            
-            for aid, inf in all_actives.items():
-                if int(aid) in self.banned_assets: continue
-                if inf.get('is_open') and not inf.get('suspended'):
-                    p = inf.get('profit_percent', 0)
-                    if p >= MIN_PAYOUT and p > best_pay:
-                        best_pay = p
-                        best_id = int(aid)
-                        best_ticker = inf.get('ticker')
-            
+
+            if best:
+                best_id = best["active_id"]
+                best_pay = best["profit_percent"]
+                best_ticker = best["name"] or str(best_id)
+
             if best_id:
                 old_id = self.active_id
                 self.active_id = best_id
@@ -215,6 +219,17 @@ class LogicWorker(QObject):
             
         await self.update_gui_header()
 
+    def pick_tradable(self):
+        """Melhor ativo do ranking (enabled e não suspenso) que também está dentro do horário de mercado."""
+        server_time = self.iq.get_server_timestamp()
+        for cand in self.iq.best_actives("blitz", 100, MIN_PAYOUT, exclude=self.banned_assets):
+            info = self.iq.check_active(cand["active_id"])
+            # Só o init-data traz 'schedule'; sem ele vale o enabled/is_suspended do ranking
+            if "schedule" in info and not is_market_open(info["schedule"], server_time):
+                continue
+            return cand
+        return None
+
     async def setup_balance(self):
         try:
             bals = await self.iq.get_balances()
@@ -259,6 +274,7 @@ class LogicWorker(QObject):
         
         with self.buffer_lock:
             self.buffer = [SmartCandle(c) for c in raw]
+            if self.buffer: self.buffer[-1].is_closed = False # último do histórico ainda em formação
             # Calc inicial
             jf, js = self.calculate_single_candle(self.buffer) # Calc dummy pra popular cache interno
             # O calculate_single_candle retorna so o ultimo. 
@@ -277,7 +293,7 @@ class LogicWorker(QObject):
         self.signal_chart_init.emit(self.buffer[-80:])
         self.signal_log.emit("Stream iniciado.")
         
-        await self.iq.start_candles_stream(self.active_id, TIMEFRAME, self.on_stream_data)
+        await self.iq.start_candles_stream(self.active_id, TIMEFRAME, self.on_stream_data, on_close=self.on_candle_closed)
 
 
     # ... (calculate_single_candle fica igual) ...
@@ -294,6 +310,32 @@ class LogicWorker(QObject):
         except:
             return np.nan, np.nan
 
+    def _finalize_candle(self, smart):
+        # Chamado com buffer_lock: fecha o último candle e avalia o sinal
+        jf, js = self.calculate_single_candle(self.buffer)
+        smart.jma_f = jf; smart.jma_s = js
+        smart.is_closed = True
+        self.check_entry_logic()
+
+    def on_candle_closed(self, data):
+        """Fechamento por timer (hora do servidor), sem esperar o 1º tick do próximo candle."""
+        c = Candle(**data)
+        with self.buffer_lock:
+            if not self.buffer: return
+            smart = next((sc for sc in reversed(self.buffer[-2:]) if sc.id == c.id), None)
+            if smart is None: return
+            smart.raw.close = c.close
+            smart.raw.max = c.max
+            smart.raw.min = c.min
+            if data.get("is_correction"):
+                # Tick atrasado: corrige valores finais e JMA, sem reavaliar o sinal
+                jf, js = self.calculate_single_candle(self.buffer[:self.buffer.index(smart) + 1])
+                smart.jma_f = jf; smart.jma_s = js
+            elif not smart.is_closed and smart is self.buffer[-1]:
+                self._finalize_candle(smart)
+
+        self.signal_candle_update.emit(self.buffer[-1])
+
     # ... (on_stream_data mantem logica, exceto o buffer size) ...
     def on_stream_data(self, data):
         c_new = Candle(**data)
@@ -301,11 +343,9 @@ class LogicWorker(QObject):
             if not self.buffer: return
             last_smart = self.buffer[-1]
             if c_new.id != last_smart.id:
-                # FECHOU
-                jf, js = self.calculate_single_candle(self.buffer)
-                last_smart.jma_f = jf; last_smart.jma_s = js
-                last_smart.is_closed = True
-                self.check_entry_logic()
+                # FECHOU (normalmente já fechado pelo timer em on_candle_closed)
+                if not last_smart.is_closed:
+                    self._finalize_candle(last_smart)
                 # NOVO
                 new_smart = SmartCandle(c_new)
                 new_smart.is_closed = False
@@ -700,7 +740,8 @@ def main():
     worker.signal_header_info.connect(win.update_header_info)
     
     # Thread separada para lógica async
-    t = threading.Thread(target=lambda: asyncio.run(worker.run()), daemon=True)
+    # uvloop quando instalado (pip install myiq[uvloop]); senão o loop padrão do asyncio
+    t = threading.Thread(target=lambda: run(worker.run()), daemon=True)
     t.start()
     
     sys.exit(app.exec_())
@@ -1,4 +1,4 @@
-from .core import IQOption, ReconnectingWS, fetch_all_candles, get_req_id, get_sub_id, get_client_id
+from .core import IQOption, AuthRejected, ReconnectingWS, fetch_all_candles, get_req_id, get_sub_id, get_client_id, TradeHandle, SessionManager, run
 from .http import IQAuth
 from .models import Balance, Candle
 from .core.explorer import get_all_actives_status, get_initialization_data_raw
@@ -1,7 +1,13 @@
-from .client import IQOption
+from .client import IQOption, AuthRejected
 from .reconnect import ReconnectingWS
 from .candle_fetcher import fetch_all_candles
 from .utils import get_req_id, get_sub_id, get_client_id
 from .dispatcher import Dispatcher
 from .connection import WSConnection
 from .explorer import get_all_actives_status, get_initialization_data_raw
+from .orders import OrderTracker, TradeHandle
+from .positions import PositionsStore
+from .session import SessionManager
+from .loop import run, UVLOOP_AVAILABLE
+from .metrics import MetricsRegistry
+from .tracing import Tracer
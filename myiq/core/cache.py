@@ -0,0 +1,61 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """
+    Small LRU cache with per-entry expiry.
+
+    Holds at most ``maxsize`` entries (least recently used evicted first); entries
+    older than ``ttl`` seconds count as misses and are dropped on access.
+    Hit/miss counters are exposed through :meth:`stats`.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 300.0, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict() # chave -> (expira_em, valor)
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._data.get(key)
+        return entry is not None and entry[0] > self._clock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is not None:
+            if entry[0] > self._clock():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            del self._data[key]
+        self.misses += 1
+        return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        self._data[key] = (self._clock() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Drops one entry, or everything when ``key`` is None."""
+        if key is None:
+            self._data.clear()
+        else:
+            self._data.pop(key, None)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 3) if total else 0.0,
+        }
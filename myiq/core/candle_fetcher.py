@@ -1,4 +1,3 @@
-import asyncio
 from myiq.models.base import Candle
 
 async def fetch_all_candles(iq, active_id: int, duration: int, total_count: int) -> list[Candle]:
@@ -14,6 +13,9 @@ async def fetch_all_candles(iq, active_id: int, duration: int, total_count: int)
         Candle duration in seconds.
     total_count: int
         Desired total number of candles (may be > 1000).
+
+    Requests are paced by ``iq.limiter`` (``get-candles`` quota), so no fixed
+    pause is needed between batches.
     """
     collected: list[Candle] = []
     while len(collected) < total_count:
@@ -22,6 +24,4 @@ async def fetch_all_candles(iq, active_id: int, duration: int, total_count: int)
         if not batch:
             break
         collected.extend(batch)
-        # small pause to avoid hitting rate limits
-        await asyncio.sleep(0.2)
     return collected[:total_count]
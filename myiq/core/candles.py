@@ -0,0 +1,66 @@
+import structlog
+from typing import Callable, Optional
+from myiq.core.clock import ServerClock, ScheduledCall
+
+logger = structlog.get_logger()
+
+
+class CandleCloseTracker:
+    """
+    Emits candle closes from a timer at the server-time boundary ``to``
+    (``from + size``) instead of waiting for the first tick of the next candle.
+
+    ``emit(data)`` receives the last known values of the closed candle. If a tick
+    for that candle still arrives after the close, ``emit`` is called again with
+    the corrected values and ``"is_correction": True``. A candle whose timer did
+    not fire yet when the next candle starts is closed right away.
+    """
+
+    def __init__(self, clock: ServerClock, active_id: int, size: int, emit: Callable[[dict], None]):
+        self.clock = clock
+        self.active_id = active_id
+        self.size = size
+        self.emit = emit
+        self.current: Optional[dict] = None # candle em formação (últimos valores conhecidos)
+        self.last_closed: Optional[dict] = None
+        self._timer: Optional[ScheduledCall] = None
+
+    @staticmethod
+    def _end(data: dict) -> float:
+        return data.get("to") or data["from"] + data.get("size", 0)
+
+    def on_tick(self, data: dict):
+        start = data.get("from")
+        if start is None:
+            return
+        if self.current is not None and start == self.current["from"]:
+            self.current = dict(data)
+            return
+        if self.last_closed is not None and start == self.last_closed["from"]:
+            # Tick atrasado de um candle já fechado: corrige
+            self.last_closed = {**data, "is_correction": True}
+            logger.debug("candle_close_corrected", active=self.active_id, candle_from=start)
+            self.emit(dict(self.last_closed))
+            return
+        if self.current is not None and start < self.current["from"]:
+            return # tick fora de ordem de um candle antigo
+
+        if self.current is not None:
+            self._close() # o timer não disparou antes do próximo candle
+        self.current = dict(data)
+        self._timer = self.clock.call_at(self._end(data), self._close)
+
+    def _close(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self.current is None:
+            return
+        self.last_closed = self.current
+        self.current = None
+        self.emit(dict(self.last_closed))
+
+    def stop(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
@@ -1,25 +1,63 @@
 
+import json
 import asyncio
 import time
 import structlog
-from typing import List, Optional, Callable
+from typing import Dict, List, Optional, Callable, AsyncIterator
 from myiq.http.auth import IQAuth
 from myiq.core.reconnect import ReconnectingWS
 from myiq.core.dispatcher import Dispatcher
+from myiq.core.ranking import PayoutRanking, extract_profit_percent, extract_is_open, normalize_instrument_type
+from myiq.core.snapshot import load_snapshot, save_snapshot_async
+from myiq.core.latency import LatencyMonitor
+from myiq.core.orders import OrderTracker, TradeHandle, ArmedOrder
+from myiq.core.ratelimit import RateLimiter
+from myiq.core.singleflight import SingleFlight, request_key
+from myiq.core.cache import TTLCache
+from myiq.core.clock import ServerClock, ScheduledCall
+from myiq.core.candles import CandleCloseTracker
+from myiq.core.financial import financial_info_body, financial_info_batch_body, alias
+from myiq.core.metrics import MetricsRegistry
+from myiq.core.tracing import Tracer, Trace
 from myiq.core.utils import get_req_id, get_sub_id, get_client_id
 from myiq.core.constants import *
 from myiq.models.base import WsRequest, WsMessageBody, Balance, Candle
 
 logger = structlog.get_logger()
 
+# Eventos locais de mercado repassados às contas que usam o feed de outra instância
+MARKET_EVENTS = (EV_PAYOUT_CHANGED, EV_ACTIVE_OPENED, EV_ACTIVE_CLOSED, EV_BEST_ACTIVE_CHANGED)
+
+# Espera pelo ACK de ordem: fixa (não encolhe com o RTT; ordem aceita pelo servidor não pode virar falha)
+ORDER_ACK_TIMEOUT = 10.0
+
+
+class AuthRejected(ConnectionError):
+    """The server answered the WebSocket authentication with ``authenticated: false`` (SSID refused)."""
+
 class IQOption:
-    def __init__(self, email: str, password: str):
-        self.auth = IQAuth(email, password)
-        self.dispatcher = Dispatcher()
-        self.ws = ReconnectingWS(self.dispatcher, IQ_WS_URL)
+    def __init__(self, email: str, password: str, snapshot_path: Optional[str] = None, ssid_cache_path: Optional[str] = None,
+                 market_data: bool = True, ws_url: Optional[str] = None, http_url: Optional[str] = None):
+        # market_data=False: conta só de trading (auth, saldos, ordens), sem initialization-data nem lista de ativos
+        self.market_data = market_data
+        # ws_url/http_url: outro servidor (ex.: myiq.testing.FakeIQServer); padrão IQ_WS_URL/IQ_HTTP_URL
+        self.auth = IQAuth(email, password, ssid_cache_path=ssid_cache_path, url=http_url)
+        # Métricas dos caminhos quentes (frames, dispatch, RTT, ACK); ver serve_metrics()
+        self.metrics = MetricsRegistry()
+        self._request_rtt = self.metrics.histogram("request_rtt_seconds", "Request round trip per operation", ("operation",))
+        self._order_ack = self.metrics.histogram("order_ack_seconds", "Order frame written to ACK received")
+        self.dispatcher = Dispatcher(self.metrics)
+        # Tracing por request_id, desligado por padrão (enable_tracing)
+        self.tracer: Optional[Tracer] = None
+        self.ws = ReconnectingWS(self.dispatcher, ws_url or IQ_WS_URL, metrics=self.metrics)
         self.ssid = None
         self.active_balance_id = None
-        self.server_time_offset = 0
+        # Saldos ao vivo: semeados por get_balances() e mantidos pelos eventos balance-changed
+        self.balances: Dict[int, Balance] = {}
+        self._balances_refreshed_at: Optional[float] = None
+        # Hora do servidor: relógio monotônico + offset suavizado + drift (ms)
+        self.clock = ServerClock()
+        self._candle_streams = {} # (active_id, size) -> (CandleCloseTracker, callbacks, on_close callbacks)
         from collections import defaultdict
         self.actives_cache = defaultdict(dict) # { type_name: { active_id: data } }
         # New attributes for storing message data
@@ -27,52 +65,63 @@ class IQOption:
         self.features = {}
         self.user_settings = {}
         self.instruments_categories = {} # from initialization-data
+        # Ranking de payout mantido a partir do cache (sem ir à rede)
+        self.ranking = PayoutRanking()
+        self.ranking.on_top_changed = self._on_best_active_changed
+        # Warm-start: estado persistido em disco, carregado como "stale" até chegar o initialization-data
+        self.snapshot_path = snapshot_path
+        self.is_stale = False
+        self._stale_actives = {} # { category: set(active_id) } vindos do snapshot
+        self._snapshot_task: Optional[asyncio.Task] = None
+        self._snapshot_dirty = False # estado mudou durante uma escrita em andamento
+        self.startup_timings = {} # ms por fase do start()
+        # RTT de aplicação + detecção de conexão morta (half-open)
+        self.latency = LatencyMonitor(self)
+        # Um único listener de position-changed roteando eventos por id de ordem
+        self.orders = OrderTracker(self.dispatcher)
+        # Posições abertas/fechadas da sessão (alimentado pelo mesmo stream portfolio.position-changed)
+        self.positions = self.orders.positions
+        # Token buckets por operação (+ orçamento reservado para trading)
+        self.limiter = RateLimiter()
+        # Requisições idênticas simultâneas viram uma só (TTL opcional por operação em single_flight.ttls)
+        self.single_flight = SingleFlight()
+        # Informações financeiras (GraphQL) mudam devagar: LRU + TTL de 5 min
+        self.financial_cache = TTLCache(maxsize=512, ttl=300)
+
+    def attach_market_data(self, source: "IQOption"):
+        """
+        Shares the market state of ``source`` (actives cache, payout ranking and
+        financial info cache) instead of keeping one of its own, and re-emits the
+        local market events of ``source`` (payout-changed, active-opened/closed,
+        best-active-changed) on this client's dispatcher. Meant for clients created
+        with ``market_data=False``.
+        """
+        self.actives_cache = source.actives_cache
+        self.instruments_categories = source.instruments_categories
+        self.ranking = source.ranking
+        self.financial_cache = source.financial_cache
+        for event in MARKET_EVENTS:
+            source.dispatcher.add_listener(event, self.dispatcher.dispatch)
 
     async def subscribe_actives(self):
         """
         Inscreve para receber atualizações da lista de ativos (underlying-list-changed).
         Isso popula self.actives_cache.
         """
-        # Digital
-        await self.ws.send({
-            "name": "subscribeMessage",
-            "request_id": get_req_id(),
-            "msg": {
-                "name": "digital-option-instruments.underlying-list-changed",
-                "version": "3.0",
-                "params": {"routingFilters": {"user_group_id": 1, "is_regulated": False}}
-            }
-        })
-        # Turbo (Blitz/Short)
-        await self.ws.send({
-            "name": "subscribeMessage",
-            "request_id": get_req_id(),
-            "msg": {
-                "name": "turbo-option-instruments.underlying-list-changed",
-                "version": "3.0",
-                "params": {"routingFilters": {"user_group_id": 1, "is_regulated": False}}
-            }
-        })
-        # Binary (Long)
-        await self.ws.send({
-            "name": "subscribeMessage",
-            "request_id": get_req_id(),
-            "msg": {
-                "name": "binary-option-instruments.underlying-list-changed",
-                "version": "3.0",
-                "params": {"routingFilters": {"user_group_id": 1, "is_regulated": False}}
-            }
-        })
-        # Blitz (New Support)
-        await self.ws.send({
-            "name": "subscribeMessage",
-            "request_id": get_req_id(),
-            "msg": {
-                "name": "blitz-option-instruments.underlying-list-changed",
-                "version": "3.0", # Assuming schema follows others
-                "params": {"routingFilters": {"user_group_id": 1, "is_regulated": False}}
-            }
-        })
+        # Digital, Turbo (Blitz/Short), Binary (Long) e Blitz: enviados em pipeline
+        instrument_types = ["digital-option", "turbo-option", "binary-option", "blitz-option"]
+        await asyncio.gather(*(
+            self.ws.send({
+                "name": "subscribeMessage",
+                "request_id": get_req_id(),
+                "msg": {
+                    "name": f"{t}-instruments.underlying-list-changed",
+                    "version": "3.0",
+                    "params": {"routingFilters": {"user_group_id": 1, "is_regulated": False}}
+                }
+            })
+            for t in instrument_types
+        ))
         logger.info("actives_list_subscribed")
 
     def _on_underlying_list_changed(self, message: dict):
@@ -95,20 +144,86 @@ class IQOption:
                 
             msg = message.get("msg", {})
             underlying_list = msg.get("underlying", [])
+            cache = self.actives_cache[active_type]
             
-            count = 0
+            # Estado do initialization-data ('turbo' para 'turbo-option'): base do diff no primeiro push
+            init_cache = self.actives_cache.get(normalize_instrument_type(active_type), {})
+
+            changed_count = 0
+            seen = set()
             for item in underlying_list:
-                active_id = str(item.get("active_id"))
-                if active_id:
-                    # Save into nested dict: cache[type][id]
-                    self.actives_cache[active_type][active_id] = item
-                    item["active_type"] = active_type # Inject type into data too
-                    count += 1
+                raw_id = item.get("active_id")
+                if raw_id is None:
+                    continue
+                active_id = str(raw_id)
+                seen.add(active_id)
+                stored = cache.get(active_id) or self._seed_underlying(cache, init_cache, active_type, active_id)
+                
+                if stored is None:
+                    # Ativo novo: guarda uma cópia (não mexe no dict bruto recebido)
+                    stored = dict(item)
+                    stored["active_type"] = active_type
+                    cache[active_id] = stored
+                    self.ranking.update(active_type, active_id, stored)
+                    if extract_is_open(stored):
+                        self._emit_event(EV_ACTIVE_OPENED, {"active_id": int(raw_id), "instrument_type": active_type})
+                    changed_count += 1
+                    continue
+                
+                # Delta: só os campos que realmente mudaram
+                changes = {k: v for k, v in item.items() if k not in stored or stored[k] != v}
+                if not changes:
+                    continue
+                
+                was_open = extract_is_open(stored)
+                old_payout = extract_profit_percent(stored)
+                stored.update(changes)
+                self.ranking.update(active_type, active_id, stored)
+                changed_count += 1
+                
+                is_open = extract_is_open(stored)
+                if is_open != was_open:
+                    self._emit_event(EV_ACTIVE_OPENED if is_open else EV_ACTIVE_CLOSED,
+                                     {"active_id": int(raw_id), "instrument_type": active_type})
+                new_payout = extract_profit_percent(stored)
+                if new_payout != old_payout:
+                    self._emit_event(EV_PAYOUT_CHANGED, {
+                        "active_id": int(raw_id), "instrument_type": active_type,
+                        "old": old_payout, "new": new_payout
+                    })
             
-            #logger.info("actives_cache_updated", type=active_type, count=count)
+            # A lista é completa por tipo: ativo conhecido que não veio nela deixou de ser negociável
+            if underlying_list and active_type != "unknown":
+                for active_id in (set(cache) | set(init_cache)) - seen:
+                    stored = cache.get(active_id) or self._seed_underlying(cache, init_cache, active_type, active_id)
+                    if not extract_is_open(stored):
+                        continue
+                    stored["enabled"] = False
+                    self.ranking.update(active_type, active_id, stored)
+                    changed_count += 1
+                    self._emit_event(EV_ACTIVE_CLOSED, {"active_id": int(active_id), "instrument_type": active_type})
+
+            if changed_count:
+                self.ranking.flush([active_type])
+            #logger.info("actives_cache_updated", type=active_type, count=changed_count)
         except Exception as e:
             logger.error("update_actives_error", error=str(e))
 
+    @staticmethod
+    def _seed_underlying(cache: dict, init_cache: dict, active_type: str, active_id: str) -> Optional[dict]:
+        """Copies the initialization-data entry of ``active_id`` into ``cache`` (None if unknown)."""
+        base = init_cache.get(active_id)
+        if base is None:
+            return None
+        stored = dict(base)
+        stored["active_type"] = active_type
+        cache[active_id] = stored
+        return stored
+
+    def _emit_event(self, name: str, msg: dict):
+        """Emite um evento local pelo Dispatcher (mesmo formato das mensagens do servidor)."""
+        self.dispatcher.dispatch({"name": name, "msg": msg})
+
     def _on_profile(self, message: dict):
         """Handler for 'profile' message."""
         try:
@@ -174,24 +289,112 @@ class IQOption:
                                 a_data["active_type"] = category_name
                                 
                             self.actives_cache[category_name][s_id] = a_data
+                            self.ranking.update(category_name, s_id, a_data)
                             count_new += 1
             
+            self._reconcile_snapshot(msg)
+            self.ranking.flush()
             logger.info("init_data_processed", merged_active_items=count_new)
+            self._schedule_snapshot_save()
         except Exception as e:
             logger.error("init_data_error", error=str(e))
-        except Exception as e:
-            logger.error("init_data_error", error=str(e))
+
+    def load_snapshot(self) -> bool:
+        """
+        Loads the on-disk snapshot (actives, schedules, payouts, features, user settings)
+        into the caches and marks them as stale until fresh initialization-data arrives.
+        """
+        data = load_snapshot(self.snapshot_path)
+        if not data:
+            return False
+
+        for category, items in data.get("actives", {}).items():
+            cache = self.actives_cache[category]
+            for a_id, a_data in items.items():
+                # Dados frescos já recebidos têm prioridade
+                if a_id not in cache:
+                    cache[a_id] = a_data
+                    self.ranking.update(category, a_id, a_data)
+                    self._stale_actives.setdefault(category, set()).add(a_id)
+        for name, status in data.get("features", {}).items():
+            self.features.setdefault(name, status)
+        for name, config in data.get("user_settings", {}).items():
+            self.user_settings.setdefault(name, config)
+
+        self.is_stale = True
+        self.ranking.flush()
+        logger.info("snapshot_loaded", path=self.snapshot_path, age=round(time.time() - data.get("saved_at", 0), 1))
+        return True
+
+    def _reconcile_snapshot(self, fresh_msg: dict):
+        """Drops snapshot actives that the fresh initialization-data no longer lists."""
+        if not self.is_stale:
+            return
+        for category, stale_ids in self._stale_actives.items():
+            # 'blitz-option' (underlying-list-changed) é reconciliado contra 'blitz' do initialization-data
+            category_data = fresh_msg.get(category) or fresh_msg.get(normalize_instrument_type(category))
+            if not isinstance(category_data, dict):
+                continue
+            fresh_ids = {str(a_id) for a_id in category_data.get("actives", {})}
+            cache = self.actives_cache.get(category, {})
+            for a_id in stale_ids - fresh_ids:
+                cache.pop(a_id, None)
+                self.ranking.remove(category, a_id)
+        self._stale_actives.clear()
+        self.is_stale = False
+        logger.info("snapshot_reconciled")
+
+    def _schedule_snapshot_save(self):
+        if not self.snapshot_path:
+            return
+        if self._snapshot_task is not None and not self._snapshot_task.done():
+            # Escrita em andamento: coalesce e grava de novo ao final (estado mais recente)
+            self._snapshot_dirty = True
+            return
+        try:
+            self._snapshot_task = asyncio.get_running_loop().create_task(self._save_snapshot_loop())
+        except RuntimeError:
+            # Sem loop rodando (ex.: parsing manual em testes)
+            pass
+
+    async def _save_snapshot_loop(self):
+        while True:
+            self._snapshot_dirty = False
+            await save_snapshot_async(self.snapshot_path, self)
+            if not self._snapshot_dirty:
+                return
+
+    def _on_best_active_changed(self, instrument_type: str, old: Optional[dict], new: Optional[dict]):
+        """Re-emite mudanças do topo do ranking como evento local do Dispatcher."""
+        self._emit_event(EV_BEST_ACTIVE_CHANGED, {"instrument_type": instrument_type, "old": old, "new": new})
 
     async def start(self):
-        self.ssid = await self.auth.get_ssid()
-        
+        """
+        Connects and authenticates the client.
+
+        The HTTP login and the WebSocket TCP/TLS handshake run concurrently (the
+        handshake does not need the SSID), and every post-auth subscription is
+        pipelined. The per-phase breakdown (ms) is kept in ``self.startup_timings``.
+        """
+        t_start = time.perf_counter()
+        timings = {}
+
+        async def timed(phase: str, coro):
+            t0 = time.perf_counter()
+            try:
+                return await coro
+            finally:
+                timings[phase] = round((time.perf_counter() - t0) * 1000, 1)
+
+        # Warm-start: disponibiliza o cache antes de qualquer I/O de rede
+        if self.snapshot_path:
+            self.load_snapshot()
+            timings["snapshot"] = round((time.perf_counter() - t_start) * 1000, 1)
+
         # Reconexão Automática: Registrar Callback
         self.ws.on_reconnect = self._on_reconnect
         self.ws.on_message_hook = self._on_ws_message
         
-        logger.info("connecting_ws")
-        
-        
         # Registra listener para lista de ativos
         self.dispatcher.add_listener(EV_UNDERLYING_LIST_CHANGED, self._on_underlying_list_changed)
         
@@ -201,12 +404,40 @@ class IQOption:
         self.dispatcher.add_listener(EV_USER_SETTINGS, self._on_user_settings)
         # some logs show "set-user-settings" as trigger? No, usually "user-settings" is the event name.
         self.dispatcher.add_listener(EV_INIT_DATA, self._on_initialization_data)
+        self.dispatcher.add_listener(EV_BALANCE_CHANGED, self._on_balance_changed)
         
-        await self.ws.connect()
+        # 1. Login HTTP e handshake WS em paralelo
+        logger.info("connecting_ws")
+        results = await asyncio.gather(
+            timed("login", self.auth.get_ssid()),
+            timed("ws_connect", self.ws.connect()),
+            return_exceptions=True
+        )
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if errors:
+            await self.ws.close()
+            raise errors[0]
+        self.ssid = results[0]
         
+        # 2. Autenticação (precisa do SSID e do socket)
         logger.info("authenticating_ws")
-        await self._authenticate()
+        await timed("authenticate", self._authenticate_or_login())
+        
+        # 3. Inscrições pós-auth em pipeline (nenhuma depende da resposta da outra)
+        subscriptions = [self.subscribe_portfolio(), self.subscribe_balances()]
+        if self.market_data:
+            subscriptions += [self._request_initialization_data(), self.subscribe_actives()]
+        await timed("subscriptions", asyncio.gather(*subscriptions))
         
+        # Iniciar Heartbeat e sonda de latência
+        asyncio.create_task(self._heartbeat_loop())
+        self.latency.start()
+
+        timings["total"] = round((time.perf_counter() - t_start) * 1000, 1)
+        self.startup_timings = timings
+        logger.info("startup_completed", **timings)
+
+    async def _request_initialization_data(self):
         # Request initialization data explicitly (crucial for getting active lists like blitz)
         await self.ws.send({
             "name": "sendMessage",
@@ -217,12 +448,6 @@ class IQOption:
                 "body": {}
             }
         })
-            
-        await self.subscribe_portfolio()
-        await self.subscribe_actives()
-        
-        # Iniciar Heartbeat
-        asyncio.create_task(self._heartbeat_loop())
 
     def check_connect(self) -> bool:
         """
@@ -239,11 +464,15 @@ class IQOption:
         """Called automatically by ReconnectingWS when connection is restored."""
         logger.info("performing_reconnection_tasks")
         try:
-            # Re-Autenticar
-            await self._authenticate()
-            # Re-Inscrever
-            await self.subscribe_portfolio()
-            await self.subscribe_actives()
+            # Re-Autenticar (reusa o SSID atual; novo login só se o WS rejeitar)
+            await self._authenticate_or_login(relogin_on_reject=True)
+            # Eventos de saldo podem ter sido perdidos durante a queda
+            self._balances_refreshed_at = None
+            # Re-Inscrever (em pipeline)
+            subscriptions = [self.subscribe_portfolio(), self.subscribe_balances()]
+            if self.market_data:
+                subscriptions.append(self.subscribe_actives())
+            await asyncio.gather(*subscriptions)
             logger.info("reconnection_tasks_completed")
         except Exception as e:
             logger.error("reconnection_failed", error=str(e))
@@ -266,15 +495,51 @@ class IQOption:
 
     def _on_ws_message(self, msg: dict):
         if msg.get("name") == EV_TIME_SYNC:
-            server_ts = msg.get("msg")
-            local_ts = time.time() * 1000
-            self.server_time_offset = server_ts - local_ts
+            # Compensa metade do RTT mediano (atraso de ida do timeSync)
+            rtt = self.latency.percentile(50)
+            self.clock.update(msg.get("msg"), delay_ms=rtt * 500 if rtt else 0.0)
+
+    @property
+    def server_time_offset(self) -> float:
+        """Server minus local wall-clock time in ms (kept for compatibility; see :attr:`clock`)."""
+        return self.clock.wall_offset_ms
 
     def get_server_timestamp(self) -> int:
-        return int((time.time() * 1000 + self.server_time_offset) / 1000)
+        return int(self.clock.now())
+
+    def get_server_time_ms(self) -> int:
+        """Server time in milliseconds."""
+        return int(self.clock.now_ms())
+
+    def schedule_at(self, server_ts: float, callback: Callable, *args) -> ScheduledCall:
+        """
+        Runs ``callback(*args)`` (plain or coroutine function) at server time
+        ``server_ts`` (seconds, float), e.g. an order right at a candle close::
+
+            iq.schedule_at(candle_from + 60, armed.fire, "call")
+        """
+        return self.clock.call_at(server_ts, callback, *args)
+
+    async def _authenticate_or_login(self, relogin_on_reject: bool = False) -> bool:
+        """
+        Authenticates the WS with the current SSID. If the server rejects it and the
+        SSID came from the on-disk cache (or ``relogin_on_reject`` is set, as on
+        reconnect), performs a fresh HTTP login and tries once more. Transport
+        errors propagate untouched (the SSID stays valid; reconnect handles them).
+        """
+        try:
+            return await self._authenticate()
+        except AuthRejected:
+            if not (relogin_on_reject or self.auth.ssid_from_cache):
+                raise
+            logger.warning("ssid_rejected_relogin", from_cache=self.auth.ssid_from_cache)
+            self.auth.invalidate_ssid()
+            self.ssid = await self.auth.get_ssid(force_login=True)
+            return await self._authenticate()
 
     async def _authenticate(self) -> bool:
         req_id = get_req_id()
+        trace = self._start_trace(OP_AUTHENTICATE, req_id)
         future = self.dispatcher.create_future(req_id)
         
         # We also listen for the "authenticated" event directly just in case req_id is missing
@@ -286,211 +551,301 @@ class IQOption:
         
         self.dispatcher.add_listener(EV_AUTHENTICATED, on_auth_msg)
         
-        await self.ws.send({
-            "name": OP_AUTHENTICATE,
-            "request_id": req_id,
-            "msg": {"ssid": self.ssid, "protocol": 3}
-        })
-        
+        status = "error"
         try:
+            if trace: trace.mark("enqueue")
+            await self.ws.send({
+                "name": OP_AUTHENTICATE,
+                "request_id": req_id,
+                "msg": {"ssid": self.ssid, "protocol": 3}
+            })
+            if trace: trace.mark("wire_send")
+
             # Wait for either the request-specific response or the global authenticated event
             done, pending = await asyncio.wait(
                 [future, auth_event_future], 
                 return_when=asyncio.FIRST_COMPLETED,
                 timeout=10.0
             )
+            if trace: trace.mark("caller_resumed")
             
             for p in pending: p.cancel()
             
             if not done:
+                status = "timeout"
                 logger.error("auth_timeout")
                 return False
                 
             res = list(done)[0].result()
             
             # Check if it's an error message
-            if res.get("name") == "error" or (res.get("msg") and res["msg"] == "unauthenticated"):
+            if res.get("name") == "error" or res.get("msg") is False or (res.get("msg") and res["msg"] == "unauthenticated"):
+                status = "rejected"
                 logger.error("auth_failed", response=res)
                 msg_content = res.get("msg")
-                raise ConnectionError(f"Falha na autenticação via WebSocket: {msg_content}")
+                raise AuthRejected(f"Falha na autenticação via WebSocket: {msg_content}")
                 
+            status = "ok"
             logger.info("authenticated_successfully")
             return True
         finally:
             self.dispatcher.remove_listener(EV_AUTHENTICATED, on_auth_msg)
+            self.dispatcher.discard_future(req_id)
+            self._finish_trace(trace, status)
 
-    async def get_financial_info(self, active_id: int):
+    async def get_financial_info(self, active_id: int, use_cache: bool = True):
         """
         Request detailed financial information (GraphQL) for an active.
         This provides technical indicators changes (m1, ytd), full name, description, etc.
+        Results are kept in :attr:`financial_cache` (LRU + TTL) and concurrent calls
+        for the same active share a single request.
+        """
+        active_id = int(active_id)
+        if use_cache:
+            cached = self.financial_cache.get(active_id)
+            if cached is not None:
+                return cached
+        key = request_key(OP_GET_FINANCIAL_INFO, "1.0", {"activeId": active_id})
+        info = await self.single_flight.do(OP_GET_FINANCIAL_INFO, key, lambda: self._fetch_financial_info(active_id))
+        if info:
+            self.financial_cache.set(active_id, info)
+        return info
+
+    async def get_financial_info_many(self, active_ids: List[int], limit: int = 4, batch_size: int = 10) -> Dict[int, Optional[dict]]:
+        """
+        Financial info for several actives: ``{active_id: info or None}``.
+
+        Cached entries are served locally; the rest are requested ``batch_size`` at a
+        time in one aliased GraphQL query, with at most ``limit`` requests in flight.
+        Actives missing from a batched answer (or a failed batch) are fetched one by one.
+        """
+        ids = list(dict.fromkeys(int(a) for a in active_ids))
+        results: Dict[int, Optional[dict]] = {}
+        missing = []
+        for active_id in ids:
+            cached = self.financial_cache.get(active_id)
+            if cached is not None:
+                results[active_id] = cached
+            else:
+                missing.append(active_id)
+
+        sem = asyncio.Semaphore(limit)
+
+        async def single(active_id: int):
+            async with sem:
+                results[active_id] = await self.get_financial_info(active_id, use_cache=False)
+
+        async def batch(chunk: List[int]):
+            async with sem:
+                found = await self._fetch_financial_info_batch(chunk)
+            for active_id, info in found.items():
+                self.financial_cache.set(active_id, info)
+                results[active_id] = info
+            # Fallback por ativo para o que o servidor não respondeu no lote
+            await asyncio.gather(*(single(a) for a in chunk if a not in found))
+
+        chunks = [missing[i:i + batch_size] for i in range(0, len(missing), batch_size)]
+        await asyncio.gather(*(batch(c) if len(c) > 1 else single(c[0]) for c in chunks))
+        return {active_id: results.get(active_id) for active_id in ids}
+
+    async def _graphql_request(self, body: dict, may_reject: bool = False, **log) -> Optional[dict]:
+        """
+        Sends a financial-information (GraphQL) request. Returns the reply's ``msg`` or None.
+        With ``may_reject`` a reply carrying ``errors`` is an expected outcome (e.g. a
+        batched query the server refuses) and does not slow the operation down.
         """
         req_id = get_req_id()
+        trace = self._start_trace(OP_GET_FINANCIAL_INFO, req_id, **log)
+        await self.limiter.acquire(OP_GET_FINANCIAL_INFO)
         future = self.dispatcher.create_future(req_id)
-        
-        # The complex GraphQL query from the logs
-        query = """query GetAssetProfileInfo($activeId:ActiveID!, $locale: LocaleName, $instrumentType: InstrumentTypeName!, $userGroupId: UserGroupID){
-      active(id: $activeId) {
-        id
-        name(source: TradeRoom, locale: $locale)
-        ticker
-        price
-        media {
-          siteBackground
-        }
-        
-        expirations(instrument: $instrumentType, userGroupID: $userGroupId) {
-            endOfDay
-            endOfHour
-            endOfMonth
-            endOfWeek
-            min(instrument: $instrumentType)
-            values(instrument: $instrumentType) {
-                value
-            }
-        }
-        charts {
-          dtd {
-            change
-          }
-          m1 {
-            change
-          }
-          y1 {
-            change
-          }
-          ytd {
-            change
-          }
-        }
-        index_fininfo: fininfo {
-          ... on Index {
-            description(locale: $locale)
-          }
-        }
-        fininfo {
-          ... on Pair {
-            type
-            description(locale: $locale)
-            currency {
-              name(locale: $locale)
-            }
-            base {
-              name(locale: $locale)
-              ... on Stock {
-                company {
-                  country {
-                    nameShort
-                  }
-                  gics {
-                    sector(locale: $locale)
-                    industry(locale: $locale)
-                  }
-                  site
-                  domain
-                }
-                keyStat {
-                  marketCap
-                  peRatioHigh
-                }
-              }
-              ... on CryptoCurrency {
-                site
-                domain
-                coinsInCirculation
-                maxCoinsQuantity
-                volume24h
-                marketCap
-              }
-            }
-          }
-        }
-      }
-    }"""
-        
-        # We need to guess or default some params.
-        # instrumentType: "BlitzOption" works for blitz, but maybe dynamic? 
-        # For general safety we can use "DigitalOption" or stick to what log showed if it's generic.
-        # The log used "BlitzOption" for active 2276. Let's try to infer or default.
-        inst_type = "BlitzOption"
-        
         payload = {
             "name": "sendMessage", # Wrapped message
             "request_id": req_id,
             "msg": {
                 "name": OP_GET_FINANCIAL_INFO,
                 "version": "1.0",
-                "body": {
-                    "query": query,
-                    "variables": {
-                        "activeId": int(active_id),
-                        "locale": "pt_PT", # Hardcoded to user preference or config
-                        "instrumentType": inst_type,
-                        "userGroupId": 1 # Default group
-                    },
-                    "operationName": "GetAssetProfileInfo"
-                }
+                "body": body
             }
         }
-        
-        await self.ws.send(payload)
-        
+
         try:
+            if trace: trace.mark("enqueue")
+            await self.ws.send(payload)
+            if trace: trace.mark("wire_send")
+            t0 = time.perf_counter()
             res = await asyncio.wait_for(future, timeout=10.0)
-            # The structure is res['msg']['data']['active']
-            return res.get("msg", {}).get("data", {}).get("active", {})
+            self._request_rtt.labels(OP_GET_FINANCIAL_INFO).observe(time.perf_counter() - t0)
+            msg = res.get("msg", {})
+            self._finish_trace(trace, "error" if msg.get("errors") else "ok")
+            if not (may_reject and msg.get("errors")):
+                self.limiter.record(OP_GET_FINANCIAL_INFO, not msg.get("errors"))
+            return msg
         except asyncio.TimeoutError:
-            logger.error("financial_info_timeout", active_id=active_id)
+            self._finish_trace(trace, "timeout")
+            self.limiter.record(OP_GET_FINANCIAL_INFO, False)
+            logger.error("financial_info_timeout", **log)
             return None
         except Exception as e:
+            self._finish_trace(trace, "error", error=str(e))
             logger.error("financial_info_error", error=str(e))
             return None
+        finally:
+            self.dispatcher.discard_future(req_id)
 
-    async def _send_with_retry(self, name: str, body: dict, version: str = "1.0", timeout: float = 20.0, retries: int = 3) -> dict:
-        """Helper to send WsRequests with retry logic."""
+    async def _fetch_financial_info(self, active_id: int):
+        msg = await self._graphql_request(financial_info_body(active_id), active_id=active_id)
+        if msg is None:
+            return None
+        # The structure is res['msg']['data']['active']
+        return (msg.get("data") or {}).get("active", {})
+
+    async def _fetch_financial_info_batch(self, active_ids: List[int]) -> Dict[int, dict]:
+        # Lote recusado pelo servidor cai no fallback por ativo: não é sinal de sobrecarga
+        msg = await self._graphql_request(financial_info_batch_body(active_ids), may_reject=True, active_ids=active_ids)
+        data = (msg or {}).get("data") or {}
+        found = {}
+        for active_id in active_ids:
+            info = data.get(alias(active_id))
+            if info:
+                found[active_id] = info
+        return found
+
+    async def _send_with_retry(self, name: str, body: dict, version: str = "1.0", timeout: Optional[float] = None, retries: int = 3) -> dict:
+        """Helper to send WsRequests with retry logic.
+
+        Identical concurrent requests (same ``name``, ``version`` and body) are
+        coalesced into one round trip by :attr:`single_flight`; the shared reply is
+        returned to every caller and must not be mutated.
+        """
+        return await self.single_flight.do(
+            name, request_key(name, version, body),
+            lambda: self._send_request(name, body, version, timeout, retries)
+        )
+
+    async def _send_request(self, name: str, body: dict, version: str, timeout: Optional[float], retries: int) -> dict:
+        """
+        Sends one request with retries. Without an explicit ``timeout`` the value is derived from the measured RTT
+        (see :meth:`LatencyMonitor.suggest_timeout`), capped at 20s. Every attempt
+        goes through :attr:`limiter`, and error replies / timeouts slow the operation down.
+        """
+        if timeout is None:
+            timeout = self.latency.suggest_timeout(20.0)
         for attempt in range(1, retries + 1):
             req_id = get_req_id()
+            trace = self._start_trace(name, req_id, attempt=attempt)
             future = self.dispatcher.create_future(req_id)
             payload = WsRequest(name="sendMessage", request_id=req_id, msg=WsMessageBody(name=name, version=version, body=body))
             
             try:
-                await self.ws.send(payload.model_dump())
-                return await asyncio.wait_for(future, timeout=timeout)
+                await self.limiter.acquire(name)
+                data = payload.model_dump()
+                if trace: trace.mark("enqueue")
+                await self.ws.send(data)
+                if trace: trace.mark("wire_send")
+                t0 = time.perf_counter()
+                res = await asyncio.wait_for(future, timeout=timeout)
+                rtt = time.perf_counter() - t0
+                self._request_rtt.labels(name).observe(rtt)
+                self.latency.observe(rtt)
+                # 'status' pode vir null no payload
+                status = res.get("status") or 2000
+                self._finish_trace(trace, status)
+                self.limiter.record(name, status < 4000)
+                return res
             except asyncio.TimeoutError:
+                self._finish_trace(trace, "timeout")
+                self.limiter.record(name, False)
                 logger.warning("request_timeout", name=name, attempt=attempt)
                 if attempt == retries:
                     raise TimeoutError(f"Request '{name}' timed out after {retries} attempts.")
             except Exception as e:
+                self._finish_trace(trace, "error", error=str(e))
                 logger.error("request_error", name=name, error=str(e), attempt=attempt)
                 if attempt == retries: raise
                 await asyncio.sleep(0.5)
+            finally:
+                # Falha de envio/cancelamento não pode deixar o future órfão no dispatcher
+                self.dispatcher.discard_future(req_id)
         return {}
 
     async def subscribe_portfolio(self):
         req_ids = [get_sub_id(), get_sub_id()]
-        # Ordem alterada
-        await self.ws.send({
-            "name": "subscribeMessage",
-            "request_id": req_ids[0],
-            "msg": {"name": "portfolio.order-changed", "version": "2.0", "params": {"routingFilters": {"instrument_type": INSTRUMENT_TYPE_BLITZ}}}
-        })
-        # Posição alterada (Resultado)
+        await asyncio.gather(
+            # Ordem alterada
+            self.ws.send({
+                "name": "subscribeMessage",
+                "request_id": req_ids[0],
+                "msg": {"name": "portfolio.order-changed", "version": "2.0", "params": {"routingFilters": {"instrument_type": INSTRUMENT_TYPE_BLITZ}}}
+            }),
+            # Posição alterada (Resultado)
+            self.ws.send({
+                "name": "subscribeMessage",
+                "request_id": req_ids[1],
+                "msg": {"name": "portfolio.position-changed", "version": "3.0", "params": {"routingFilters": {"instrument_type": INSTRUMENT_TYPE_BLITZ}}}
+            }),
+        )
+        logger.info("portfolio_subscribed")
+
+    async def subscribe_balances(self):
+        """Subscribes to balance-changed so :attr:`balances` stays current without polling."""
         await self.ws.send({
             "name": "subscribeMessage",
-            "request_id": req_ids[1],
-            "msg": {"name": "portfolio.position-changed", "version": "3.0", "params": {"routingFilters": {"instrument_type": INSTRUMENT_TYPE_BLITZ}}}
+            "request_id": get_sub_id(),
+            "msg": {"name": OP_SUBSCRIBE_BALANCE_CHANGED, "version": "1.0"}
         })
-        logger.info("portfolio_subscribed")
 
-    async def get_balances(self) -> List[Balance]:
+    def _on_balance_changed(self, message: dict):
+        msg = message.get("msg", {})
+        if not isinstance(msg, dict):
+            return
+        data = msg.get("current_balance", msg)
+        try:
+            balance = Balance(**data)
+        except Exception as e:
+            logger.debug("balance_event_parse_error", error=str(e))
+            return
+        self.balances[balance.id] = balance
+        logger.debug("balance_changed", id=balance.id, amount=balance.amount)
+
+    async def get_balances(self, max_age: Optional[float] = None) -> List[Balance]:
+        """
+        Returns every balance of the account.
+
+        With ``max_age`` (seconds) the live cache is returned without a round trip
+        if the last full refresh is at most that old (balance-changed events keep it
+        current in between). Without it the balances are always fetched.
+        """
+        if max_age is not None and self._balances_refreshed_at is not None \
+                and time.monotonic() - self._balances_refreshed_at <= max_age:
+            return list(self.balances.values())
         res = await self._send_with_retry(OP_GET_BALANCES, {"types_ids": [1, 4, 2, 6]}, version="1.0")
-        return [Balance(**b) for b in res.get("msg", [])]
+        balances = [Balance(**b) for b in res.get("msg", [])]
+        self.balances = {b.id: b for b in balances}
+        self._balances_refreshed_at = time.monotonic()
+        return balances
+
+    def get_balance(self, balance_id: Optional[int] = None) -> Optional[Balance]:
+        """Cached balance (default: the selected one), no network. None if unknown."""
+        return self.balances.get(balance_id if balance_id is not None else self.active_balance_id)
 
     async def change_balance(self, balance_id: int):
         self.active_balance_id = balance_id
         logger.info("balance_selected", id=balance_id)
 
     # --- CANDLES STREAM ---
-    async def start_candles_stream(self, active_id: int, duration: int, callback: Callable[[dict], None]):
+    async def start_candles_stream(self, active_id: int, duration: int, callback: Callable[[dict], None],
+                                   on_close: Optional[Callable[[dict], None]] = None):
+        """
+        Streams ``candle-generated`` ticks of ``active_id``/``duration`` to ``callback``.
+
+        Candle closes are emitted by a server-time timer at ``from + size`` as the
+        local ``candle-closed`` event and passed to ``on_close`` (if given) with the
+        last known values. A tick arriving late for a closed candle triggers another
+        close with the corrected values and ``"is_correction": True``.
+
+        Calling it again for the same ``active_id``/``duration`` adds the new
+        callbacks to the running stream (one tracker and listener per pair).
+        """
         # "Shotgun" approach: Configura o Grid para todos os tipos possíveis.
         # Isso garante que o stream inicie independente se é Turbo, Binary, Digital ou Blitz sem o usuário precisar adivinhar.
         types_to_try = [INSTRUMENT_TYPE_BLITZ, "turbo-option", "binary-option", "digital-option"]
@@ -534,17 +889,47 @@ class IQOption:
             }
         })
 
-        # 3. Listener
+        # Mesmo ativo/timeframe já em stream: acrescenta os callbacks sem derrubar os consumidores anteriores
+        key = (int(active_id), int(duration))
+        stream = self._candle_streams.get(key)
+        if stream is not None:
+            _, callbacks, close_callbacks = stream
+            if callback not in callbacks:
+                callbacks.append(callback)
+            if on_close is not None and on_close not in close_callbacks:
+                close_callbacks.append(on_close)
+            logger.info("stream_joined", active=active_id, consumers=len(callbacks))
+            return
+
+        callbacks = [callback]
+        close_callbacks = [on_close] if on_close is not None else []
+
+        def notify(cb, data):
+            if asyncio.iscoroutinefunction(cb):
+                asyncio.create_task(cb(data))
+            else:
+                cb(data)
+
+        # 3. Fechamento por timer na hora do servidor
+        def emit_close(data):
+            self._emit_event(EV_CANDLE_CLOSED, data)
+            for cb in close_callbacks:
+                notify(cb, data)
+
+        tracker = CandleCloseTracker(self.clock, int(active_id), int(duration), emit_close)
+
+        # 4. Listener (um por ativo/timeframe, repassa a todos os consumidores)
         def on_candle(msg):
             if msg.get("name") == EV_CANDLE_GENERATED:
                 data = msg.get("msg", {})
-                # Validação de string para evitar erro de tipo
-                if str(data.get("active_id")) == str(active_id):
-                    if asyncio.iscoroutinefunction(callback):
-                        asyncio.create_task(callback(data))
-                    else:
-                        callback(data)
+                # Validação de string para evitar erro de tipo; o listener recebe todos os
+                # timeframes do ativo, então o tamanho também é filtrado
+                if str(data.get("active_id")) == str(active_id) and int(data.get("size", duration)) == int(duration):
+                    for cb in callbacks:
+                        notify(cb, data)
+                    tracker.on_tick(data)
 
+        self._candle_streams[key] = (tracker, callbacks, close_callbacks)
         self.dispatcher.add_listener(EV_CANDLE_GENERATED, on_candle)
         logger.info("stream_started", active=active_id)
 
@@ -616,34 +1001,81 @@ class IQOption:
         Returns the profit percentage for the active (e.g. 86).
         Calculates from commission if explicit field is missing.
         """
-        data = self.check_active(active_id)
-        
-        # 1. Try direct field
-        if "profit_percent" in data:
-            return data["profit_percent"]
-            
-        # 2. Try calculation from commission (100 - commission)
-        # Structure: data['option']['profit']['commission']
-        try:
-            commission = data.get("option", {}).get("profit", {}).get("commission")
-            if commission is not None:
-                return 100 - int(commission)
-        except:
-            pass
-            
-        return 0
+        return extract_profit_percent(self.check_active(active_id))
+
+    def best_actives(self, instrument_type: str = "blitz", n: int = 1, min_payout: int = 0, exclude=None) -> List[dict]:
+        """
+        Returns the ``n`` open actives with the highest payout, straight from the
+        live ranking (no network round trip).
+
+        Args:
+            instrument_type: 'blitz', 'turbo', 'binary', 'digital' (the '-option' suffix is accepted).
+            n: Maximum number of actives returned.
+            min_payout: Minimum payout (%) to be considered.
+            exclude: Iterable of active ids to skip (e.g. banned actives).
+
+        Returns:
+            List of ``{"active_id", "profit_percent", "name"}`` ordered by payout.
+        """
+        return self.ranking.best_actives(instrument_type, n, min_payout, exclude=exclude)
 
     def is_active_open(self, active_id: int) -> bool:
         """Checks if the active is currently open for trading."""
-        info = self.check_active(active_id)
-        return info.get("enabled", False) and not info.get("is_suspended", True)
+        return extract_is_open(self.check_active(active_id))
+
+    # --- TRACING ---
+    def enable_tracing(self, path: Optional[str] = "myiq_traces.jsonl", sample_rate: float = 0.1) -> Tracer:
+        """
+        Traces a fraction ``sample_rate`` of the requests (``_send_with_retry``,
+        ``open_blitz``/``buy_blitz``, authentication, financial info): per
+        ``request_id``, the time spent in enqueue, wire_send, first_response,
+        future_resolved and caller_resumed, appended as JSON lines to ``path``
+        (None: only kept in ``tracer.recent``).
+        """
+        self.disable_tracing()
+        self.tracer = Tracer(path, sample_rate=sample_rate)
+        self.dispatcher.tracer = self.tracer
+        return self.tracer
+
+    def disable_tracing(self):
+        if self.tracer is not None:
+            self.tracer.close()
+        self.tracer = None
+        self.dispatcher.tracer = None
+
+    def _start_trace(self, operation: str, request_id: str, **attrs) -> Optional[Trace]:
+        return self.tracer.start(operation, request_id, **attrs) if self.tracer is not None else None
+
+    def _finish_trace(self, trace: Optional[Trace], status="ok", **attrs):
+        if trace is not None and self.tracer is not None:
+            self.tracer.finish(trace, status, **attrs)
+
+    async def serve_metrics(self, port: int = 9464, host: str = "127.0.0.1"):
+        """
+        Serves :attr:`metrics` as Prometheus text on ``http://host:port/metrics``
+        (stopped by :meth:`close`). The same data is available in-process via
+        ``iq.metrics.snapshot()``.
+        """
+        return await self.metrics.serve(port, host)
 
     async def close(self):
-        """Close the WebSocket connection."""
+        """Close the WebSocket connection (and persist the snapshot if enabled)."""
+        self.latency.stop()
+        await self.metrics.stop()
+        if self.tracer is not None:
+            self.tracer.close()
+        if self._snapshot_task is not None and not self._snapshot_task.done():
+            # Deixa a escrita em andamento terminar antes da final (não sobrescreve o estado mais novo)
+            self._snapshot_dirty = False
+            await asyncio.gather(self._snapshot_task, return_exceptions=True)
+        if self.snapshot_path and not self.is_stale:
+            await save_snapshot_async(self.snapshot_path, self)
         await self.ws.close()
+        await self.auth.aclose()
+
     async def buy_blitz(self, active_id: int, direction: str, amount: float, duration: int = 30) -> dict:
         """
-        Executes a Blitz option trade.
+        Executes a Blitz option trade and waits for its result.
         
         Args:
             active_id: Asset ID (e.g. 76 for EURUSD).
@@ -651,6 +1083,21 @@ class IQOption:
             amount: Investment amount.
             duration: Duration in seconds (default 30).
         """
+        try:
+            handle = await self.open_blitz(active_id, direction, amount, duration)
+        except TimeoutError:
+            return {"status": "error", "result": "timeout", "pnl": 0}
+        return await handle.result
+
+    async def open_blitz(self, active_id: int, direction: str, amount: float, duration: int = 30) -> TradeHandle:
+        """
+        Sends a Blitz option order and returns as soon as the server ACKs it.
+
+        The returned :class:`TradeHandle` exposes ``opened``, ``result`` and ``pnl``
+        awaitables. If no result arrives within ``max(duration, 60) + 30`` seconds the
+        handle resolves with ``{"status": "error", "result": "timeout", "pnl": 0}``.
+        Results of all trades are also available via :meth:`trade_results`.
+        """
         if not self.active_balance_id:
             raise ValueError("Saldo não selecionado. Use change_balance() primeiro.")
 
@@ -665,6 +1112,45 @@ class IQOption:
             # Ideal seria esperar o explorer, mas vamos assumir que o usuário já carregou a lista
             
         req_id = get_req_id()
+        trace = self._start_trace(OP_OPEN_OPTION, req_id, active_id=active_id)
+        body = self._blitz_body(active_id, direction.lower(), amount, duration, self._blitz_expiration(), profit_percent)
+
+        # Future para resposta imediata do servidor (ACK)
+        ack_future = self.dispatcher.create_future(req_id)
+        
+        logger.info("sending_blitz_order", active=active_id, direction=direction)
+        
+        # 1. Enviar Request
+        try:
+            await self.limiter.acquire(OP_OPEN_OPTION)
+            if trace: trace.mark("enqueue")
+            await self.ws.send({
+                "name": "sendMessage",
+                "request_id": req_id,
+                "msg": {
+                    "name": OP_OPEN_OPTION,
+                    "version": "2.0",
+                    "body": body
+                }
+            })
+        except BaseException as e:
+            # Frame não saiu: nenhum ACK virá para este request_id
+            self.dispatcher.discard_future(req_id)
+            self._finish_trace(trace, "error", error=str(e) or type(e).__name__)
+            raise
+        if trace: trace.mark("wire_send")
+        self._time_order_ack(ack_future)
+        
+        # 2. Esperar ACK (Status 2000)
+        try:
+            ack = await self._wait_order_ack(req_id, ack_future, active_id)
+        except TimeoutError:
+            self._finish_trace(trace, "timeout")
+            raise
+        self._finish_trace(trace, ack.get("status"))
+        return self._register_order(ack, active_id, direction.lower(), amount, duration)
+
+    def _blitz_expiration(self) -> int:
         server_time = self.get_server_timestamp()
         if server_time == 0: server_time = int(time.time())
 
@@ -673,13 +1159,14 @@ class IQOption:
         # Blitz geralmente aceita múltiplos de 30s ou 60s alinhados
         # O log de sucesso mostrou expiração em :00 ou :30
         # Vamos usar a lógica (M+2) que funcionou nos testes manuais
-        expired = (server_time - (server_time % 60)) + 120
-        
-        body = {
+        return (server_time - (server_time % 60)) + 120
+
+    def _blitz_body(self, active_id: int, direction: str, amount: float, duration: int, expired, profit_percent: int) -> dict:
+        return {
             "user_balance_id": self.active_balance_id,
             "active_id": active_id,
             "option_type_id": OPTION_TYPE_BLITZ, # 12
-            "direction": direction.lower(),
+            "direction": direction,
             "expired": expired,
             "expiration_size": duration, # Importante enviar
             "refund_value": 0,
@@ -688,143 +1175,129 @@ class IQOption:
             "profit_percent": profit_percent
         }
 
-        # Future para resposta imediata do servidor (ACK)
-        ack_future = self.dispatcher.create_future(req_id)
-        
-        # Future para o ID da ordem (Order Created)
-        order_id_future = asyncio.get_running_loop().create_future()
-        
-        def on_order_created(msg):
-            # Escuta position-changed com result='opened'
-            if msg.get("name") == EV_POSITION_CHANGED:
-                raw = msg.get("msg", {})
-                evt = raw.get("raw_event", {}).get("binary_options_option_changed1", {})
-                
-                # Verifica se é a nossa ordem pelo active_id e direction (e tempo recente)
-                # O ideal seria bater o external_id, mas no ACK ele vem como 'id' dentro de msg.msg
-                # Vamos correlacionar no passo seguinte
-                if (str(evt.get("active_id")) == str(active_id) and 
-                    evt.get("direction") == direction.lower() and
-                    evt.get("result") == "opened"):
-                    
-                    if not order_id_future.done():
-                        # external_id na estrutura raw raiz é o ID da ordem
-                        order_id_future.set_result(raw.get("external_id") or raw.get("id"))
+    def _time_order_ack(self, ack_future: asyncio.Future):
+        """Records frame-written-to-ACK latency when ``ack_future`` resolves (call right after the send)."""
+        sent_at = time.perf_counter()
+        def observe(f: asyncio.Future):
+            if not f.cancelled():
+                self._order_ack.observe(time.perf_counter() - sent_at)
+        ack_future.add_done_callback(observe)
 
-        self.dispatcher.add_listener(EV_POSITION_CHANGED, on_order_created)
-        
-        logger.info("sending_blitz_order", active=active_id, direction=direction)
-        
+    async def _wait_order_ack(self, req_id: str, ack_future: asyncio.Future, active_id: int) -> dict:
         try:
-            # 1. Enviar Request
-            await self.ws.send({
+            return await asyncio.wait_for(ack_future, timeout=ORDER_ACK_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.error("order_ack_timeout", active=active_id)
+            raise TimeoutError("O servidor não confirmou a ordem (ACK) a tempo.")
+        finally:
+            self.dispatcher.discard_future(req_id)
+
+    def arm_blitz(self, active_id: int, amount: float, duration: int = 30) -> ArmedOrder:
+        """
+        Prepares a Blitz order ahead of the signal (payout, balance id and the
+        serialised frame). ``await armed.fire("call")`` then only fills direction,
+        expiry and request id and writes the frame. Call ``armed.disarm()`` when done.
+        """
+        if not self.active_balance_id:
+            raise ValueError("Saldo não selecionado. Use change_balance() primeiro.")
+        return ArmedOrder(self, active_id, amount, duration)
+
+    def _register_order(self, ack: dict, active_id: int, direction: str, amount: float, duration: int) -> TradeHandle:
+        """
+        Validates an open-option ACK and registers the order. Results arrive on the
+        session-wide ``portfolio.position-changed`` subscription (see :meth:`subscribe_portfolio`),
+        so no per-order subscribe-positions is sent.
+        """
+        # Validação do ACK
+        ack_status = ack.get("status")
+        if ack_status not in [0, 2000]:
+            msg_err = ack.get("msg")
+            if isinstance(msg_err, dict): msg_err = msg_err.get("message")
+            logger.error("trade_error", error=str(msg_err))
+            raise RuntimeError(f"Erro na abertura da ordem: {msg_err}")
+
+        # O ACK contém o ID da ordem em ack['msg']['id']
+        # É ele que correlaciona os eventos position-changed (external_id) no OrderTracker
+        order_id = ack.get("msg", {}).get("id")
+        logger.info("order_ack_received", order_id=order_id)
+        handle = self.orders.track(order_id, active_id=active_id, direction=direction, amount=amount, duration=duration)
+
+        # Timeout = duração da vela + margem de segurança (um timer, não uma coroutine por ordem)
+        wait_time = max(duration, 60) + 30
+        asyncio.get_running_loop().call_later(wait_time, self.orders.expire, order_id)
+        return handle
+
+    async def place_orders(self, orders: List[dict]) -> list:
+        """
+        Opens several Blitz orders in one burst.
+
+        All open-option frames are serialised first and written back to back, the
+        ACKs are awaited together. Results come from the portfolio subscription.
+
+        Args:
+            orders: ``[{"active_id": 76, "direction": "call", "amount": 1.0, "duration": 30}, ...]``
+                (``duration`` is optional, default 30).
+
+        Returns:
+            One entry per order, in the same order: a :class:`TradeHandle`, or the
+            exception raised for that order (ACK timeout / rejection).
+        """
+        if not self.active_balance_id:
+            raise ValueError("Saldo não selecionado. Use change_balance() primeiro.")
+
+        expired = self._blitz_expiration()
+        prepared = []
+        for order in orders:
+            direction = order["direction"].lower()
+            duration = order.get("duration", 30)
+            req_id = get_req_id()
+            body = self._blitz_body(order["active_id"], direction, order["amount"], duration, expired,
+                                    self.get_profit_percent(order["active_id"]))
+            frame = json.dumps({
                 "name": "sendMessage",
                 "request_id": req_id,
-                "msg": {
-                    "name": OP_OPEN_OPTION,
-                    "version": "2.0",
-                    "body": body
-                }
+                "msg": {"name": OP_OPEN_OPTION, "version": "2.0", "body": body}
             })
-            
-            # 2. Esperar ACK (Status 2000)
-            ack = await asyncio.wait_for(ack_future, timeout=10.0)
-            
-            # Validação do ACK
-            ack_status = ack.get("status")
-            if ack_status not in [0, 2000]:
-                msg_err = ack.get("msg")
-                if isinstance(msg_err, dict): msg_err = msg_err.get("message")
-                raise RuntimeError(f"Erro na abertura da ordem: {msg_err}")
-
-            # O ACK contém o ID da ordem em ack['msg']['id']
-            # Podemos usar isso para confirmar o evento position-changed
-            created_order_id = ack.get("msg", {}).get("id")
-            logger.info("order_ack_received", order_id=created_order_id)
-
-            # 3. Esperar Confirmação de Abertura (Position Changed -> Opened)
-            # Se já recebemos o ID no ACK, podemos esperar especificamente por ele
-            # Porem, o listener on_order_created já está rodando.
-            # Vamos esperar ele capturar ou usar o ID do ACK direto.
-            
-            # Vamos confiar no ID do ACK para subscrever, pois é mais rápido/seguro
-            order_id = created_order_id
-            
-            self.dispatcher.remove_listener(EV_POSITION_CHANGED, on_order_created) # Limpa listener genérico
+            prepared.append((req_id, self.dispatcher.create_future(req_id), frame, order, direction, duration))
 
-            # 4. MONITORAR RESULTADO (WIN/LOOSE)
-            # Inscrever especificamente nesse ID é boa prática
-            await self.ws.send({
-                "name": "sendMessage",
-                "request_id": get_req_id(),
-                "msg": {
-                    "name": OP_SUBSCRIBE_POSITIONS,
-                    "version": "1.0",
-                    "body": {"frequency": "frequent", "ids": [order_id]}
-                }
-            })
+        logger.info("sending_order_batch", count=len(prepared))
+        sent = 0
+        try:
+            for _, ack_future, frame, _, _, _ in prepared:
+                await self.limiter.acquire(OP_OPEN_OPTION)
+                await self.ws.send_raw(frame)
+                self._time_order_ack(ack_future)
+                sent += 1
+        except BaseException:
+            # Ordens que não saíram nunca terão ACK: libera os futures pendentes
+            for req_id, _, _, _, _, _ in prepared[sent:]:
+                self.dispatcher.discard_future(req_id)
+            raise
 
-            result_future = asyncio.get_running_loop().create_future()
-            
-            def on_result(msg):
-                if msg.get("name") == EV_POSITION_CHANGED:
-                    raw = msg.get("msg", {})
-                    # A estrutura pode vir de diferentes formas, precisamos checar todas
-                    # IDs podem ser string ou int
-                    msg_id = raw.get("id")
-                    external_id = raw.get("external_id")
-                    
-                    is_same_id = (str(msg_id) == str(order_id) or str(external_id) == str(order_id))
-                    
-                    if is_same_id:
-                        status = raw.get("status")
-                        evt = raw.get("raw_event", {}).get("binary_options_option_changed1", {})
-                        
-                        # O evento de fechamento geralmente tem status 'closed' OU o evento interno tem 'result'
-                        # Logs mostram result='win' no evento interno e status='closed' no externo
-                        
-                        is_closed = (status == "closed")
-                        has_result = (evt.get("result") in ["win", "loose", "equal"])
-                        
-                        if is_closed or has_result:
-                            if not result_future.done():
-                                # Parse do resultado
-                                # O PNL correto vem geralmente no nível raiz do msg ou calculado
-                                # Log: "pnl":0.8600000000000001
-                                pnl = raw.get("pnl", 0)
-                                if pnl == 0 and "profit_amount" in evt:
-                                     # Fallback calcular PNL
-                                     net = evt.get("profit_amount", 0) - evt.get("amount", 0)
-                                     pnl = net
-                                
-                                outcome = evt.get("result") or raw.get("close_reason")
-                                
-                                result_data = {
-                                    "status": "closed",
-                                    "result": outcome,
-                                    "profit": pnl, 
-                                    "pnl": pnl,
-                                    "order_id": order_id
-                                }
-                                result_future.set_result(result_data)
-
-            self.dispatcher.add_listener(EV_POSITION_CHANGED, on_result)
-            
-            # Timeout = duração da vela + margem de segurança
-            wait_time = max(duration, 60) + 30
-            logger.info("waiting_for_result", timeout=wait_time)
-            
-            trade_result = await asyncio.wait_for(result_future, timeout=wait_time)
-            return trade_result
+        acks = await asyncio.gather(
+            *(self._wait_order_ack(req_id, fut, order["active_id"]) for req_id, fut, _, order, _, _ in prepared),
+            return_exceptions=True
+        )
 
-        except asyncio.TimeoutError:
-            logger.error("trade_timeout")
-            return {"status": "error", "result": "timeout", "pnl": 0}
-        except Exception as e:
-            logger.error("trade_error", error=str(e))
-            raise
-        finally:
-            if 'on_order_created' in locals():
-                self.dispatcher.remove_listener(EV_POSITION_CHANGED, on_order_created)
-            if 'on_result' in locals():
-                self.dispatcher.remove_listener(EV_POSITION_CHANGED, on_result)
+        results = []
+        for ack, (_, _, _, order, direction, duration) in zip(acks, prepared):
+            if isinstance(ack, BaseException):
+                results.append(ack)
+                continue
+            try:
+                results.append(self._register_order(ack, order["active_id"], direction, order["amount"], duration))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def trade_results(self) -> AsyncIterator[dict]:
+        """
+        Async iterator over the results of every trade opened in this session::
+
+            async for result in iq.trade_results():
+                print(result["order_id"], result["result"], result["pnl"])
+
+        Results are collected from the moment this is called, even before the
+        first iteration (e.g. ``results = iq.trade_results()`` then open orders).
+        """
+        return self.orders.results()
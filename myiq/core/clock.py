@@ -0,0 +1,138 @@
+import time
+import asyncio
+import structlog
+from typing import Callable, Optional
+
+logger = structlog.get_logger()
+
+
+class ServerClock:
+    """
+    Server time model anchored on the monotonic clock.
+
+    Each ``timeSync`` sample gives ``offset = server_ms - monotonic_ms``. The
+    offset is tracked with an alpha-beta filter: ``alpha`` smooths sample jitter,
+    ``beta`` learns the drift (ms per ms) between the local and the server clock.
+    Samples further than ``step_ms`` from the prediction (server clock stepped,
+    machine slept) reset the model. Wall-clock jumps (NTP) never affect it.
+    Before the first sample the server time is the local wall clock.
+    """
+
+    def __init__(self, alpha: float = 0.2, beta: float = 0.02, step_ms: float = 1000.0,
+                 monotonic: Callable[[], float] = time.monotonic, wall: Callable[[], float] = time.time):
+        self.alpha = alpha
+        self.beta = beta
+        self.step_ms = step_ms
+        self._monotonic = monotonic
+        self._wall = wall
+        self._offset: Optional[float] = None # server_ms - mono_ms em _ref
+        self._ref = 0.0 # mono_ms da última amostra
+        self.drift = 0.0 # ms/ms
+        self.samples = 0
+        self.last_residual = 0.0
+
+    @property
+    def synced(self) -> bool:
+        return self._offset is not None
+
+    def _mono_ms(self) -> float:
+        return self._monotonic() * 1000
+
+    def _offset_at(self, mono_ms: float) -> float:
+        return self._offset + self.drift * (mono_ms - self._ref)
+
+    def update(self, server_ms: float, delay_ms: float = 0.0):
+        """Feeds one server timestamp (ms). ``delay_ms`` = estimated one-way delay of the message."""
+        mono_ms = self._mono_ms()
+        measured = server_ms + delay_ms - mono_ms
+        self.samples += 1
+        if self._offset is None:
+            self._offset, self._ref, self.drift = measured, mono_ms, 0.0
+            return
+
+        predicted = self._offset_at(mono_ms)
+        residual = measured - predicted
+        self.last_residual = residual
+        if abs(residual) > self.step_ms:
+            logger.warning("server_clock_step", residual_ms=round(residual, 1))
+            self._offset, self._ref, self.drift = measured, mono_ms, 0.0
+            return
+
+        dt = mono_ms - self._ref
+        self._offset = predicted + self.alpha * residual
+        if dt > 0:
+            self.drift += self.beta * residual / dt
+        self._ref = mono_ms
+
+    # --- LEITURA ---
+    def now_ms(self) -> float:
+        """Current server time in milliseconds."""
+        if self._offset is None:
+            return self._wall() * 1000
+        mono_ms = self._mono_ms()
+        return mono_ms + self._offset_at(mono_ms)
+
+    def now(self) -> float:
+        """Current server time in seconds (float, ms resolution)."""
+        return self.now_ms() / 1000
+
+    @property
+    def wall_offset_ms(self) -> float:
+        """Server time minus local wall-clock time, in ms (the old ``server_time_offset``)."""
+        return self.now_ms() - self._wall() * 1000
+
+    # --- AGENDAMENTO ---
+    def call_at(self, server_ts: float, callback: Callable, *args, rearm: float = 1.0) -> "ScheduledCall":
+        """
+        Runs ``callback(*args)`` on the running loop at server time ``server_ts``
+        (seconds). Coroutine functions are started as tasks. Long waits are re-armed
+        ``rearm`` seconds before the target so drift/offset updates made meanwhile
+        are taken into account.
+        """
+        return ScheduledCall(self, server_ts, callback, args, rearm)
+
+    async def sleep_until(self, server_ts: float):
+        """Sleeps until server time ``server_ts`` (seconds)."""
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        handle = self.call_at(server_ts, lambda: fut.done() or fut.set_result(None))
+        try:
+            await fut
+        finally:
+            handle.cancel()
+
+
+class ScheduledCall:
+    """Cancellable handle returned by :meth:`ServerClock.call_at`."""
+
+    def __init__(self, clock: ServerClock, server_ts: float, callback: Callable, args: tuple, rearm: float):
+        self.server_ts = server_ts
+        self._clock = clock
+        self._callback = callback
+        self._args = args
+        self._rearm = rearm
+        self._loop = asyncio.get_running_loop()
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self.cancelled = False
+        self.fired_at: Optional[float] = None # hora do servidor (s) em que o callback rodou
+        self._arm()
+
+    def _arm(self):
+        remaining = self.server_ts - self._clock.now()
+        if remaining > self._rearm:
+            # Acorda um pouco antes e recalcula com o modelo de relógio atualizado
+            self._handle = self._loop.call_at(self._loop.time() + remaining - self._rearm / 2, self._arm)
+        else:
+            self._handle = self._loop.call_at(self._loop.time() + max(0.0, remaining), self._fire)
+
+    def _fire(self):
+        self.fired_at = self._clock.now()
+        if asyncio.iscoroutinefunction(self._callback):
+            self._loop.create_task(self._callback(*self._args))
+        else:
+            self._callback(*self._args)
+
+    def cancel(self):
+        self.cancelled = True
+        if self._handle is not None:
+            self._handle.cancel()
@@ -1,19 +1,29 @@
 
 import json
+import time
 import asyncio
 import websockets
 import structlog
+from typing import Optional
 from myiq.core.constants import IQ_WS_URL
+from myiq.core.metrics import MetricsRegistry, FAST_BUCKETS
 
 logger = structlog.get_logger()
 
 class WSConnection:
-    def __init__(self, dispatcher):
-        self.url = IQ_WS_URL
+    def __init__(self, dispatcher, url: str = IQ_WS_URL, metrics: Optional[MetricsRegistry] = None):
+        self.url = url
+        self.metrics = metrics
+        if metrics is not None:
+            self._frames = metrics.counter("ws_frames_received_total", "WebSocket frames received")
+            self._bytes = metrics.counter("ws_bytes_received_total", "WebSocket payload bytes received")
+            self._decode_time = metrics.histogram("ws_decode_seconds", "JSON decode time per frame", buckets=FAST_BUCKETS)
         self.dispatcher = dispatcher
         self.ws = None
         self.is_connected = False
         self.on_message_hook = None
+        self.on_close = None # Callback chamado quando o loop de leitura termina sem close() explícito
+        self._closing = False
 
     async def connect(self):
         try:
@@ -37,12 +47,22 @@ class WSConnection:
 
     async def _loop(self):
         try:
-            async for msg in self.ws:
+            metrics = self.metrics
+            while True:
+                # Payload cru (sem decodificar UTF-8 no websockets): json.loads aceita bytes
+                # e o tamanho do frame sai de len(), sem recodificar
+                msg = await self.ws.recv(decode=False)
+                t0 = time.perf_counter()
                 try:
                     data = json.loads(msg)
-                except json.JSONDecodeError:
+                except ValueError: # JSON ou UTF-8 inválido
                     logger.error("ws_invalid_json", message=msg)
                     continue
+                self.dispatcher.frame_received_at = t0
+                if metrics is not None:
+                    self._decode_time.observe(time.perf_counter() - t0)
+                    self._frames.inc()
+                    self._bytes.inc(len(msg))
                     
                 if self.on_message_hook:
                     try:
@@ -51,8 +71,8 @@ class WSConnection:
                         logger.error("hook_error", error=str(e))
                         
                 self.dispatcher.dispatch(data)
-        except asyncio.CancelledError:
-            # Tarefa cancelada (shutdown normal)
+        except (asyncio.CancelledError, websockets.exceptions.ConnectionClosedOK):
+            # Tarefa cancelada ou fechamento limpo (shutdown normal)
             pass
         except Exception as e:
             # Ignora erro comum de fechamento do websockets onde o server não manda frame de volta
@@ -63,13 +83,32 @@ class WSConnection:
         finally:
             self.is_connected = False
             logger.warning("ws_connection_closed")
+            # Sinaliza a queda imediatamente (sem polling) para quem estiver monitorando
+            if self.on_close and not self._closing:
+                try:
+                    self.on_close()
+                except Exception as e:
+                    logger.error("on_close_error", error=str(e))
 
     async def send(self, data: dict):
+        await self.send_raw(json.dumps(data))
+
+    async def send_raw(self, text: str):
+        """Sends an already-serialised frame (used by pre-armed orders)."""
         if not self.is_connected or not self.ws:
             raise ConnectionError("WS not connected")
-        await self.ws.send(json.dumps(data))
+        await self.ws.send(text)
+
+    def abort(self):
+        """Drops the TCP connection immediately (no closing handshake), e.g. when it is half-open."""
+        transport = getattr(self.ws, "transport", None)
+        if transport is not None:
+            transport.abort()
+        elif self.ws:
+            asyncio.create_task(self.ws.close())
 
     async def close(self):
+        self._closing = True
         self.is_connected = False
         if self.ws:
             await self.ws.close()
@@ -1,6 +1,8 @@
+import os
 
-IQ_HTTP_URL = "https://auth.iqoption.com/api/v2/login"
-IQ_WS_URL = "wss://iqoption.com/echo/websocket"
+# Endpoints (sobrescrevíveis por variável de ambiente, ex.: servidor local de myiq.testing)
+IQ_HTTP_URL = os.environ.get("IQ_HTTP_URL", "https://auth.iqoption.com/api/v2/login")
+IQ_WS_URL = os.environ.get("IQ_WS_URL", "wss://iqoption.com/echo/websocket")
 
 # Operations
 OP_AUTHENTICATE = "authenticate"
@@ -10,6 +12,7 @@ OP_SUBSCRIBE_POSITIONS = "subscribe-positions"
 OP_GET_CANDLES = "get-candles"
 OP_SET_SETTINGS = "set-user-settings" # Gatilho para candles
 OP_GET_FINANCIAL_INFO = "get-financial-information"
+OP_SUBSCRIBE_BALANCE_CHANGED = "internal-billing.balance-changed"
 
 # Events
 EV_AUTHENTICATED = "authenticated"
@@ -17,6 +20,7 @@ EV_FINANCIAL_INFO = "financial-information"
 EV_TIME_SYNC = "timeSync"
 EV_POSITION_CHANGED = "position-changed"
 EV_CANDLE_GENERATED = "candle-generated"
+EV_BALANCE_CHANGED = "balance-changed"
 
 # Blitz
 OPTION_TYPE_BLITZ = 12
@@ -27,3 +31,10 @@ EV_PROFILE = "profile"
 EV_FEATURES = "features"
 EV_USER_SETTINGS = "user-settings" # Note: in logs it appears as "user-settings" or "set-user-settings" depending on context, but incoming is "user-settings" or via "sendMessage" wrapper.
 EV_INIT_DATA = "initialization-data"
+
+# Local events (emitted by the client itself through the Dispatcher)
+EV_BEST_ACTIVE_CHANGED = "best-active-changed"
+EV_ACTIVE_OPENED = "active-opened"
+EV_ACTIVE_CLOSED = "active-closed"
+EV_PAYOUT_CHANGED = "payout-changed"
+EV_CANDLE_CLOSED = "candle-closed"
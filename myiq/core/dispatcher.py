@@ -1,14 +1,30 @@
 
+import time
 import asyncio
 import structlog
-from typing import Dict, List, Callable
+from typing import Dict, List, Callable, Optional
+from myiq.core.metrics import MetricsRegistry, FAST_BUCKETS
 
 logger = structlog.get_logger()
 
 class Dispatcher:
-    def __init__(self):
+    def __init__(self, metrics: Optional[MetricsRegistry] = None):
         self._futures: Dict[str, asyncio.Future] = {}
         self._listeners: Dict[str, List[Callable]] = {}
+        # Sem registry: nenhum custo de instrumentação no dispatch
+        self.metrics = metrics
+        if metrics is not None:
+            self._dispatch_time = metrics.histogram("dispatch_seconds", "Dispatch time per event name (listeners included)",
+                                                    ("event",), buckets=FAST_BUCKETS)
+            self._listener_time = metrics.histogram("listener_seconds", "Time of each synchronous listener call",
+                                                    ("event",), buckets=FAST_BUCKETS)
+            metrics.gauge("pending_futures", "Requests waiting for a reply").set_function(lambda: len(self._futures))
+            # child por evento, sem montar a tupla de labels a cada frame
+            self._dispatch_children: Dict[str, object] = {}
+            self._listener_children: Dict[str, object] = {}
+        # Tracing opcional (IQOption.enable_tracing); o WSConnection anota quando o frame foi lido
+        self.tracer = None
+        self.frame_received_at: Optional[float] = None
 
     def create_future(self, request_id: str) -> asyncio.Future:
         loop = asyncio.get_running_loop()
@@ -16,6 +32,10 @@ class Dispatcher:
         self._futures[request_id] = future
         return future
 
+    def discard_future(self, request_id: str):
+        """Forgets a pending future (e.g. after the caller timed out) so it does not leak."""
+        self._futures.pop(request_id, None)
+
     def add_listener(self, event_name: str, callback: Callable):
         if event_name not in self._listeners:
             self._listeners[event_name] = []
@@ -26,8 +46,24 @@ class Dispatcher:
             if callback in self._listeners[event_name]:
                 self._listeners[event_name].remove(callback)
 
+    @staticmethod
+    def _observe(children: dict, histogram, name: str, seconds: float):
+        child = children.get(name)
+        if child is None:
+            child = children[name] = histogram.labels(name)
+        child.observe(seconds)
+
     def dispatch(self, message: dict):
         """Dispatches a message to the appropriate handlers."""
+        if self.metrics is None:
+            return self._dispatch(message)
+        t0 = time.perf_counter()
+        try:
+            self._dispatch(message)
+        finally:
+            self._observe(self._dispatch_children, self._dispatch_time, message.get("name"), time.perf_counter() - t0)
+
+    def _dispatch(self, message: dict):
         name = message.get("name")
         # print(f"[DEBUG-DISPATCH] Recebido: {name}") # Descomente para ver tudo
         
@@ -45,6 +81,8 @@ class Dispatcher:
             future = self._futures.pop(req_id)
             if not future.done():
                 future.set_result(message)
+            if self.tracer is not None:
+                self.tracer.resolved(req_id, self.frame_received_at)
 
         # 2. Tratamento de Listeners
         if name and name in self._listeners:
@@ -52,6 +90,12 @@ class Dispatcher:
                 try:
                     if asyncio.iscoroutinefunction(cb):
                         asyncio.create_task(cb(message))
+                    elif self.metrics is not None:
+                        t0 = time.perf_counter()
+                        try:
+                            cb(message)
+                        finally:
+                            self._observe(self._listener_children, self._listener_time, name, time.perf_counter() - t0)
                     else:
                         cb(message)
                 except Exception as e:
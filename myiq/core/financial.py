@@ -0,0 +1,123 @@
+from typing import Iterable
+
+# Campos pedidos para cada ativo (a query complexa capturada dos logs)
+ACTIVE_FIELDS = """{
+        id
+        name(source: TradeRoom, locale: $locale)
+        ticker
+        price
+        media {
+          siteBackground
+        }
+        
+        expirations(instrument: $instrumentType, userGroupID: $userGroupId) {
+            endOfDay
+            endOfHour
+            endOfMonth
+            endOfWeek
+            min(instrument: $instrumentType)
+            values(instrument: $instrumentType) {
+                value
+            }
+        }
+        charts {
+          dtd {
+            change
+          }
+          m1 {
+            change
+          }
+          y1 {
+            change
+          }
+          ytd {
+            change
+          }
+        }
+        index_fininfo: fininfo {
+          ... on Index {
+            description(locale: $locale)
+          }
+        }
+        fininfo {
+          ... on Pair {
+            type
+            description(locale: $locale)
+            currency {
+              name(locale: $locale)
+            }
+            base {
+              name(locale: $locale)
+              ... on Stock {
+                company {
+                  country {
+                    nameShort
+                  }
+                  gics {
+                    sector(locale: $locale)
+                    industry(locale: $locale)
+                  }
+                  site
+                  domain
+                }
+                keyStat {
+                  marketCap
+                  peRatioHigh
+                }
+              }
+              ... on CryptoCurrency {
+                site
+                domain
+                coinsInCirculation
+                maxCoinsQuantity
+                volume24h
+                marketCap
+              }
+            }
+          }
+        }
+      }"""
+
+_QUERY_PARAMS = "$locale: LocaleName, $instrumentType: InstrumentTypeName!, $userGroupId: UserGroupID"
+
+# We need to guess or default some params.
+# instrumentType: "BlitzOption" works for blitz, but maybe dynamic?
+# The log used "BlitzOption" for active 2276.
+DEFAULT_VARIABLES = {
+    "locale": "pt_PT", # Hardcoded to user preference or config
+    "instrumentType": "BlitzOption",
+    "userGroupId": 1 # Default group
+}
+
+
+def financial_info_body(active_id: int) -> dict:
+    """GraphQL body of the ``GetAssetProfileInfo`` query for one active (``data.active``)."""
+    query = (
+        f"query GetAssetProfileInfo($activeId:ActiveID!, {_QUERY_PARAMS}){{\n"
+        f"      active(id: $activeId) {ACTIVE_FIELDS}\n"
+        "    }"
+    )
+    return {
+        "query": query,
+        "variables": {"activeId": int(active_id), **DEFAULT_VARIABLES},
+        "operationName": "GetAssetProfileInfo"
+    }
+
+
+def alias(active_id: int) -> str:
+    return f"a{int(active_id)}"
+
+
+def financial_info_batch_body(active_ids: Iterable[int]) -> dict:
+    """
+    One query for several actives using GraphQL aliases: the answer for active
+    ``N`` is in ``data.aN`` (see :func:`alias`).
+    """
+    ids = [int(a) for a in active_ids]
+    params = "".join(f"$id{a}: ActiveID!, " for a in ids)
+    selections = "\n".join(f"      {alias(a)}: active(id: $id{a}) {ACTIVE_FIELDS}" for a in ids)
+    return {
+        "query": f"query GetAssetsProfileInfo({params}{_QUERY_PARAMS}){{\n{selections}\n    }}",
+        "variables": {**{f"id{a}": a for a in ids}, **DEFAULT_VARIABLES},
+        "operationName": "GetAssetsProfileInfo"
+    }
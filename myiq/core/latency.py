@@ -0,0 +1,164 @@
+import time
+import bisect
+import asyncio
+import structlog
+from collections import deque
+from typing import Optional, Sequence
+from myiq.core.utils import get_req_id
+from myiq.core.constants import EV_TIME_SYNC
+
+logger = structlog.get_logger()
+
+# Limites superiores (segundos) dos buckets do histograma de RTT
+DEFAULT_RTT_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class LatencyMonitor:
+    """
+    Application-level liveness probe and RTT histogram.
+
+    Every ``interval`` seconds the probe waits for the next ``timeSync`` the server
+    pushes (nothing is sent, so it costs the server nothing). With ``probe_name``
+    set it instead sends that request and records the round trip, correlated by
+    ``request_id``. When ``max_misses`` consecutive probes miss ``deadline``, the
+    connection is declared dead and a reconnect is forced (catches half-open TCP
+    connections that the disabled websockets ping would never notice).
+
+    The RTT histogram is also fed by the client's request round trips (:meth:`observe`).
+    """
+
+    def __init__(self, client, interval: float = 10.0, deadline: float = 5.0, max_misses: int = 2,
+                 probe_name: Optional[str] = None, probe_body: Optional[dict] = None, probe_version: str = "1.0",
+                 buckets: Sequence[float] = DEFAULT_RTT_BUCKETS):
+        self.client = client
+        self.interval = interval
+        self.deadline = deadline
+        self.max_misses = max_misses
+        self.probe_name = probe_name
+        self.probe_body = probe_body if probe_body is not None else {}
+        self.probe_version = probe_version
+
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * (len(self.buckets) + 1) # último = +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.last_rtt: Optional[float] = None
+        self._recent = deque(maxlen=256) # amostras recentes para percentis
+        self.misses = 0
+        self.dead_count = 0
+        self._task: Optional[asyncio.Task] = None
+
+    # --- CONTROLE ---
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    # --- MEDIÇÃO ---
+    def observe(self, rtt: float):
+        self.last_rtt = rtt
+        self.count += 1
+        self.sum += rtt
+        self.bucket_counts[bisect.bisect_left(self.buckets, rtt)] += 1
+        self._recent.append(rtt)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Percentile (0-100) over the recent samples, or None without data."""
+        if not self._recent:
+            return None
+        ordered = sorted(self._recent)
+        pos = min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))
+        return ordered[pos]
+
+    def histogram(self) -> dict:
+        """Cumulative histogram ``{upper_bound: count}`` plus count/sum (Prometheus-like)."""
+        cumulative = {}
+        running = 0
+        for bound, c in zip(list(self.buckets) + [float("inf")], self.bucket_counts):
+            running += c
+            cumulative[bound] = running
+        return {"buckets": cumulative, "count": self.count, "sum": self.sum}
+
+    def suggest_timeout(self, default: float, factor: float = 8.0, floor: float = 5.0) -> float:
+        """
+        Request timeout derived from observed RTT: ``p99 * factor`` bounded to
+        ``[floor, default]``. Returns ``default`` until there are samples.
+        """
+        p99 = self.percentile(99)
+        if p99 is None:
+            return default
+        return max(floor, min(default, p99 * factor))
+
+    # --- PROBE ---
+    async def probe(self) -> Optional[float]:
+        """
+        Runs one probe. Returns the seconds until the reply (request probe: the RTT,
+        also recorded) or until the next ``timeSync``, or None if the deadline was missed.
+        """
+        if self.probe_name is None:
+            return await self._wait_time_sync()
+        dispatcher = self.client.dispatcher
+        req_id = get_req_id()
+        future = dispatcher.create_future(req_id)
+        t0 = time.perf_counter()
+        try:
+            await self.client.ws.send({
+                "name": "sendMessage",
+                "request_id": req_id,
+                "msg": {"name": self.probe_name, "version": self.probe_version, "body": self.probe_body}
+            })
+            await asyncio.wait_for(future, timeout=self.deadline)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            dispatcher.discard_future(req_id)
+        rtt = time.perf_counter() - t0
+        self.observe(rtt)
+        return rtt
+
+    async def _wait_time_sync(self) -> Optional[float]:
+        dispatcher = self.client.dispatcher
+        received = asyncio.get_running_loop().create_future()
+
+        def on_time_sync(msg):
+            if not received.done():
+                received.set_result(None)
+
+        dispatcher.add_listener(EV_TIME_SYNC, on_time_sync)
+        t0 = time.perf_counter()
+        try:
+            await asyncio.wait_for(received, timeout=self.deadline)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            dispatcher.remove_listener(EV_TIME_SYNC, on_time_sync)
+        return time.perf_counter() - t0
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            ws = self.client.ws
+            if not ws.is_connected:
+                self.misses = 0
+                continue
+            try:
+                rtt = await self.probe()
+            except Exception as e:
+                logger.debug("latency_probe_error", error=str(e))
+                continue
+
+            if rtt is not None:
+                self.misses = 0
+                continue
+
+            self.misses += 1
+            logger.warning("latency_probe_missed", misses=self.misses, deadline=self.deadline)
+            if self.misses >= self.max_misses:
+                self.misses = 0
+                self.dead_count += 1
+                logger.error("connection_dead", deadline=self.deadline)
+                await ws.force_reconnect()
@@ -0,0 +1,47 @@
+import asyncio
+from typing import Any, Coroutine, Optional
+
+try:
+    import uvloop  # pip install myiq[uvloop]
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    uvloop = None
+    UVLOOP_AVAILABLE = False
+
+
+def new_event_loop(use_uvloop: bool = True) -> asyncio.AbstractEventLoop:
+    """uvloop loop when installed (and ``use_uvloop``), default asyncio loop otherwise."""
+    if use_uvloop and UVLOOP_AVAILABLE:
+        return uvloop.new_event_loop()
+    return asyncio.new_event_loop()
+
+
+def loop_name(loop: Optional[asyncio.AbstractEventLoop] = None) -> str:
+    loop = loop or asyncio.get_running_loop()
+    return "uvloop" if type(loop).__module__.startswith("uvloop") else "asyncio"
+
+
+def run(main: Coroutine, use_uvloop: bool = True, debug: Optional[bool] = None) -> Any:
+    """
+    ``asyncio.run`` on uvloop when it is installed (falls back to the default loop)::
+
+        from myiq import run
+        run(main())
+    """
+    if not (use_uvloop and UVLOOP_AVAILABLE):
+        return asyncio.run(main, debug=debug)
+    if hasattr(asyncio, "Runner"): # 3.11+
+        with asyncio.Runner(loop_factory=uvloop.new_event_loop, debug=debug) as runner:
+            return runner.run(main)
+    loop = uvloop.new_event_loop()
+    try:
+        asyncio.set_event_loop(loop)
+        if debug is not None:
+            loop.set_debug(debug)
+        return loop.run_until_complete(main)
+    finally:
+        try:
+            loop.run_until_complete(loop.shutdown_asyncgens())
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
@@ -0,0 +1,284 @@
+import math
+import asyncio
+import structlog
+from bisect import bisect_left
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+logger = structlog.get_logger()
+
+# Limites (segundos) dos histogramas: latências de rede / caminhos quentes em µs
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FAST_BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 5e-3, 0.01)
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+
+class CounterChild(_Value):
+    __slots__ = ()
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+
+class GaugeChild(_Value):
+    __slots__ = ("_fn",)
+
+    def __init__(self):
+        super().__init__()
+        self._fn: Optional[Callable[[], float]] = None
+
+    def set(self, value: float):
+        self.value = value
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.value -= amount
+
+    def set_function(self, fn: Callable[[], float]):
+        """Value computed on read (no cost on the hot path), e.g. ``len(pending)``."""
+        self._fn = fn
+
+    def get(self) -> float:
+        return float(self._fn()) if self._fn is not None else self.value
+
+
+class HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1) # último: +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list:
+        total, out = 0, []
+        for c in self.counts:
+            total += c
+            out.append(total)
+        return out
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate by linear interpolation inside the bucket (like PromQL ``histogram_quantile``)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        cum = self.cumulative()
+        i = bisect_left(cum, rank)
+        if i >= len(self.bounds):
+            return self.bounds[-1] # cai no +Inf: melhor estimativa é o maior limite
+        lower = self.bounds[i - 1] if i else 0.0
+        prev = cum[i - 1] if i else 0
+        in_bucket = cum[i] - prev
+        return lower + (self.bounds[i] - lower) * ((rank - prev) / in_bucket if in_bucket else 0.0)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str = "", labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values) -> object:
+        """Child for one combination of label values (cache it on hot paths)."""
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name}: esperado {len(self.labelnames)} labels, recebido {len(key)}")
+            child = self._children[key] = self._new_child()
+        return child
+
+    def samples(self):
+        return self._children.items()
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self._default.inc(amount)
+
+    @property
+    def value(self) -> float:
+        return self._default.value
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return GaugeChild()
+
+    def set(self, value: float):
+        self._default.set(value)
+
+    def inc(self, amount: float = 1.0):
+        self._default.inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self._default.dec(amount)
+
+    def set_function(self, fn: Callable[[], float]):
+        self._default.set_function(fn)
+
+    @property
+    def value(self) -> float:
+        return self._default.get()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str = "", labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.bounds = tuple(sorted(float(b) for b in buckets if not math.isinf(b)))
+        super().__init__(name, help, labelnames)
+
+    def _new_child(self):
+        return HistogramChild(self.bounds)
+
+    def observe(self, value: float):
+        self._default.observe(value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        return self._default.quantile(q)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class MetricsRegistry:
+    """
+    Counters, gauges and fixed-bucket histograms for the client hot paths.
+
+    Recording is a dict lookup plus a float add (histograms: one ``bisect``);
+    hot paths keep the labelled child (``metric.labels(...)``) instead of looking it
+    up per call. Read with :meth:`snapshot` or :meth:`render` (Prometheus text
+    format), or serve the latter over HTTP with :meth:`serve`.
+    """
+
+    def __init__(self, prefix: str = "myiq_"):
+        self.prefix = prefix
+        self._metrics: Dict[str, _Metric] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    def _get_or_create(self, cls, name: str, help: str, labelnames: Sequence[str], **kwargs) -> _Metric:
+        full_name = self.prefix + name
+        metric = self._metrics.get(full_name)
+        if metric is None:
+            metric = self._metrics[full_name] = cls(full_name, help, labelnames, **kwargs)
+        elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+            raise ValueError(f"Métrica já registrada com outro tipo/labels: {full_name}")
+        return metric
+
+    def counter(self, name: str, help: str = "", labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, help, labelnames)
+
+    def gauge(self, name: str, help: str = "", labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, help, labelnames)
+
+    def histogram(self, name: str, help: str = "", labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help, labelnames, buckets=buckets)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        """Metric by name, with or without the registry prefix."""
+        return self._metrics.get(name) or self._metrics.get(self.prefix + name)
+
+    def snapshot(self) -> dict:
+        """
+        ``{name: {"type", "help", "samples": [{"labels", ...}]}}``: counters and gauges
+        carry ``value``; histograms ``count``, ``sum``, ``p50``, ``p99`` and cumulative ``buckets``.
+        """
+        out = {}
+        for name, metric in self._metrics.items():
+            samples = []
+            for key, child in metric.samples():
+                sample = {"labels": dict(zip(metric.labelnames, key))}
+                if isinstance(child, HistogramChild):
+                    bounds = [_format_value(b) for b in child.bounds] + ["+Inf"]
+                    sample.update(count=child.count, sum=child.sum, p50=child.quantile(0.5), p99=child.quantile(0.99),
+                                  buckets=dict(zip(bounds, child.cumulative())))
+                else:
+                    sample["value"] = child.get() if isinstance(child, GaugeChild) else child.value
+                samples.append(sample)
+            out[name] = {"type": metric.kind, "help": metric.help, "samples": samples}
+        return out
+
+    def render(self) -> str:
+        """Prometheus text exposition format (0.0.4)."""
+        lines = []
+        for name, metric in self._metrics.items():
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for key, child in metric.samples():
+                pairs = [f'{l}="{_escape(v)}"' for l, v in zip(metric.labelnames, key)]
+                labels = "{" + ",".join(pairs) + "}" if pairs else ""
+                if isinstance(child, HistogramChild):
+                    for bound, cum in zip(list(child.bounds) + [math.inf], child.cumulative()):
+                        le = ",".join(pairs + [f'le="{_format_value(bound)}"'])
+                        lines.append(f"{name}_bucket{{{le}}} {cum}")
+                    lines.append(f"{name}_sum{labels} {_format_value(child.sum)}")
+                    lines.append(f"{name}_count{labels} {child.count}")
+                else:
+                    value = child.get() if isinstance(child, GaugeChild) else child.value
+                    lines.append(f"{name}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    # --- ENDPOINT HTTP ---
+    async def serve(self, port: int = 9464, host: str = "127.0.0.1") -> asyncio.AbstractServer:
+        """Serves :meth:`render` on ``http://host:port/metrics`` (any path) until :meth:`stop`."""
+        await self.stop()
+        self._server = await asyncio.start_server(self._handle_http, host, port)
+        logger.info("metrics_server_started", host=host, port=self._server.sockets[0].getsockname()[1])
+        return self._server
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle_http(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            await reader.readuntil(b"\r\n\r\n")
+            body = self.render().encode()
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                         + f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+            await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
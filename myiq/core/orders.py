@@ -0,0 +1,279 @@
+import json
+import time
+import string
+import asyncio
+import structlog
+from collections import OrderedDict, deque
+from typing import Dict, Optional, Set, AsyncIterator
+from myiq.core.utils import get_req_id
+from myiq.core.constants import EV_POSITION_CHANGED, EV_PAYOUT_CHANGED, OP_OPEN_OPTION, INSTRUMENT_TYPE_BLITZ
+from myiq.core.positions import PositionsStore
+
+logger = structlog.get_logger()
+
+def parse_trade_result(record: dict, order_id) -> dict:
+    """Builds the trade result dict returned by ``buy_blitz`` from a closed position record."""
+    return {
+        "status": "closed",
+        "result": record["result"],
+        "profit": record["pnl"],
+        "pnl": record["pnl"],
+        "order_id": order_id,
+    }
+
+
+class TradeHandle:
+    """
+    Handle of an order returned right after the ACK.
+
+    ``opened``, ``result`` and ``pnl`` are awaitables resolved by :class:`OrderTracker`
+    as position-changed events arrive, so no coroutine has to stay alive per trade.
+    """
+
+    def __init__(self, order_id, active_id=None, direction=None, amount=None, duration=None, on_result=None):
+        self.order_id = order_id
+        self.active_id = active_id
+        self.direction = direction
+        self.amount = amount
+        self.duration = duration
+        loop = asyncio.get_running_loop()
+        self.opened: asyncio.Future = loop.create_future()
+        self.result: asyncio.Future = loop.create_future()
+        self.pnl: asyncio.Future = loop.create_future()
+        self._on_result = on_result
+
+    def __repr__(self):
+        state = "closed" if self.result.done() else ("open" if self.opened.done() else "pending")
+        return f"<TradeHandle order_id={self.order_id} active_id={self.active_id} {self.direction} {state}>"
+
+    def done(self) -> bool:
+        return self.result.done()
+
+    def set_result(self, result: dict):
+        if self.result.done():
+            return
+        self.result.set_result(result)
+        if not self.pnl.done():
+            self.pnl.set_result(result.get("pnl", 0))
+        if self._on_result:
+            self._on_result(self, result)
+
+    def apply(self, raw: dict, record: dict):
+        if not self.opened.done():
+            self.opened.set_result(raw)
+        if record["status"] == "closed":
+            self.set_result(parse_trade_result(record, self.order_id))
+
+
+class ResultStream:
+    """Queue of trade results subscribed to an :class:`OrderTracker` from creation on."""
+
+    def __init__(self, subscribers: Set[asyncio.Queue]):
+        self._subscribers = subscribers
+        self._queue: asyncio.Queue = asyncio.Queue()
+        subscribers.add(self._queue)
+
+    def __aiter__(self) -> AsyncIterator[dict]:
+        return self
+
+    async def __anext__(self) -> dict:
+        if self._queue not in self._subscribers:
+            raise StopAsyncIteration
+        return await self._queue.get()
+
+    async def aclose(self):
+        self._subscribers.discard(self._queue)
+
+    def __del__(self):
+        # Iterador abandonado (ex.: break no async for): para de receber resultados
+        self._subscribers.discard(self._queue)
+
+
+class OrderTracker:
+    """
+    Single ``position-changed`` listener that routes every event to its order in O(1).
+
+    Events are matched by ``external_id`` (the id returned in the open-option ACK)
+    or by the position ``id``. Events for ids that are not tracked yet (e.g. the
+    'opened' event racing the ACK) are kept in a bounded backlog and replayed when
+    :meth:`track` is called, so correlation never falls back to asset/direction.
+
+    Closed orders are untracked automatically and their results are published to
+    every :meth:`results` iterator. Every event (tracked or not) also feeds
+    :attr:`positions`, the session's :class:`PositionsStore`.
+    """
+
+    def __init__(self, dispatcher, backlog_size: int = 1000):
+        self.positions = PositionsStore()
+        self._orders: Dict[str, TradeHandle] = {}
+        self._backlog: "OrderedDict[str, list]" = OrderedDict()
+        self._subscribers: Set[asyncio.Queue] = set()
+        self.backlog_size = backlog_size
+        dispatcher.add_listener(EV_POSITION_CHANGED, self._on_position_changed)
+
+    def __len__(self):
+        return len(self._orders)
+
+    def track(self, order_id, **meta) -> TradeHandle:
+        key = str(order_id)
+        handle = self._orders.get(key)
+        if handle is None:
+            handle = TradeHandle(order_id, on_result=self._on_result, **meta)
+            self._orders[key] = handle
+            self.positions.register(order_id, meta.get("active_id"), meta.get("direction"), meta.get("amount"))
+            for raw in self._backlog.pop(key, ()):
+                # Evento pode estar indexado pelo 'id' da posição: grava na chave da ordem
+                handle.apply(raw, self.positions.apply(raw, order_id))
+        return handle
+
+    def untrack(self, order_id):
+        self._orders.pop(str(order_id), None)
+
+    def get(self, order_id) -> Optional[TradeHandle]:
+        return self._orders.get(str(order_id))
+
+    def expire(self, order_id):
+        """Resolves a still-open order as timed out (no result event arrived in time)."""
+        handle = self._orders.get(str(order_id))
+        if handle is not None and not handle.done():
+            logger.error("trade_timeout", order_id=order_id)
+            self.positions.expire(order_id)
+            handle.set_result({"status": "error", "result": "timeout", "pnl": 0, "order_id": order_id})
+
+    def _on_result(self, handle: TradeHandle, result: dict):
+        self.untrack(handle.order_id)
+        for queue in self._subscribers:
+            queue.put_nowait(result)
+
+    def results(self) -> "ResultStream":
+        """
+        Async iterator over every trade result of the session. The subscription
+        starts when this is called (not on the first iteration), so results closing
+        in between are not lost. Call ``aclose()`` when no longer iterating.
+        """
+        return ResultStream(self._subscribers)
+
+    def _on_position_changed(self, message: dict):
+        raw = message.get("msg", {})
+        if not isinstance(raw, dict):
+            return
+        keys = [self.positions.resolve(k) for k in (raw.get("external_id"), raw.get("id")) if k is not None]
+
+        for key in keys:
+            handle = self._orders.get(key)
+            if handle is not None:
+                handle.apply(raw, self.positions.apply(raw, handle.order_id))
+                return
+
+        self.positions.apply(raw)
+        # Ordem ainda não registrada (evento chegou antes do ACK): guarda para replay
+        for key in keys:
+            self._backlog.setdefault(key, []).append(raw)
+            self._backlog.move_to_end(key)
+        while len(self._backlog) > self.backlog_size:
+            self._backlog.popitem(last=False)
+
+
+class ArmedOrder:
+    """
+    Pre-built open-option frame for ``(active_id, amount, duration)``.
+
+    Payout and balance id are resolved and the JSON frame is serialised when the
+    order is armed (and again on ``payout-changed`` or a balance switch). Firing
+    only substitutes direction, expiry and request id into the template and writes
+    the string to the socket. Signal-to-send latency is kept in ``fire_latencies``.
+    """
+
+    DIRECTIONS = ("call", "put")
+
+    def __init__(self, client, active_id: int, amount: float, duration: int = 30):
+        self.client = client
+        self.active_id = active_id
+        self.amount = amount
+        self.duration = duration
+        self.fire_latencies = deque(maxlen=1000) # segundos entre o sinal e o frame no socket
+        self._template: Optional[string.Template] = None
+        self.rebuild()
+        client.dispatcher.add_listener(EV_PAYOUT_CHANGED, self._on_payout_changed)
+
+    def rebuild(self, profit_percent: Optional[int] = None):
+        """
+        Re-serialises the frame skeleton with the active balance and ``profit_percent``
+        (None: re-read from the client's actives cache).
+        """
+        self.profit_percent = profit_percent if profit_percent is not None else self.client.get_profit_percent(self.active_id)
+        self.balance_id = self.client.active_balance_id
+        if self.profit_percent == 0:
+            logger.warning("payout_not_found_in_cache", active_id=self.active_id)
+
+        body = self.client._blitz_body(self.active_id, "$direction", self.amount, self.duration, "$expired", self.profit_percent)
+        frame = {
+            "name": "sendMessage",
+            "request_id": "$request_id",
+            "msg": {"name": OP_OPEN_OPTION, "version": "2.0", "body": body}
+        }
+        # 'expired' é numérico no protocolo: tira as aspas do placeholder
+        text = json.dumps(frame, separators=(",", ":")).replace('"$expired"', "$expired")
+        self._template = string.Template(text)
+
+    def _on_payout_changed(self, message: dict):
+        msg = message.get("msg", {})
+        if str(msg.get("active_id")) != str(self.active_id) or msg.get("instrument_type") != INSTRUMENT_TYPE_BLITZ:
+            return
+        # Usa o payout do evento: o cache de init-data ('blitz') tem prioridade no
+        # get_profit_percent e continuaria com o valor antigo
+        self.rebuild(msg.get("new"))
+
+    def disarm(self):
+        self.client.dispatcher.remove_listener(EV_PAYOUT_CHANGED, self._on_payout_changed)
+
+    async def fire(self, direction: str, signal_time: Optional[float] = None) -> TradeHandle:
+        """
+        Sends the armed order. ``signal_time`` (``time.perf_counter()`` taken when the
+        signal was detected) makes the recorded latency cover the strategy side too.
+        """
+        t0 = signal_time if signal_time is not None else time.perf_counter()
+        direction = direction.lower()
+        if direction not in self.DIRECTIONS:
+            raise ValueError(f"Direção inválida: {direction}")
+        if self.balance_id != self.client.active_balance_id:
+            self.rebuild(self.profit_percent)
+
+        req_id = get_req_id()
+        trace = self.client._start_trace(OP_OPEN_OPTION, req_id, active_id=self.active_id)
+        frame = self._template.substitute(request_id=req_id, direction=direction, expired=self.client._blitz_expiration())
+        ack_future = self.client.dispatcher.create_future(req_id)
+        try:
+            await self.client.limiter.acquire(OP_OPEN_OPTION)
+            if trace: trace.mark("enqueue")
+            await self.client.ws.send_raw(frame)
+        except BaseException as e:
+            # Frame não saiu: nenhum ACK virá para este request_id
+            self.client.dispatcher.discard_future(req_id)
+            self.client._finish_trace(trace, "error", error=str(e) or type(e).__name__)
+            raise
+        if trace: trace.mark("wire_send")
+        self.client._time_order_ack(ack_future)
+        latency = time.perf_counter() - t0
+        self.fire_latencies.append(latency)
+        logger.info("armed_order_fired", active=self.active_id, direction=direction, latency_ms=round(latency * 1000, 3))
+
+        try:
+            ack = await self.client._wait_order_ack(req_id, ack_future, self.active_id)
+        except TimeoutError:
+            self.client._finish_trace(trace, "timeout")
+            raise
+        self.client._finish_trace(trace, ack.get("status"))
+        return self.client._register_order(ack, self.active_id, direction, self.amount, self.duration)
+
+    def latency_stats(self) -> dict:
+        """Signal-to-send latency summary in milliseconds."""
+        if not self.fire_latencies:
+            return {"count": 0}
+        ordered = sorted(self.fire_latencies)
+        return {
+            "count": len(ordered),
+            "last_ms": round(self.fire_latencies[-1] * 1000, 3),
+            "p50_ms": round(ordered[len(ordered) // 2] * 1000, 3),
+            "max_ms": round(ordered[-1] * 1000, 3),
+        }
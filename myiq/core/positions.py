@@ -0,0 +1,168 @@
+import structlog
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+logger = structlog.get_logger()
+
+TRADE_RESULTS = ("win", "loose", "equal")
+
+
+def option_event(raw: dict) -> dict:
+    return raw.get("raw_event", {}).get("binary_options_option_changed1", {})
+
+
+def is_position_closed(raw: dict) -> bool:
+    # Logs mostram result='win' no evento interno e status='closed' no externo
+    return raw.get("status") == "closed" or option_event(raw).get("result") in TRADE_RESULTS
+
+
+def position_pnl(raw: dict) -> float:
+    # O PNL correto vem geralmente no nível raiz do msg ou calculado
+    # Log: "pnl":0.8600000000000001
+    evt = option_event(raw)
+    pnl = raw.get("pnl", 0)
+    if pnl == 0 and "profit_amount" in evt:
+        # Fallback calcular PNL
+        pnl = evt.get("profit_amount", 0) - evt.get("amount", 0)
+    return pnl
+
+
+class PositionsStore:
+    """
+    In-memory store of open and closed positions fed by the long-lived
+    ``portfolio.position-changed`` stream.
+
+    Positions are keyed by order id (``external_id``, the id in the open-option
+    ACK), falling back to the position ``id``. Ids carried by an event applied to a
+    known order are aliased to that order's record, so later events carrying only
+    one of them land on the same key. Closed positions are kept in a bounded,
+    insertion-ordered map (``max_closed``).
+    """
+
+    def __init__(self, max_closed: int = 5000):
+        self.max_closed = max_closed
+        self._open: Dict[str, dict] = {}
+        self._closed: "OrderedDict[str, dict]" = OrderedDict()
+        self._aliases: "OrderedDict[str, str]" = OrderedDict()
+
+    def resolve(self, key) -> str:
+        """Record key of an event id (the order id it was aliased to, if any)."""
+        key = str(key)
+        return self._aliases.get(key, key)
+
+    def _key(self, raw: dict) -> Optional[str]:
+        key = raw.get("external_id") if raw.get("external_id") is not None else raw.get("id")
+        return self.resolve(key) if key is not None else None
+
+    def _alias(self, other: str, key: str):
+        if other == key or self._aliases.get(other) == key:
+            return
+        self._aliases[other] = key
+        while len(self._aliases) > self.max_closed:
+            self._aliases.popitem(last=False)
+        # Registro criado por evento anterior ao ACK: o chamador reaplica o evento na chave da ordem
+        self._open.pop(other, None)
+        self._closed.pop(other, None)
+
+    def register(self, order_id, active_id=None, direction=None, amount=None):
+        """Records an order as open as soon as it is ACKed (before any position event)."""
+        key = str(order_id)
+        record = self.get(order_id)
+        if record is None:
+            self._open[key] = {
+                "order_id": order_id, "position_id": None, "active_id": active_id,
+                "direction": direction, "amount": amount, "status": "open", "result": None, "pnl": 0,
+            }
+            return
+        # Evento de posição chegou antes do ACK: completa o que faltar
+        for field, value in (("active_id", active_id), ("direction", direction), ("amount", amount)):
+            if record[field] is None:
+                record[field] = value
+
+    def apply(self, raw: dict, order_id=None) -> Optional[dict]:
+        """
+        Merges a position-changed payload. Returns the updated record.
+        ``order_id`` (the tracked order the event was matched to) keys the record
+        by that order and aliases the payload's ``external_id`` / ``id`` to it.
+        """
+        if order_id is not None:
+            key = str(order_id)
+            for other in (raw.get("external_id"), raw.get("id")):
+                if other is not None:
+                    self._alias(str(other), key)
+        else:
+            key = self._key(raw)
+        if key is None:
+            return None
+        evt = option_event(raw)
+        record = self._open.get(key) or self._closed.get(key)
+        if record is None:
+            record = {"order_id": order_id if order_id is not None else raw.get("external_id", raw.get("id")),
+                      "position_id": None, "active_id": None,
+                      "direction": None, "amount": None, "status": "open", "result": None, "pnl": 0}
+
+        record["position_id"] = raw.get("id", record["position_id"])
+        active_id = evt.get("active_id", raw.get("active_id"))
+        if active_id is not None:
+            record["active_id"] = int(active_id)
+        record["direction"] = evt.get("direction") or record["direction"]
+        amount = evt.get("amount", raw.get("invest"))
+        if amount is not None:
+            record["amount"] = amount
+
+        if is_position_closed(raw):
+            record["status"] = "closed"
+            record["result"] = evt.get("result") or raw.get("close_reason")
+            record["pnl"] = position_pnl(raw)
+            self._close(key, record)
+        else:
+            self._open[key] = record
+        return record
+
+    def expire(self, order_id) -> Optional[dict]:
+        """
+        Moves an open order whose result never arrived out of the open set
+        (status ``expired``), so it no longer counts in :meth:`open_exposure`.
+        A late close event still updates the record.
+        """
+        key = str(order_id)
+        record = self._open.get(key)
+        if record is None:
+            return None
+        record["status"] = "expired"
+        record["result"] = "timeout"
+        self._close(key, record)
+        return record
+
+    def _close(self, key: str, record: dict):
+        self._open.pop(key, None)
+        self._closed[key] = record
+        self._closed.move_to_end(key)
+        while len(self._closed) > self.max_closed:
+            self._closed.popitem(last=False)
+
+    # --- CONSULTAS ---
+    def get(self, order_id) -> Optional[dict]:
+        key = self.resolve(order_id)
+        return self._open.get(key) or self._closed.get(key)
+
+    def open_positions(self, active_id: Optional[int] = None) -> List[dict]:
+        if active_id is None:
+            return list(self._open.values())
+        return [p for p in self._open.values() if p["active_id"] == int(active_id)]
+
+    def closed_positions(self, limit: Optional[int] = None) -> List[dict]:
+        closed = list(self._closed.values())
+        return closed[-limit:] if limit else closed
+
+    def open_exposure(self) -> Dict[int, float]:
+        """Total amount currently invested per active id."""
+        exposure: Dict[int, float] = {}
+        for p in self._open.values():
+            if p["active_id"] is not None and p["amount"]:
+                exposure[p["active_id"]] = exposure.get(p["active_id"], 0.0) + float(p["amount"])
+        return exposure
+
+    def total_pnl(self) -> float:
+        """Realised PnL of the closed positions kept in the store."""
+        return sum(p["pnl"] or 0 for p in self._closed.values())
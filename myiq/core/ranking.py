@@ -0,0 +1,155 @@
+import bisect
+import structlog
+from typing import Dict, List, Optional, Callable, Iterable, Tuple, Any
+
+logger = structlog.get_logger()
+
+
+def normalize_instrument_type(instrument_type: str) -> str:
+    """'blitz-option' (underlying-list-changed) e 'blitz' (initialization-data) são a mesma categoria."""
+    if instrument_type.endswith("-option"):
+        return instrument_type[: -len("-option")]
+    return instrument_type
+
+
+def extract_profit_percent(data: dict) -> int:
+    """
+    Returns the payout of a cached active (e.g. 86).
+    Calculates from commission if explicit field is missing.
+    """
+    if "profit_percent" in data:
+        return data["profit_percent"]
+
+    # Structure: data['option']['profit']['commission']
+    try:
+        commission = data.get("option", {}).get("profit", {}).get("commission")
+        if commission is not None:
+            return 100 - int(commission)
+    except Exception:
+        pass
+
+    return 0
+
+
+def extract_is_open(data: dict) -> bool:
+    """Same rule as IQOption.is_active_open: enabled and not suspended."""
+    return bool(data.get("enabled", False)) and not data.get("is_suspended", True)
+
+
+class PayoutRanking:
+    """
+    Live ranking of open actives by payout, one sorted index per instrument type.
+
+    Each index is a list of ``(-profit_percent, active_id)`` keys kept in order with
+    :mod:`bisect`, so the best active is always at position 0. Finding a key is an
+    O(log n) search, but inserting/removing it shifts the list (O(n) memmove),
+    which is cheap for the few hundred actives of a category. Entries are merged:
+    a partial update (e.g. only ``is_suspended``) keeps the last known payout.
+    """
+
+    def __init__(self):
+        self._index: Dict[str, List[Tuple[int, int]]] = {}
+        # { type: { active_id: {"profit_percent", "is_open", "name"} } }
+        self._entries: Dict[str, Dict[int, Dict[str, Any]]] = {}
+        self._last_top: Dict[str, Optional[Tuple[int, int]]] = {}
+        self.on_top_changed: Optional[Callable[[str, Optional[dict], Optional[dict]], None]] = None
+
+    def update(self, instrument_type: str, active_id, data: dict):
+        """Merges cached active data into the ranking. Changes to the top are reported by :meth:`flush`."""
+        inst = normalize_instrument_type(instrument_type)
+        a_id = int(active_id)
+        entries = self._entries.setdefault(inst, {})
+        index = self._index.setdefault(inst, [])
+
+        entry = entries.get(a_id)
+        if entry is None:
+            entry = {"profit_percent": 0, "is_open": False, "name": None}
+            entries[a_id] = entry
+        else:
+            self._remove_key(index, entry, a_id)
+
+        if "profit_percent" in data or "option" in data:
+            entry["profit_percent"] = extract_profit_percent(data)
+        if "enabled" in data or "is_suspended" in data:
+            entry["is_open"] = extract_is_open(data)
+        name = data.get("name") or data.get("ticker")
+        if name:
+            entry["name"] = name
+
+        if entry["is_open"]:
+            bisect.insort(index, (-entry["profit_percent"], a_id))
+
+    def remove(self, instrument_type: str, active_id):
+        inst = normalize_instrument_type(instrument_type)
+        a_id = int(active_id)
+        entry = self._entries.get(inst, {}).pop(a_id, None)
+        if entry is not None:
+            self._remove_key(self._index.get(inst, []), entry, a_id)
+
+    def clear(self):
+        self._index.clear()
+        self._entries.clear()
+        # Sem topo conhecido: o próximo flush após recarregar reporta o topo de novo
+        self._last_top.clear()
+
+    @staticmethod
+    def _remove_key(index: list, entry: dict, a_id: int):
+        if not entry["is_open"]:
+            return
+        key = (-entry["profit_percent"], a_id)
+        pos = bisect.bisect_left(index, key)
+        if pos < len(index) and index[pos] == key:
+            del index[pos]
+
+    def best_actives(self, instrument_type: str, n: int = 1, min_payout: int = 0,
+                     exclude: Optional[Iterable] = None) -> List[dict]:
+        """
+        Returns up to ``n`` open actives ordered by payout (highest first).
+
+        The walk starts at the top of the sorted index and stops as soon as the
+        payout falls below ``min_payout``, so the cost is O(n + len(exclude)).
+        """
+        inst = normalize_instrument_type(instrument_type)
+        index = self._index.get(inst, [])
+        entries = self._entries.get(inst, {})
+        excluded = {int(e) for e in exclude} if exclude else ()
+
+        results = []
+        for neg_payout, a_id in index:
+            if len(results) >= n or -neg_payout < min_payout:
+                break
+            if a_id in excluded:
+                continue
+            results.append({
+                "active_id": a_id,
+                "profit_percent": -neg_payout,
+                "name": entries[a_id]["name"],
+            })
+        return results
+
+    def top(self, instrument_type: str) -> Optional[dict]:
+        best = self.best_actives(instrument_type, 1)
+        return best[0] if best else None
+
+    def flush(self, instrument_types: Optional[Iterable[str]] = None):
+        """
+        Compares the current top of each index with the last reported one and
+        fires ``on_top_changed(type, old, new)`` for every type that changed.
+        Called once per processed message so a batch produces a single event.
+        """
+        types = {normalize_instrument_type(t) for t in instrument_types} if instrument_types else set(self._index)
+        for inst in types:
+            index = self._index.get(inst, [])
+            current = index[0] if index else None
+            previous = self._last_top.get(inst)
+            if current == previous:
+                continue
+            self._last_top[inst] = current
+
+            old = {"active_id": previous[1], "profit_percent": -previous[0]} if previous else None
+            new = self.top(inst)
+            if self.on_top_changed:
+                try:
+                    self.on_top_changed(inst, old, new)
+                except Exception as e:
+                    logger.error("ranking_callback_error", error=str(e))
@@ -0,0 +1,134 @@
+import time
+import asyncio
+import structlog
+from typing import Callable, Dict, Iterable, Optional, Tuple
+from myiq.core.constants import OP_GET_CANDLES, OP_OPEN_OPTION, OP_GET_FINANCIAL_INFO
+
+logger = structlog.get_logger()
+
+# (requisições/s, burst) por operação. Valores conservadores: a corretora não publica limites.
+DEFAULT_QUOTAS: Dict[str, Tuple[float, float]] = {
+    OP_GET_CANDLES: (5.0, 10.0),
+    OP_GET_FINANCIAL_INFO: (3.0, 6.0), # GraphQL
+    OP_OPEN_OPTION: (10.0, 20.0),
+}
+# Limite global de todas as requisições da conexão
+DEFAULT_GLOBAL_QUOTA: Tuple[float, float] = (20.0, 40.0)
+TRADING_OPS = (OP_OPEN_OPTION,)
+
+
+class TokenBucket:
+    """Token bucket with an adjustable rate ``factor`` (0-1] applied on top of the base rate."""
+
+    def __init__(self, rate: float, burst: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.factor = 1.0
+        self._clock = clock
+        self.tokens = burst
+        self._last = clock()
+
+    @property
+    def effective_rate(self) -> float:
+        return self.rate * self.factor
+
+    def _refill(self):
+        now = self._clock()
+        self.tokens = min(self.burst, self.tokens + (now - self._last) * self.effective_rate)
+        self._last = now
+
+    def wait_time(self, keep: float = 0.0) -> float:
+        """Seconds until one token can be taken while leaving ``keep`` tokens in the bucket."""
+        self._refill()
+        missing = keep + 1.0 - self.tokens
+        return 0.0 if missing <= 0 else missing / self.effective_rate
+
+    def take(self):
+        self.tokens -= 1.0
+
+
+class RateLimiter:
+    """
+    Client-side request pacing: one token bucket per operation name plus a global
+    bucket for the whole connection.
+
+    - ``reserve`` tokens of the global bucket can only be spent by ``trading_ops``,
+      so a candle backfill can drain the connection budget but never block an order.
+    - AIMD: every failure (error reply / timeout) reported through :meth:`record`
+      halves the operation's rate (at most once per ``cooldown`` so one outage does
+      not collapse it to the floor), every success adds ``increase`` back up to 1.0.
+      Trading operations are paced but never slowed down.
+    """
+
+    def __init__(self, quotas: Optional[Dict[str, Tuple[float, float]]] = None,
+                 global_quota: Tuple[float, float] = DEFAULT_GLOBAL_QUOTA, reserve: float = 10.0,
+                 trading_ops: Iterable[str] = TRADING_OPS, decrease: float = 0.5, increase: float = 0.05,
+                 min_factor: float = 0.1, cooldown: float = 1.0, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self.trading_ops = set(trading_ops)
+        self.reserve = reserve
+        self.decrease = decrease
+        self.increase = increase
+        self.min_factor = min_factor
+        self.cooldown = cooldown
+        self.global_bucket = TokenBucket(*global_quota, clock=clock)
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._last_decrease: Dict[str, float] = {}
+        self.throttled: Dict[str, int] = {} # quantas vezes cada operação teve que esperar
+        for name, (rate, burst) in (quotas if quotas is not None else DEFAULT_QUOTAS).items():
+            self.set_quota(name, rate, burst)
+
+    def set_quota(self, name: str, rate: float, burst: float):
+        self._buckets[name] = TokenBucket(rate, burst, clock=self._clock)
+
+    def _wait_time(self, name: str) -> float:
+        keep = 0.0 if name in self.trading_ops else self.reserve
+        wait = self.global_bucket.wait_time(keep)
+        bucket = self._buckets.get(name)
+        if bucket is not None:
+            wait = max(wait, bucket.wait_time())
+        return wait
+
+    def try_acquire(self, name: str) -> bool:
+        """Takes a token for ``name`` without waiting. Returns False if none is available."""
+        if self._wait_time(name) > 0:
+            return False
+        self.global_bucket.take()
+        bucket = self._buckets.get(name)
+        if bucket is not None:
+            bucket.take()
+        return True
+
+    async def acquire(self, name: str):
+        """Waits until a request for ``name`` may be sent and takes its token."""
+        while True:
+            wait = self._wait_time(name)
+            if wait <= 0:
+                break
+            self.throttled[name] = self.throttled.get(name, 0) + 1
+            await asyncio.sleep(wait)
+        self.global_bucket.take()
+        bucket = self._buckets.get(name)
+        if bucket is not None:
+            bucket.take()
+
+    def record(self, name: str, ok: bool):
+        """Feeds the outcome of a request back into the AIMD controller."""
+        bucket = self._buckets.get(name)
+        if bucket is None or name in self.trading_ops:
+            return
+        if ok:
+            bucket.factor = min(1.0, bucket.factor + self.increase)
+            return
+        now = self._clock()
+        if now - self._last_decrease.get(name, float("-inf")) < self.cooldown:
+            return
+        self._last_decrease[name] = now
+        bucket.factor = max(self.min_factor, bucket.factor * self.decrease)
+        logger.warning("rate_limit_backoff", op=name, rate=round(bucket.effective_rate, 3))
+
+    def stats(self) -> dict:
+        return {
+            name: {"rate": round(b.effective_rate, 3), "factor": round(b.factor, 3), "throttled": self.throttled.get(name, 0)}
+            for name, b in self._buckets.items()
+        }
@@ -1,7 +1,11 @@
+import time
+import random
 import asyncio
 import structlog
+from typing import Optional
 from myiq.core.connection import WSConnection
 from myiq.core.dispatcher import Dispatcher
+from myiq.core.metrics import MetricsRegistry
 
 logger = structlog.get_logger()
 
@@ -10,17 +14,33 @@ class ReconnectingWS:
 
     The wrapper mimics the original ``WSConnection`` API (``send`` and
     ``on_message_hook``) so existing client code does not need to change.
+
+    Disconnects are signalled by the connection's read loop itself (no polling).
+    Reconnects use capped exponential backoff with full jitter and never give up
+    until :meth:`close` is called; ``max_retries`` only bounds the initial
+    :meth:`connect` so ``start()`` still fails fast when the broker is unreachable.
     """
 
-    def __init__(self, dispatcher: Dispatcher, url: str, max_retries: int = 5, backoff: float = 1.0):
+    def __init__(self, dispatcher: Dispatcher, url: str, max_retries: int = 5, backoff: float = 1.0, max_backoff: float = 30.0,
+                 metrics: Optional[MetricsRegistry] = None):
         self.url = url
+        self.metrics = metrics
+        self._reconnects = metrics.counter("ws_reconnects_total", "Successful WebSocket reconnections") if metrics else None
         self.dispatcher = dispatcher
         self.max_retries = max_retries
         self.backoff = backoff
+        self.max_backoff = max_backoff
         self.ws: WSConnection | None = None
         self._on_message_hook = None
         self.on_reconnect = None # Callback for reconnection events
         self._connected = asyncio.Event()
+        self._lost = asyncio.Event()
+        self._closed = False
+        self._monitor_task: Optional[asyncio.Task] = None
+        # Estatísticas de reconexão
+        self.reconnect_count = 0
+        self.total_downtime = 0.0
+        self._down_since: Optional[float] = None
 
     @property
     def on_message_hook(self):
@@ -36,57 +56,111 @@ class ReconnectingWS:
     def is_connected(self) -> bool:
         return self._connected.is_set() and self.ws and self.ws.is_connected
 
+    @property
+    def current_downtime(self) -> float:
+        """Seconds since the connection dropped (0 while connected)."""
+        return time.monotonic() - self._down_since if self._down_since is not None else 0.0
+
+    def stats(self) -> dict:
+        return {
+            "connected": bool(self.is_connected),
+            "reconnect_count": self.reconnect_count,
+            "total_downtime": round(self.total_downtime + self.current_downtime, 3),
+            "current_downtime": round(self.current_downtime, 3),
+        }
+
     async def connect(self):
-        await self._attempt_connect()
-        # start background monitor that watches for disconnections
-        asyncio.create_task(self._monitor())
+        self._closed = False
+        await self._attempt_connect(self.max_retries)
+        # start background monitor that waits for disconnections
+        if self._monitor_task is None or self._monitor_task.done():
+            self._monitor_task = asyncio.create_task(self._monitor())
 
-    async def _attempt_connect(self):
-        for attempt in range(1, self.max_retries + 1):
+    def _backoff_delay(self, attempt: int) -> float:
+        """Capped exponential backoff with full jitter (spreads a fleet reconnecting at once)."""
+        cap = min(self.max_backoff, self.backoff * (2 ** (attempt - 1)))
+        return random.uniform(0, cap)
+
+    def _on_connection_lost(self):
+        if self._closed:
+            return
+        self._connected.clear()
+        if self._down_since is None:
+            self._down_since = time.monotonic()
+        self._lost.set()
+
+    async def _attempt_connect(self, max_attempts: Optional[int] = None):
+        attempt = 0
+        while True:
+            attempt += 1
             try:
-                self.ws = WSConnection(self.dispatcher)
-                self.ws.on_message_hook = self._on_message_hook
-                await self.ws.connect()
+                ws = WSConnection(self.dispatcher, self.url, metrics=self.metrics)
+                ws.on_message_hook = self._on_message_hook
+                ws.on_close = self._on_connection_lost
+                await ws.connect()
+                self.ws = ws
                 self._connected.set()
                 logger.info("ws_connected", attempt=attempt)
                 return
             except Exception as exc:
                 logger.error("ws_connect_error", attempt=attempt, error=str(exc))
-                await asyncio.sleep(self.backoff * attempt)
-        raise ConnectionError("Unable to reconnect after several attempts")
+                if self._closed:
+                    raise ConnectionError("Connection closed while reconnecting")
+                if max_attempts is not None and attempt >= max_attempts:
+                    raise ConnectionError("Unable to reconnect after several attempts")
+                await asyncio.sleep(self._backoff_delay(attempt))
 
     async def send(self, data: dict):
         await self._connected.wait()
         return await self.ws.send(data)
 
+    async def send_raw(self, text: str):
+        await self._connected.wait()
+        return await self.ws.send_raw(text)
+
+    async def force_reconnect(self):
+        """Aborts the current socket; the read loop exit triggers the normal reconnect path."""
+        if self.ws and not self._closed:
+            logger.warning("ws_force_reconnect")
+            self.ws.abort()
+
     async def _monitor(self):
-        """Continuously monitor the underlying connection and reconnect if it drops."""
-        while self._connected.is_set() or self.ws:
-            await asyncio.sleep(1)
-            # If explicitely closed, stop monitoring
-            if not self._connected.is_set() and self.ws is None:
+        """Waits for disconnect signals from the read loop and reconnects."""
+        while not self._closed:
+            await self._lost.wait()
+            self._lost.clear()
+            if self._closed:
                 break
-                
-            if self.ws is None or not getattr(self.ws, "is_connected", False):
-                if not self._connected.is_set() and self.ws: # Was connected, now lost
-                     # Double check if user didn't request close
-                     pass
-
-                logger.warning("ws_lost", reason="disconnected")
-                self._connected.clear()
+
+            logger.warning("ws_lost", reason="disconnected")
+            try:
+                await self._attempt_connect()
+            except ConnectionError:
+                # Só acontece se close() foi chamado durante a reconexão
+                break
+
+            downtime = self.current_downtime
+            self.total_downtime += downtime
+            self._down_since = None
+            self.reconnect_count += 1
+            if self._reconnects is not None:
+                self._reconnects.inc()
+            logger.info("ws_reconnected", count=self.reconnect_count, downtime=round(downtime, 3))
+
+            # Trigger Reconnect Callback if set
+            if self.on_reconnect:
                 try:
-                    await self._attempt_connect()
-                    # Trigger Reconnect Callback if set
-                    if hasattr(self, "on_reconnect") and self.on_reconnect:
-                        if asyncio.iscoroutinefunction(self.on_reconnect):
-                            await self.on_reconnect()
-                        else:
-                            self.on_reconnect()
-                except:
-                    break
+                    if asyncio.iscoroutinefunction(self.on_reconnect):
+                        await self.on_reconnect()
+                    else:
+                        self.on_reconnect()
+                except Exception as e:
+                    logger.error("on_reconnect_error", error=str(e))
 
     async def close(self):
+        self._closed = True
         self._connected.clear()
+        self._lost.set() # acorda o monitor para ele encerrar
         if self.ws:
             await self.ws.close()
             self.ws = None
@@ -0,0 +1,84 @@
+import asyncio
+import structlog
+from typing import Callable, Dict, Iterator, Optional
+from myiq.core.client import IQOption
+
+logger = structlog.get_logger()
+
+
+class SessionManager:
+    """
+    Runs many accounts on one event loop with a single market-data feed.
+
+    ``market`` is a full :class:`IQOption` (initialization-data, actives list,
+    payout ranking, candle streams). Every account added with :meth:`add_account`
+    is a lightweight ``IQOption(market_data=False, **self.urls)`` that only carries auth,
+    balances and orders on its own socket, and reads actives/payouts from
+    ``market`` (see :meth:`IQOption.attach_market_data`)::
+
+        session = SessionManager(md_email, md_password, snapshot_path="myiq_snapshot.json")
+        for email, password in accounts:
+            session.add_account(email, password)
+        await session.start()
+        await session["conta1@x.com"].open_blitz(76, "call", 1.0)
+    """
+
+    def __init__(self, email: str, password: str, snapshot_path: Optional[str] = None,
+                 ssid_cache_path: Optional[str] = None, start_concurrency: int = 5,
+                 ws_url: Optional[str] = None, http_url: Optional[str] = None):
+        self.ssid_cache_path = ssid_cache_path
+        self.urls = {"ws_url": ws_url, "http_url": http_url}
+        self.start_concurrency = start_concurrency
+        self.market = IQOption(email, password, snapshot_path=snapshot_path, ssid_cache_path=ssid_cache_path, **self.urls)
+        self.accounts: Dict[str, IQOption] = {}
+
+    def __getitem__(self, name: str) -> IQOption:
+        return self.accounts[name]
+
+    def __iter__(self) -> Iterator[IQOption]:
+        return iter(self.accounts.values())
+
+    def __len__(self):
+        return len(self.accounts)
+
+    def add_account(self, email: str, password: str, name: Optional[str] = None) -> IQOption:
+        """Creates a trading-only client sharing the market feed. ``name`` defaults to the email."""
+        name = name or email
+        if name in self.accounts:
+            raise ValueError(f"Conta já adicionada: {name}")
+        account = IQOption(email, password, ssid_cache_path=self.ssid_cache_path, market_data=False, **self.urls)
+        account.attach_market_data(self.market)
+        self.accounts[name] = account
+        return account
+
+    async def start(self):
+        """
+        Starts the market-data client first, then the accounts (at most
+        ``start_concurrency`` logins at a time). Raises the first account error
+        after every start attempt finished.
+        """
+        await self.market.start()
+        sem = asyncio.Semaphore(self.start_concurrency)
+
+        async def start_account(name: str, account: IQOption):
+            async with sem:
+                try:
+                    await account.start()
+                except Exception as e:
+                    logger.error("session_account_start_failed", account=name, error=str(e))
+                    raise
+
+        results = await asyncio.gather(*(start_account(n, a) for n, a in self.accounts.items()), return_exceptions=True)
+        errors = [r for r in results if isinstance(r, BaseException)]
+        logger.info("session_started", accounts=len(self.accounts), failed=len(errors))
+        if errors:
+            raise errors[0]
+
+    async def start_candles_stream(self, active_id: int, duration: int, callback: Callable[[dict], None],
+                                   on_close: Optional[Callable[[dict], None]] = None):
+        """Candle streams run once, on the market-data connection."""
+        await self.market.start_candles_stream(active_id, duration, callback, on_close=on_close)
+
+    async def close(self):
+        await asyncio.gather(*(a.close() for a in self.accounts.values()), return_exceptions=True)
+        await self.market.close()
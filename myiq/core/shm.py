@@ -0,0 +1,271 @@
+import time
+import queue
+import struct
+import asyncio
+import structlog
+import multiprocessing
+from multiprocessing import shared_memory, resource_tracker
+from typing import Dict, List, Optional, Tuple
+from myiq.core.utils import get_req_id
+
+logger = structlog.get_logger()
+
+# Layout do bloco: cabeçalho de 64 bytes + `capacity` registros de 8 float64
+# Cabeçalho: seq (seqlock: ímpar = escrita em andamento), count (candles já escritos),
+# capacity, active_id, size, versão do layout
+_HEADER = struct.Struct("<QQQQQQ")
+HEADER_SIZE = 64
+CANDLE_FIELDS = ("id", "from", "to", "open", "close", "min", "max", "volume")
+_RECORD = struct.Struct("<" + "d" * len(CANDLE_FIELDS))
+LAYOUT_VERSION = 1
+
+
+def ring_name(active_id: int, size: int, prefix: str = "myiq") -> str:
+    return f"{prefix}_{int(active_id)}_{int(size)}"
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    # Quem só anexa não é dono: o bloco não pode entrar no resource_tracker deste
+    # processo, senão é apagado quando o worker termina (Python < 3.13 sempre registra)
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        pass
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args, **kwargs: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+class CandleRingWriter:
+    """
+    Single-writer ring buffer of candles for one ``(active_id, size)`` in shared memory.
+
+    Ticks of the forming candle overwrite its slot; a new ``from`` advances the
+    ring. Every write is wrapped in a seqlock (``seq`` odd while writing) so readers
+    in other processes detect and retry torn reads without any lock.
+    """
+
+    def __init__(self, active_id: int, size: int, capacity: int = 1024, prefix: str = "myiq"):
+        self.active_id = int(active_id)
+        self.size = int(size)
+        self.capacity = capacity
+        self.name = ring_name(active_id, size, prefix)
+        self.shm = shared_memory.SharedMemory(name=self.name, create=True, size=HEADER_SIZE + capacity * _RECORD.size)
+        self._buf = self.shm.buf
+        self._seq = 0
+        self._count = 0
+        self._last_from: Optional[float] = None
+        _HEADER.pack_into(self._buf, 0, 0, 0, capacity, self.active_id, self.size, LAYOUT_VERSION)
+
+    def write(self, candle: dict):
+        """Writes a ``candle-generated`` payload (or any dict with :data:`CANDLE_FIELDS`)."""
+        start = candle.get("from")
+        if start is None:
+            return
+        if self._last_from is not None and start < self._last_from:
+            return # tick atrasado de candle antigo
+        new_candle = start != self._last_from
+        count = self._count + 1 if new_candle else self._count
+        slot = (count - 1) % self.capacity
+
+        self._seq += 1 # ímpar: escrita em andamento
+        struct.pack_into("<Q", self._buf, 0, self._seq)
+        _RECORD.pack_into(self._buf, HEADER_SIZE + slot * _RECORD.size, *(float(candle.get(f) or 0) for f in CANDLE_FIELDS))
+        struct.pack_into("<Q", self._buf, 8, count)
+        self._seq += 1
+        struct.pack_into("<Q", self._buf, 0, self._seq)
+
+        self._count = count
+        self._last_from = start
+
+    def close(self, unlink: bool = True):
+        self._buf = None
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+class CandleRingReader:
+    """
+    Read-only view of a :class:`CandleRingWriter` from any process.
+
+    Reads retry until they see a consistent snapshot (same even ``seq`` before and
+    after). :attr:`buffer` exposes the raw records as a read-only ``memoryview`` of
+    float64 (zero-copy; e.g. ``np.frombuffer(reader.buffer).reshape(-1, 8)``).
+    """
+
+    def __init__(self, active_id: int, size: int, prefix: str = "myiq"):
+        self.name = ring_name(active_id, size, prefix)
+        self.shm = _attach(self.name)
+        self._buf = self.shm.buf.toreadonly()
+        _, _, self.capacity, self.active_id, self.size, version = _HEADER.unpack_from(self._buf, 0)
+        if version != LAYOUT_VERSION:
+            raise ValueError(f"Layout de shared memory incompatível: {version}")
+        self.buffer = self._buf[HEADER_SIZE:HEADER_SIZE + self.capacity * _RECORD.size].cast("d")
+
+    def _header(self) -> Tuple[int, int]:
+        return struct.unpack_from("<QQ", self._buf, 0)
+
+    @property
+    def seq(self) -> int:
+        """Changes on every write (new candle or tick); compare to detect updates."""
+        return self._header()[0]
+
+    @property
+    def count(self) -> int:
+        """Number of candles written so far (sequence number of the newest candle)."""
+        return self._header()[1]
+
+    def last(self, n: int = 1) -> List[dict]:
+        """Up to ``n`` newest candles, oldest first (the last one may still be forming)."""
+        while True:
+            seq, count = self._header()
+            if seq % 2:
+                continue # escritor no meio de uma escrita
+            n_read = min(n, count, self.capacity)
+            rows = []
+            for i in range(count - n_read, count):
+                offset = HEADER_SIZE + (i % self.capacity) * _RECORD.size
+                rows.append(_RECORD.unpack_from(self._buf, offset))
+            if struct.unpack_from("<Q", self._buf, 0)[0] == seq:
+                break
+        return [dict(zip(CANDLE_FIELDS, row), sequence=i + 1) for i, row in zip(range(count - n_read, count), rows)]
+
+    def latest(self) -> Optional[dict]:
+        rows = self.last(1)
+        return rows[0] if rows else None
+
+    def wait_for_update(self, seq: int, timeout: Optional[float] = None, poll: float = 0.001) -> bool:
+        """Blocks (polling) until :attr:`seq` differs from ``seq``. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.seq == seq:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(poll)
+        return True
+
+    def close(self):
+        self.buffer.release()
+        self._buf.release()
+        self.shm.close()
+
+
+class OrderEndpoint:
+    """Worker side of :class:`OrderChannel` (picklable: pass it to the worker process)."""
+
+    def __init__(self, name: str, requests, replies):
+        self.name = name
+        self._requests = requests
+        self._replies = replies
+
+    def submit(self, active_id: int, direction: str, amount: float, duration: int = 30) -> str:
+        """Queues an order for the owner process. Returns the request id used in the replies."""
+        request_id = get_req_id()
+        self._requests.put({"request_id": request_id, "worker": self.name, "active_id": active_id,
+                            "direction": direction, "amount": amount, "duration": duration})
+        return request_id
+
+    def get_reply(self, timeout: Optional[float] = None) -> dict:
+        """
+        Next reply for this worker: ``{"request_id", "status": "accepted", "order_id"}``,
+        then ``{"request_id", "status": "closed", "result": {...}}``. A ``status="error"``
+        reply replaces either one when the order is rejected or its result fails.
+        Raises ``queue.Empty`` on timeout.
+        """
+        return self._replies.get(timeout=timeout)
+
+
+class OrderChannel:
+    """
+    Order requests from worker processes to the process that owns the connection.
+
+    Create it (and every :meth:`endpoint`) in the owner before starting the
+    workers, then run ``await channel.serve(iq)`` in the owner's event loop.
+    """
+
+    def __init__(self, ctx=None):
+        self._ctx = ctx or multiprocessing.get_context()
+        self.requests = self._ctx.Queue()
+        self._replies: Dict[str, "multiprocessing.Queue"] = {}
+        self._tasks = set()
+
+    def endpoint(self, name: str) -> OrderEndpoint:
+        if name not in self._replies:
+            self._replies[name] = self._ctx.Queue()
+        return OrderEndpoint(name, self.requests, self._replies[name])
+
+    def stop(self):
+        """Makes :meth:`serve` return (sentinel through the request queue)."""
+        self.requests.put(None)
+
+    async def serve(self, iq, poll_interval: float = 0.5):
+        """
+        Executes worker requests on ``iq`` until :meth:`stop`. The queue is read in
+        the default executor with a ``poll_interval`` timeout, so a cancelled
+        ``serve`` releases its thread within that interval.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                request = await loop.run_in_executor(None, self.requests.get, True, poll_interval)
+            except queue.Empty:
+                continue
+            if request is None:
+                break
+            task = asyncio.create_task(self._execute(iq, request))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _execute(self, iq, request: dict):
+        reply = self._replies.get(request.get("worker"))
+        if reply is None:
+            logger.error("shm_order_unknown_worker", worker=request.get("worker"))
+            return
+        request_id = request["request_id"]
+        try:
+            handle = await iq.open_blitz(request["active_id"], request["direction"], request["amount"], request.get("duration", 30))
+        except Exception as e:
+            reply.put({"request_id": request_id, "status": "error", "error": str(e)})
+            return
+        reply.put({"request_id": request_id, "status": "accepted", "order_id": handle.order_id})
+        # O tracker já expira a ordem em max(duration, 60) + 30s; este timeout só cobre falhas dele
+        timeout = max(request.get("duration", 30), 60) + 60
+        try:
+            result = await asyncio.wait_for(asyncio.shield(handle.result), timeout)
+        except asyncio.CancelledError:
+            reply.put({"request_id": request_id, "status": "error", "error": "cancelled"})
+            raise
+        except Exception as e:
+            reply.put({"request_id": request_id, "status": "error", "error": str(e) or type(e).__name__})
+            return
+        reply.put({"request_id": request_id, "status": "closed", "result": result})
+
+
+class SharedMarketData:
+    """
+    Owner-process fan-out: writes the candle stream of each ``(active_id, size)``
+    of ``iq`` into its :class:`CandleRingWriter`, for :class:`CandleRingReader`
+    instances in worker processes.
+    """
+
+    def __init__(self, iq, capacity: int = 1024, prefix: str = "myiq"):
+        self.iq = iq
+        self.capacity = capacity
+        self.prefix = prefix
+        self.writers: Dict[Tuple[int, int], CandleRingWriter] = {}
+
+    async def add_stream(self, active_id: int, size: int) -> str:
+        """Starts the candle stream and returns the shared memory block name."""
+        key = (int(active_id), int(size))
+        if key not in self.writers:
+            self.writers[key] = CandleRingWriter(active_id, size, self.capacity, self.prefix)
+        await self.iq.start_candles_stream(active_id, size, self.writers[key].write)
+        return self.writers[key].name
+
+    def close(self):
+        for writer in self.writers.values():
+            writer.close()
+        self.writers.clear()
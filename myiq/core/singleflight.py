@@ -0,0 +1,81 @@
+import json
+import time
+import asyncio
+import structlog
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Tuple
+from myiq.core.constants import OP_OPEN_OPTION
+
+logger = structlog.get_logger()
+
+# Operações com efeito colateral: cada chamada TEM que chegar ao servidor
+NEVER_COALESCE = (OP_OPEN_OPTION,)
+
+
+def request_key(name: str, version: str, body: Any) -> Tuple[str, str, str]:
+    """``(name, version, canonical JSON body)``: equal requests give equal keys regardless of dict order."""
+    return name, version, json.dumps(body, sort_keys=True, separators=(",", ":"), default=str)
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent requests into one server round trip.
+
+    The first caller for a key starts the request; callers arriving while it is in
+    flight await the same task (through ``asyncio.shield``, so one caller being
+    cancelled does not cancel it for the others). Errors are shared but never cached.
+    With a TTL configured for the operation (``ttls[name]``, seconds) the result is
+    also reused for that long after it arrives. Results are shared objects: do not
+    mutate them.
+    """
+
+    def __init__(self, ttls: Optional[Dict[str, float]] = None, never: Iterable[str] = NEVER_COALESCE,
+                 clock: Callable[[], float] = time.monotonic):
+        self.ttls: Dict[str, float] = dict(ttls or {})
+        self.never = set(never)
+        self._clock = clock
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._cache: Dict[Hashable, Tuple[float, Any]] = {} # key -> (expira_em, resultado)
+        self.calls = 0
+        self.coalesced = 0
+        self.cache_hits = 0
+
+    async def do(self, name: str, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Returns ``await factory()``, sharing it with identical in-flight/cached calls."""
+        self.calls += 1
+        if name in self.never:
+            return await factory()
+
+        cached = self._cache.get(key)
+        if cached is not None:
+            if cached[0] > self._clock():
+                self.cache_hits += 1
+                return cached[1]
+            del self._cache[key]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._on_done(name, key, t))
+        return await asyncio.shield(task)
+
+    def _on_done(self, name: str, key: Hashable, task: asyncio.Future):
+        self._inflight.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        ttl = self.ttls.get(name)
+        if ttl:
+            self._cache[key] = (self._clock() + ttl, task.result())
+
+    def invalidate(self, name: Optional[str] = None):
+        """Drops cached results (all, or only those of operation ``name``)."""
+        if name is None:
+            self._cache.clear()
+            return
+        for key in [k for k in self._cache if isinstance(k, tuple) and k and k[0] == name]:
+            del self._cache[key]
+
+    def stats(self) -> dict:
+        return {"calls": self.calls, "coalesced": self.coalesced, "cache_hits": self.cache_hits, "in_flight": len(self._inflight)}
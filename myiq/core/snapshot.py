@@ -0,0 +1,90 @@
+import os
+import json
+import time
+import asyncio
+import tempfile
+import structlog
+from typing import Dict, Any, Optional
+
+logger = structlog.get_logger()
+
+SNAPSHOT_VERSION = 1
+
+# Só o necessário para decidir ativo/payout; o resto chega com o initialization-data
+_ACTIVE_FIELDS = (
+    "id", "active_id", "name", "ticker", "enabled", "is_suspended",
+    "schedule", "profit_percent", "active_type", "image",
+)
+
+
+def _compact_active(data: dict) -> dict:
+    compact = {k: data[k] for k in _ACTIVE_FIELDS if k in data}
+    profit = data.get("option", {}).get("profit") if isinstance(data.get("option"), dict) else None
+    if profit is not None:
+        compact["option"] = {"profit": profit}
+    return compact
+
+
+def build_snapshot(iq_client) -> Dict[str, Any]:
+    """Builds a compact, JSON-serialisable snapshot of the client's slow-changing state."""
+    actives = {}
+    for category, cache in iq_client.actives_cache.items():
+        # get_actives() mistura ids inteiros no nível de categoria; só categorias nomeadas entram
+        if not isinstance(category, str) or not isinstance(cache, dict):
+            continue
+        items = {str(a_id): _compact_active(data) for a_id, data in cache.items() if isinstance(data, dict)}
+        if items:
+            actives[str(category)] = items
+
+    return {
+        "version": SNAPSHOT_VERSION,
+        "saved_at": time.time(),
+        "actives": actives,
+        "features": dict(iq_client.features),
+        "user_settings": dict(iq_client.user_settings),
+    }
+
+
+def save_snapshot(path: str, snapshot: Dict[str, Any]):
+    """
+    Writes the snapshot atomically (temp file + rename) so a crash never leaves a torn file.
+    The temp file name is unique, so concurrent writers never share it.
+    """
+    tmp_path = None
+    try:
+        with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=os.path.dirname(path) or ".",
+                                         prefix=os.path.basename(path) + ".", suffix=".tmp", delete=False) as f:
+            tmp_path = f.name
+            json.dump(snapshot, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+        logger.info("snapshot_saved", path=path, categories=len(snapshot.get("actives", {})))
+    except Exception as e:
+        logger.error("snapshot_save_error", path=path, error=str(e))
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def load_snapshot(path: str) -> Optional[Dict[str, Any]]:
+    """Reads a snapshot from disk. Returns None if missing, unreadable or from another version."""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception as e:
+        logger.error("snapshot_load_error", path=path, error=str(e))
+        return None
+
+    if not isinstance(data, dict):
+        logger.error("snapshot_load_error", path=path, error="snapshot is not a JSON object")
+        return None
+    if data.get("version") != SNAPSHOT_VERSION:
+        logger.warning("snapshot_version_mismatch", path=path, version=data.get("version"))
+        return None
+    return data
+
+
+async def save_snapshot_async(path: str, iq_client):
+    """Builds the snapshot on the loop (consistent view) and writes it in a worker thread."""
+    snapshot = build_snapshot(iq_client)
+    await asyncio.to_thread(save_snapshot, path, snapshot)
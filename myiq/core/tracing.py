@@ -0,0 +1,127 @@
+import json
+import time
+import random
+import structlog
+from collections import deque
+from typing import Callable, Dict, Optional
+
+logger = structlog.get_logger()
+
+# Pontos marcados ao longo de uma requisição; cada span termina no ponto de mesmo nome
+#   enqueue          chamada -> início da escrita (limiter, serialização)
+#   wire_send        escrita no socket
+#   first_response   socket escrito -> frame de resposta lido (rede + servidor)
+#   future_resolved  frame lido -> future resolvido (decode + dispatch)
+#   caller_resumed   future resolvido -> coroutine de quem chamou retomada (agendamento do loop)
+SPANS = ("enqueue", "wire_send", "first_response", "future_resolved", "caller_resumed")
+_START_OF = {"enqueue": "start", "wire_send": "enqueue", "first_response": "wire_send",
+             "future_resolved": "first_response", "caller_resumed": "future_resolved"}
+
+
+class Trace:
+    """Timestamps (``perf_counter``) of one request attempt, keyed by point name."""
+
+    __slots__ = ("request_id", "operation", "attrs", "wall_start", "marks", "clock")
+
+    def __init__(self, request_id: str, operation: str, attrs: dict, clock: Callable[[], float]):
+        self.request_id = request_id
+        self.operation = operation
+        self.attrs = attrs
+        self.clock = clock
+        self.wall_start = time.time()
+        self.marks: Dict[str, float] = {"start": clock()}
+
+    def mark(self, point: str):
+        self.marks[point] = self.clock()
+
+    def spans_ms(self) -> Dict[str, float]:
+        """Duration of every span whose start and end points were both marked."""
+        spans = {}
+        for name in SPANS:
+            start, end = self.marks.get(_START_OF[name]), self.marks.get(name)
+            if start is not None and end is not None:
+                spans[name] = round((end - start) * 1000, 3)
+        return spans
+
+    def to_dict(self, status) -> dict:
+        end = self.marks.get("caller_resumed", max(self.marks.values()))
+        return {
+            "ts": round(self.wall_start, 6), "request_id": self.request_id, "operation": self.operation,
+            "status": status, "total_ms": round((end - self.marks["start"]) * 1000, 3),
+            "spans": self.spans_ms(), **({"attrs": self.attrs} if self.attrs else {}),
+        }
+
+
+class Tracer:
+    """
+    Head-sampled request tracing correlated by ``request_id``.
+
+    ``start()`` returns a :class:`Trace` for a fraction ``sample_rate`` of the
+    requests (None otherwise, so untraced requests only pay one ``random()``).
+    The :class:`Dispatcher` marks ``first_response`` / ``future_resolved`` when the
+    reply for a traced request id arrives; ``finish()`` marks ``caller_resumed``
+    and writes one JSON line per trace to ``path`` (buffered; flushed by
+    :meth:`flush` / :meth:`close`). The last ``keep`` traces stay in :attr:`recent`.
+    """
+
+    def __init__(self, path: Optional[str] = None, sample_rate: float = 1.0, keep: int = 1000, max_pending: int = 10000,
+                 clock: Callable[[], float] = time.perf_counter, rng: Optional[random.Random] = None):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.max_pending = max_pending
+        self.clock = clock
+        self.recent = deque(maxlen=keep)
+        self._random = (rng or random.Random()).random
+        self._pending: Dict[str, Trace] = {}
+        self._file = open(path, "a", encoding="utf-8") if path else None
+        self.exported = 0
+
+    def start(self, operation: str, request_id: str, **attrs) -> Optional[Trace]:
+        """Starts a trace (``enqueue`` begins now) if this request is sampled."""
+        if self.sample_rate <= 0 or (self.sample_rate < 1 and self._random() >= self.sample_rate):
+            return None
+        trace = Trace(str(request_id), operation, attrs, self.clock)
+        if len(self._pending) >= self.max_pending:
+            # Requisições canceladas nunca chamam finish(): descarta a mais antiga
+            self._pending.pop(next(iter(self._pending)))
+        self._pending[trace.request_id] = trace
+        return trace
+
+    def resolved(self, request_id: str, frame_at: Optional[float] = None):
+        """Called by the Dispatcher right after resolving the future of ``request_id``."""
+        trace = self._pending.get(request_id)
+        if trace is None:
+            return
+        now = self.clock()
+        if frame_at is None or frame_at < trace.marks.get("wire_send", frame_at):
+            frame_at = now # resposta não veio de um frame do socket (ex.: evento local)
+        trace.marks.setdefault("first_response", frame_at)
+        trace.marks.setdefault("future_resolved", now)
+
+    def finish(self, trace: Optional[Trace], status="ok", **attrs):
+        """
+        Marks ``caller_resumed`` unless already marked (call it right after the
+        await, or ``trace.mark("caller_resumed")`` there) and exports the trace.
+        """
+        if trace is None:
+            return
+        trace.marks.setdefault("caller_resumed", self.clock())
+        self._pending.pop(trace.request_id, None)
+        trace.attrs.update(attrs)
+        record = trace.to_dict(status)
+        self.recent.append(record)
+        if self._file is not None:
+            try:
+                self._file.write(json.dumps(record) + "\n")
+                self.exported += 1
+            except (OSError, ValueError) as e:
+                logger.warning("trace_export_error", error=str(e))
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
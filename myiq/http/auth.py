@@ -1,58 +1,163 @@
+import os
+import json
+import time
 import httpx
 import structlog
+from typing import Optional
+from myiq.core.constants import IQ_HTTP_URL
 
 logger = structlog.get_logger()
 
+try:
+    import h2  # noqa: F401 (habilita HTTP/2 no httpx quando instalado: pip install httpx[http2])
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
 class IQAuth:
-    def __init__(self, email: str, password: str):
+    """
+    HTTP login against the IQ Option auth API.
+
+    Owns a single pooled keep-alive ``httpx.AsyncClient`` (HTTP/2 when ``h2`` is
+    installed) reused across logins, and optionally caches the SSID on disk so
+    restarts/reconnects can skip the password login while the SSID is still valid.
+    """
+
+    def __init__(self, email: str, password: str, ssid_cache_path: Optional[str] = None, ssid_max_age: float = 12 * 3600,
+                 url: Optional[str] = None):
         self.email = email
+        self.url = url or IQ_HTTP_URL
         self.password = password
+        self.ssid_cache_path = ssid_cache_path
+        self.ssid_max_age = ssid_max_age
+        self.ssid_from_cache = False # True se o último get_ssid() veio do cache (pode ser rejeitado pelo WS)
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                limits=httpx.Limits(max_keepalive_connections=5, keepalive_expiry=300),
+            )
+        return self._client
+
+    async def aclose(self):
+        """Closes the pooled HTTP client."""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+
+    # --- SSID CACHE ---
+    def _read_cache(self) -> dict:
+        if not self.ssid_cache_path or not os.path.exists(self.ssid_cache_path):
+            return {}
+        try:
+            with open(self.ssid_cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except Exception as e:
+            logger.warning("ssid_cache_read_error", error=str(e))
+            return {}
+
+    def _write_cache(self, data: dict):
+        if not self.ssid_cache_path:
+            return
+        tmp_path = f"{self.ssid_cache_path}.tmp"
+        try:
+            # O SSID é uma credencial: arquivo legível só pelo dono
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.ssid_cache_path)
+        except Exception as e:
+            logger.warning("ssid_cache_write_error", error=str(e))
+
+    def get_cached_ssid(self) -> Optional[str]:
+        """Returns the cached SSID for this account if present and younger than ``ssid_max_age``."""
+        entry = self._read_cache().get(self.email)
+        if not isinstance(entry, dict) or not entry.get("ssid"):
+            return None
+        if time.time() - entry.get("created_at", 0) > self.ssid_max_age:
+            logger.info("ssid_cache_expired")
+            return None
+        return entry["ssid"]
+
+    def invalidate_ssid(self):
+        """Removes this account's SSID from the cache (e.g. after the WS rejected it)."""
+        data = self._read_cache()
+        if data.pop(self.email, None) is not None:
+            self._write_cache(data)
+        self.ssid_from_cache = False
 
-    async def get_ssid(self) -> str:
-        async with httpx.AsyncClient() as client:
-            payload = {"identifier": self.email, "password": self.password}
-            try:
-                resp = await client.post("https://auth.iqoption.com/api/v2/login", json=payload)
-                
-                if resp.status_code == 200:
-                    data = resp.json()
-                    if data.get("code") == "success":
-                        return data.get("ssid", "")
-                    else:
-                        # API retornou 200 mas com erro no corpo (ex: 2FA required, etc)
-                        msg = data.get("message") or str(data)
-                        logger.error("auth_api_error", response=data)
-                        raise ValueError(f"Erro na API de autenticação: {msg}")
-
-                elif resp.status_code == 400:
-                     # Geralmente dados inválidos no request
-                    logger.error("auth_bad_request", response=resp.text)
-                    raise ValueError("Requisição inválida (400). Verifique formato do email/senha.")
-
-                elif resp.status_code == 401:
-                    # Credenciais erradas
-                    logger.error("auth_unauthorized")
-                    raise PermissionError("Credenciais inválidas (401). Verifique email e senha.")
-
-                elif resp.status_code == 403:
-                    # Bloqueio de IP ou WAF (Cloudflare etc)
-                    logger.error("auth_forbidden")
-                    raise PermissionError("Acesso negado (403). Seu IP pode estar bloqueado ou restrito pela corretora.")
-
-                elif resp.status_code == 429:
-                    logger.error("auth_rate_limit")
-                    raise ConnectionError("Muitas tentativas de login (429). Aguarde alguns minutos.")
+    def _store_ssid(self, ssid: str):
+        if not self.ssid_cache_path or not ssid:
+            return
+        data = self._read_cache()
+        data[self.email] = {"ssid": ssid, "created_at": time.time()}
+        self._write_cache(data)
 
+    async def get_ssid(self, force_login: bool = False) -> str:
+        """
+        Returns an SSID, reusing a still-valid cached one unless ``force_login`` is set.
+        """
+        if not force_login:
+            cached = self.get_cached_ssid()
+            if cached:
+                logger.info("ssid_cache_hit")
+                self.ssid_from_cache = True
+                return cached
+
+        ssid = await self._login()
+        self.ssid_from_cache = False
+        self._store_ssid(ssid)
+        return ssid
+
+    async def _login(self) -> str:
+        client = self._get_client()
+        payload = {"identifier": self.email, "password": self.password}
+        try:
+            resp = await client.post(self.url, json=payload)
+
+            if resp.status_code == 200:
+                data = resp.json()
+                if data.get("code") == "success":
+                    return data.get("ssid", "")
                 else:
-                    logger.error("auth_http_error", status=resp.status_code)
-                    raise ConnectionError(f"Erro HTTP desconhecido na autenticação: {resp.status_code}")
-
-            except httpx.RequestError as e:
-                logger.error("auth_network_error", error=str(e))
-                raise ConnectionError(f"Erro de conexão ao tentar fazer login: {str(e)}")
-            except Exception as e:
-                # Se já for uma das exceções que levantamos acima, só deixa passar
-                if isinstance(e, (ValueError, PermissionError, ConnectionError)):
-                    raise
-                logger.error("auth_exception", error=str(e))
-                raise RuntimeError(f"Erro inesperado no login: {str(e)}")
+                    # API retornou 200 mas com erro no corpo (ex: 2FA required, etc)
+                    msg = data.get("message") or str(data)
+                    logger.error("auth_api_error", response=data)
+                    raise ValueError(f"Erro na API de autenticação: {msg}")
+
+            elif resp.status_code == 400:
+                 # Geralmente dados inválidos no request
+                logger.error("auth_bad_request", response=resp.text)
+                raise ValueError("Requisição inválida (400). Verifique formato do email/senha.")
+
+            elif resp.status_code == 401:
+                # Credenciais erradas
+                logger.error("auth_unauthorized")
+                raise PermissionError("Credenciais inválidas (401). Verifique email e senha.")
+
+            elif resp.status_code == 403:
+                # Bloqueio de IP ou WAF (Cloudflare etc)
+                logger.error("auth_forbidden")
+                raise PermissionError("Acesso negado (403). Seu IP pode estar bloqueado ou restrito pela corretora.")
+
+            elif resp.status_code == 429:
+                logger.error("auth_rate_limit")
+                raise ConnectionError("Muitas tentativas de login (429). Aguarde alguns minutos.")
+
+            else:
+                logger.error("auth_http_error", status=resp.status_code)
+                raise ConnectionError(f"Erro HTTP desconhecido na autenticação: {resp.status_code}")
+
+        except httpx.RequestError as e:
+            logger.error("auth_network_error", error=str(e))
+            raise ConnectionError(f"Erro de conexão ao tentar fazer login: {str(e)}")
+        except Exception as e:
+            # Se já for uma das exceções que levantamos acima, só deixa passar
+            if isinstance(e, (ValueError, PermissionError, ConnectionError)):
+                raise
+            logger.error("auth_exception", error=str(e))
+            raise RuntimeError(f"Erro inesperado no login: {str(e)}")
@@ -0,0 +1 @@
+from .server import FakeIQServer, LATENCY_PROFILES
@@ -0,0 +1,37 @@
+"""
+Runs :class:`FakeIQServer` standalone, e.g. for load tests from other processes::
+
+    python -m myiq.testing --port 8765 --http-port 8766 --latency broker --tick-rate 20
+    IQ_WS_URL=ws://127.0.0.1:8765/echo/websocket IQ_HTTP_URL=http://127.0.0.1:8766/api/v2/login python bot.py
+"""
+import asyncio
+import argparse
+from myiq.testing.server import FakeIQServer, LATENCY_PROFILES
+
+
+async def _serve(args):
+    async with FakeIQServer(port=args.port, http_port=args.http_port, latency=args.latency, tick_rate=args.tick_rate,
+                            result_delay=args.result_delay, win_rate=args.win_rate, seed=args.seed) as server:
+        print(f"IQ_WS_URL={server.ws_url}")
+        print(f"IQ_HTTP_URL={server.http_url}", flush=True)
+        await asyncio.Event().wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--http-port", type=int, default=8766)
+    parser.add_argument("--latency", default="local", choices=sorted(LATENCY_PROFILES))
+    parser.add_argument("--tick-rate", type=float, default=4.0, help="candle-generated ticks/s per subscription")
+    parser.add_argument("--result-delay", type=float, default=30.0, help="seconds until a position closes")
+    parser.add_argument("--win-rate", type=float, default=0.5)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
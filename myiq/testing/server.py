@@ -0,0 +1,364 @@
+import json
+import time
+import random
+import asyncio
+import itertools
+import websockets
+import structlog
+from collections import Counter
+from typing import Dict, Optional, Tuple, Union
+from myiq.core.constants import (
+    OP_AUTHENTICATE, OP_GET_BALANCES, OP_OPEN_OPTION, OP_GET_CANDLES, OP_SET_SETTINGS, OP_GET_FINANCIAL_INFO,
+    OP_SUBSCRIBE_BALANCE_CHANGED, EV_AUTHENTICATED, EV_TIME_SYNC, EV_POSITION_CHANGED, EV_CANDLE_GENERATED,
+    EV_BALANCE_CHANGED, EV_INIT_DATA, EV_FINANCIAL_INFO, EV_PROFILE,
+)
+
+logger = structlog.get_logger()
+
+# Latência por resposta (segundos): (base, jitter uniforme ±)
+LATENCY_PROFILES: Dict[str, Tuple[float, float]] = {
+    "local": (0.0, 0.0),
+    "lan": (0.002, 0.001),
+    "broker": (0.045, 0.015), # ordem de grandeza medida contra o servidor real
+    "congested": (0.150, 0.100),
+}
+
+DEFAULT_ACTIVES = {76: 87, 1: 86, 2: 85, 4: 84, 5: 83, 6: 82, 7: 80, 8: 78}
+DEFAULT_BALANCES = ({"id": 1001, "type": 1, "amount": 10000.0, "currency": "USD"},
+                    {"id": 1004, "type": 4, "amount": 10000.0, "currency": "USD"})
+
+_HTTP_REASONS = {200: "OK", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found"}
+
+
+class FakeIQServer:
+    """
+    Local stand-in for the IQ Option WebSocket and HTTP login endpoints.
+
+    Speaks the protocol subset used by :class:`myiq.IQOption`: HTTP login,
+    ``authenticate``, ``timeSync``, ``get-initialization-data``, ``get-candles``,
+    ``candle-generated`` subscriptions, ``open-option`` with ``position-changed``
+    results, balances / ``balance-changed`` and ``get-financial-information``.
+    Point a client at it with the ``ws_url`` / ``http_url`` arguments (or the
+    ``IQ_WS_URL`` / ``IQ_HTTP_URL`` environment variables)::
+
+        async with FakeIQServer(latency="broker", tick_rate=10) as server:
+            iq = IQOption("a@b.c", "pw", ws_url=server.ws_url, http_url=server.http_url)
+            await iq.start()
+
+    Args:
+        latency: name in :data:`LATENCY_PROFILES` or ``(base, jitter)`` in seconds,
+            added before every reply (replies may overtake each other, as on the broker).
+        tick_rate: ``candle-generated`` ticks per second per subscription.
+        time_sync_interval: seconds between ``timeSync`` pushes.
+        result_delay: seconds between an order ACK and its closing ``position-changed``.
+        win_rate: probability of a ``win`` result (otherwise ``loose``).
+        clock_offset_ms: server clock minus local wall clock.
+        credentials: ``{email: password}`` accepted by the login; None accepts any.
+        actives: ``{active_id: profit_percent}`` served as open Blitz/Turbo actives.
+        seed: seeds prices and trade results.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, http_port: int = 0,
+                 latency: Union[str, Tuple[float, float]] = "local", tick_rate: float = 4.0,
+                 time_sync_interval: float = 1.0, result_delay: float = 1.0, win_rate: float = 0.5,
+                 clock_offset_ms: float = 0.0, credentials: Optional[Dict[str, str]] = None,
+                 actives: Optional[Dict[int, int]] = None, seed: Optional[int] = None):
+        self.host = host
+        self.port = port
+        self.http_port = http_port
+        self.latency = LATENCY_PROFILES[latency] if isinstance(latency, str) else tuple(latency)
+        self.tick_rate = tick_rate
+        self.time_sync_interval = time_sync_interval
+        self.result_delay = result_delay
+        self.win_rate = win_rate
+        self.clock_offset_ms = clock_offset_ms
+        self.credentials = credentials
+        self.actives = dict(actives or DEFAULT_ACTIVES)
+        self.balances = {b["id"]: dict(b) for b in DEFAULT_BALANCES}
+        self.random = random.Random(seed)
+        self.received = Counter() # frames recebidos por nome de operação
+        self.sessions = set() # SSIDs emitidos pelo login
+        self._prices: Dict[int, float] = {}
+        self._order_ids = itertools.count(10**10)
+        self._connections = set()
+        self._ws_server = None
+        self._http_server = None
+
+    # --- CICLO DE VIDA ---
+    async def start(self) -> "FakeIQServer":
+        self._ws_server = await websockets.serve(self._handle_ws, self.host, self.port, max_size=None)
+        self.port = list(self._ws_server.sockets)[0].getsockname()[1]
+        self._http_server = await asyncio.start_server(self._handle_http, self.host, self.http_port)
+        self.http_port = self._http_server.sockets[0].getsockname()[1]
+        logger.info("fake_server_started", ws_url=self.ws_url, http_url=self.http_url)
+        return self
+
+    async def close(self):
+        for server in (self._ws_server, self._http_server):
+            if server is not None:
+                server.close()
+        for ws in list(self._connections):
+            await ws.close()
+        for server in (self._ws_server, self._http_server):
+            if server is not None:
+                await server.wait_closed()
+
+    async def __aenter__(self) -> "FakeIQServer":
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    @property
+    def ws_url(self) -> str:
+        return f"ws://{self.host}:{self.port}/echo/websocket"
+
+    @property
+    def http_url(self) -> str:
+        return f"http://{self.host}:{self.http_port}/api/v2/login"
+
+    async def drop_connections(self):
+        """Closes every client socket (exercises the client's reconnect path)."""
+        for ws in list(self._connections):
+            await ws.close()
+
+    def server_time_ms(self) -> float:
+        return time.time() * 1000 + self.clock_offset_ms
+
+    # --- HTTP (login) ---
+    async def _handle_http(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        # HTTP/1.1 mínimo com keep-alive: o IQAuth reusa a conexão do pool
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                lines = head.decode("latin-1").split("\r\n")
+                method, path, _ = lines[0].split(" ", 2)
+                headers = {k.strip().lower(): v.strip() for k, v in (l.split(":", 1) for l in lines[1:] if ":" in l)}
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                status, payload = self._login(method, path, body)
+                data = json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} {_HTTP_REASONS.get(status, '')}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def _login(self, method: str, path: str, body: bytes) -> Tuple[int, dict]:
+        self.received["login"] += 1
+        if method != "POST" or not path.startswith("/api/v2/login"):
+            return 404, {"code": "not_found"}
+        try:
+            data = json.loads(body or b"{}")
+        except ValueError:
+            return 400, {"code": "invalid_request"}
+        email, password = data.get("identifier"), data.get("password")
+        if self.credentials is not None and self.credentials.get(email) != password:
+            return 401, {"code": "invalid_credentials"}
+        ssid = f"fake-{self.random.getrandbits(64):016x}"
+        self.sessions.add(ssid)
+        return 200, {"code": "success", "ssid": ssid}
+
+    # --- WEBSOCKET ---
+    async def _handle_ws(self, ws):
+        state = {"authenticated": False, "portfolio": False, "balances": False, "candles": {}, "tasks": set()}
+        self._connections.add(ws)
+        sync_task = asyncio.create_task(self._time_sync_loop(ws))
+        try:
+            async for raw in ws:
+                try:
+                    message = json.loads(raw)
+                except ValueError:
+                    continue
+                self._handle_message(ws, state, message)
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self._connections.discard(ws)
+            sync_task.cancel()
+            for task in list(state["candles"].values()) + list(state["tasks"]):
+                task.cancel()
+
+    def _spawn(self, state: dict, coro):
+        task = asyncio.create_task(coro)
+        state["tasks"].add(task)
+        task.add_done_callback(state["tasks"].discard)
+
+    async def _send(self, ws, payload: dict):
+        try:
+            await ws.send(json.dumps(payload))
+        except websockets.ConnectionClosed:
+            pass
+
+    async def _reply(self, ws, payload: dict):
+        base, jitter = self.latency
+        delay = base + (self.random.uniform(-jitter, jitter) if jitter else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await self._send(ws, payload)
+
+    def _handle_message(self, ws, state: dict, message: dict):
+        name = message.get("name")
+        request_id = message.get("request_id")
+        msg = message.get("msg")
+        if name == OP_AUTHENTICATE:
+            self.received[name] += 1
+            ok = isinstance(msg, dict) and msg.get("ssid") in self.sessions
+            state["authenticated"] = ok
+            self._spawn(state, self._reply(ws, {"name": EV_AUTHENTICATED, "request_id": request_id, "msg": ok}))
+            if ok:
+                self._spawn(state, self._reply(ws, {"name": EV_PROFILE, "msg": {"user_id": 1, "balance_id": 1004}}))
+            return
+        if name == "ssid" or not isinstance(msg, dict):
+            self.received[name] += 1 # heartbeat
+            return
+
+        op = msg.get("name")
+        self.received[op] += 1
+        if not state["authenticated"]:
+            self._spawn(state, self._reply(ws, {"name": "result", "request_id": request_id, "status": 4001,
+                                                "msg": {"message": "unauthenticated"}}))
+            return
+        if name == "subscribeMessage":
+            self._subscribe(ws, state, op, msg.get("params") or {})
+        elif name == "unsubscribeMessage":
+            filters = (msg.get("params") or {}).get("routingFilters", {})
+            task = state["candles"].pop((filters.get("active_id"), filters.get("size")), None)
+            if task:
+                task.cancel()
+        elif name == "sendMessage":
+            reply = self._request(ws, state, op, msg.get("body") or {})
+            if reply is not None:
+                reply.setdefault("request_id", request_id)
+                self._spawn(state, self._reply(ws, reply))
+
+    def _subscribe(self, ws, state: dict, op: str, params: dict):
+        if op == EV_CANDLE_GENERATED:
+            filters = params.get("routingFilters", {})
+            key = (filters.get("active_id"), filters.get("size"))
+            if None not in key and key not in state["candles"]:
+                state["candles"][key] = asyncio.create_task(self._candle_loop(ws, int(key[0]), int(key[1])))
+        elif op == "portfolio.position-changed":
+            state["portfolio"] = True
+        elif op == OP_SUBSCRIBE_BALANCE_CHANGED:
+            state["balances"] = True
+
+    def _request(self, ws, state: dict, op: str, body: dict) -> Optional[dict]:
+        if op == "get-initialization-data":
+            return {"name": EV_INIT_DATA, "msg": self._initialization_data()}
+        if op == OP_GET_BALANCES:
+            return {"name": "balances", "status": 2000, "msg": list(self.balances.values())}
+        if op == OP_GET_CANDLES:
+            return {"name": "candles", "status": 2000, "msg": {"candles": self._history(body)}}
+        if op == OP_OPEN_OPTION:
+            return self._open_option(ws, state, body)
+        if op == OP_GET_FINANCIAL_INFO:
+            return {"name": EV_FINANCIAL_INFO, "status": 2000, "msg": {"data": self._financial_info(body.get("variables") or {})}}
+        if op == OP_SET_SETTINGS:
+            return {"name": "result", "status": 2000, "msg": {"success": True}}
+        return {"name": "result", "status": 4004, "msg": {"message": f"unknown operation {op}"}}
+
+    # --- DADOS DE MERCADO ---
+    def _active_data(self, active_id: int, payout: int) -> dict:
+        return {"id": active_id, "name": f"front.FAKE{active_id}", "enabled": True, "is_suspended": False,
+                "option": {"profit": {"commission": 100 - payout}}}
+
+    def _initialization_data(self) -> dict:
+        actives = {str(a): self._active_data(a, p) for a, p in self.actives.items()}
+        return {"blitz": {"actives": actives}, "turbo": {"actives": {k: dict(v) for k, v in actives.items()}}}
+
+    def _financial_info(self, variables: dict) -> dict:
+        info = lambda a: {"id": a, "name": f"FAKE{a}", "ticker": f"FAKE{a}", "charts": {"m1": {"change": 0.0}}}
+        if "activeId" in variables:
+            return {"active": info(int(variables["activeId"]))}
+        return {f"a{v}": info(int(v)) for k, v in variables.items() if k.startswith("id")}
+
+    def _price(self, active_id: int) -> float:
+        price = self._prices.get(active_id, 1.0 + active_id / 1000)
+        price = round(price * (1 + self.random.gauss(0, 0.0002)), 6)
+        self._prices[active_id] = price
+        return price
+
+    def _history(self, body: dict) -> list:
+        size = int(body.get("size", 60))
+        count = min(int(body.get("count", 1)), 1000) # limite real por requisição
+        to = int(body.get("to") or self.server_time_ms() // 1000)
+        active_id = int(body.get("active_id", 0))
+        last_from = to - to % size
+        candles = []
+        for i in range(count - 1, -1, -1):
+            start = last_from - i * size
+            prices = [self._price(active_id) for _ in range(4)]
+            candles.append({"id": start // size, "from": start, "to": start + size, "open": prices[0],
+                            "close": prices[-1], "min": min(prices), "max": max(prices), "volume": 0})
+        return candles
+
+    async def _candle_loop(self, ws, active_id: int, size: int):
+        candle = None
+        while True:
+            now_ms = self.server_time_ms()
+            now = int(now_ms // 1000)
+            start = now - now % size
+            price = self._price(active_id)
+            if candle is None or candle["from"] != start:
+                candle = {"active_id": active_id, "size": size, "id": start // size, "from": start, "to": start + size,
+                          "open": price, "min": price, "max": price, "volume": 0, "phase": "T"}
+            candle.update(close=price, min=min(candle["min"], price), max=max(candle["max"], price),
+                          ask=price + 0.00001, bid=price - 0.00001, at=int(now_ms * 10**6))
+            await self._send(ws, {"name": EV_CANDLE_GENERATED, "microserviceName": "quotes", "msg": dict(candle)})
+            await asyncio.sleep(1 / self.tick_rate)
+
+    async def _time_sync_loop(self, ws):
+        while True:
+            await self._send(ws, {"name": EV_TIME_SYNC, "msg": int(self.server_time_ms())})
+            await asyncio.sleep(self.time_sync_interval)
+
+    # --- ORDENS ---
+    def _open_option(self, ws, state: dict, body: dict) -> dict:
+        balance = self.balances.get(body.get("user_balance_id"))
+        active_id = body.get("active_id")
+        amount = float(body.get("price") or 0)
+        error = None
+        if balance is None:
+            error = "invalid balance"
+        elif active_id not in self.actives:
+            error = "active is suspended"
+        elif amount <= 0 or amount > balance["amount"]:
+            error = "not enough money"
+        if error:
+            return {"name": "option", "status": 4000, "msg": {"message": error}}
+
+        order_id = next(self._order_ids)
+        payout = self.actives[active_id]
+        balance["amount"] = round(balance["amount"] - amount, 2)
+        position = {"active_id": active_id, "direction": body.get("direction"), "amount": amount}
+        self._spawn(state, self._position_lifecycle(ws, state, order_id, balance, position, payout))
+        return {"name": "option", "status": 2000, "msg": {"id": order_id, "active_id": active_id,
+                                                           "expired": body.get("expired"), "price": amount}}
+
+    def _position_event(self, order_id: int, position: dict, status: str, result: str, pnl: float) -> dict:
+        evt = dict(position, result=result)
+        if result in ("win", "loose"):
+            evt["profit_amount"] = round(position["amount"] + pnl, 2)
+        return {"name": EV_POSITION_CHANGED, "microserviceName": "portfolio", "msg": {
+            "id": f"pos-{order_id}", "external_id": order_id, "status": status, "pnl": pnl,
+            "invest": position["amount"], "raw_event": {"binary_options_option_changed1": evt}
+        }}
+
+    async def _position_lifecycle(self, ws, state: dict, order_id: int, balance: dict, position: dict, payout: int):
+        if state["balances"]:
+            await self._reply(ws, {"name": EV_BALANCE_CHANGED, "msg": {"current_balance": dict(balance)}})
+        if state["portfolio"]:
+            await self._reply(ws, self._position_event(order_id, position, "open", "opened", 0))
+        await asyncio.sleep(self.result_delay)
+
+        win = self.random.random() < self.win_rate
+        pnl = round(position["amount"] * payout / 100, 2) if win else -position["amount"]
+        balance["amount"] = round(balance["amount"] + position["amount"] + pnl, 2)
+        if state["portfolio"]:
+            await self._send(ws, self._position_event(order_id, position, "closed", "win" if win else "loose", pnl))
+        if state["balances"]:
+            await self._send(ws, {"name": EV_BALANCE_CHANGED, "msg": {"current_balance": dict(balance)}})
@@ -0,0 +1,126 @@
+import sys
+import os
+import json
+import asyncio
+import unittest
+# Adiciona o diretório raiz ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from myiq import IQOption
+
+
+class TestArmedOrder(unittest.TestCase):
+    def test_fire_sends_prebuilt_frame(self):
+        async def scenario():
+            iq = IQOption("dummy", "dummy")
+            iq.active_balance_id = 55
+            iq._on_underlying_list_changed({"msg": {
+                "name": "blitz-option-instruments.underlying-list-changed",
+                "underlying": [{"active_id": 76, "enabled": True, "is_suspended": False, "profit_percent": 85}]
+            }})
+            frames = []
+
+            async def fake_send_raw(text):
+                frames.append(text)
+                data = json.loads(text)
+                asyncio.get_running_loop().call_soon(iq.dispatcher.dispatch, {
+                    "name": "option", "request_id": data["request_id"], "status": 2000, "msg": {"id": 9}
+                })
+
+            async def fake_send(data):
+                pass
+            iq.ws.send_raw = fake_send_raw
+            iq.ws.send = fake_send
+
+            armed = iq.arm_blitz(76, amount=3.0, duration=60)
+            handle = await armed.fire("CALL")
+            self.assertEqual(handle.order_id, 9)
+
+            body = json.loads(frames[0])["msg"]["body"]
+            self.assertEqual(body["direction"], "call")
+            self.assertEqual(body["profit_percent"], 85)
+            self.assertEqual(body["user_balance_id"], 55)
+            self.assertIsInstance(body["expired"], int)
+            self.assertEqual(armed.latency_stats()["count"], 1)
+
+            # payout-changed re-arma o template
+            iq._on_underlying_list_changed({"msg": {
+                "name": "blitz-option-instruments.underlying-list-changed",
+                "underlying": [{"active_id": 76, "profit_percent": 80}]
+            }})
+            await armed.fire("put")
+            self.assertEqual(json.loads(frames[1])["msg"]["body"]["profit_percent"], 80)
+
+            with self.assertRaises(ValueError):
+                await armed.fire('call","x":"y')
+            armed.disarm()
+
+        asyncio.run(scenario())
+
+    def test_payout_changed_overrides_init_data(self):
+        async def scenario():
+            iq = IQOption("dummy", "dummy")
+            iq.active_balance_id = 55
+            # init-data ('blitz') tem prioridade no get_profit_percent
+            iq._on_initialization_data({"msg": {"blitz": {"actives": {
+                "76": {"enabled": True, "is_suspended": False, "option": {"profit": {"commission": 15}}}
+            }}}})
+            iq._on_underlying_list_changed({"msg": {
+                "name": "blitz-option-instruments.underlying-list-changed",
+                "underlying": [{"active_id": 76, "enabled": True, "is_suspended": False, "profit_percent": 85}]
+            }})
+            frames = []
+
+            async def fake_send_raw(text):
+                frames.append(text)
+                data = json.loads(text)
+                asyncio.get_running_loop().call_soon(iq.dispatcher.dispatch, {
+                    "name": "option", "request_id": data["request_id"], "status": 2000, "msg": {"id": len(frames)}
+                })
+            iq.ws.send_raw = fake_send_raw
+
+            armed = iq.arm_blitz(76, amount=1.0)
+            self.assertEqual(armed.profit_percent, 85)
+            iq._on_underlying_list_changed({"msg": {
+                "name": "blitz-option-instruments.underlying-list-changed",
+                "underlying": [{"active_id": 76, "profit_percent": 78}]
+            }})
+            # Payout de outro instrumento não altera a ordem Blitz
+            iq._on_underlying_list_changed({"msg": {
+                "name": "turbo-option-instruments.underlying-list-changed",
+                "underlying": [{"active_id": 76, "profit_percent": 90}]
+            }})
+            self.assertEqual(armed.profit_percent, 78)
+
+            iq.active_balance_id = 56
+            await armed.fire("call")
+            body = json.loads(frames[0])["msg"]["body"]
+            self.assertEqual((body["profit_percent"], body["user_balance_id"]), (78, 56))
+            armed.disarm()
+
+        asyncio.run(scenario())
+
+    def test_fire_send_failure_releases_future_and_trace(self):
+        async def scenario():
+            iq = IQOption("dummy", "dummy")
+            iq.active_balance_id = 55
+            iq.enable_tracing(None, sample_rate=1.0)
+
+            async def fake_send_raw(text):
+                raise ConnectionError("socket closed")
+            iq.ws.send_raw = fake_send_raw
+
+            armed = iq.arm_blitz(76, amount=1.0)
+            with self.assertRaises(ConnectionError):
+                await armed.fire("call")
+            self.assertEqual(len(iq.dispatcher._futures), 0)
+            self.assertEqual(len(iq.tracer._pending), 0)
+            self.assertEqual(iq.tracer.recent[-1]["status"], "error")
+            self.assertEqual(armed.latency_stats()["count"], 0)
+            armed.disarm()
+
+        asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    unittest.main()
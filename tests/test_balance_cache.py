@@ -0,0 +1,53 @@
+import sys
+import os
+import asyncio
+import unittest
+# Adiciona o diretório raiz ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from myiq import IQOption
+from myiq.core.constants import EV_BALANCE_CHANGED
+
+
+class TestBalanceCache(unittest.TestCase):
+    def test_events_update_cache_without_polling(self):
+        async def scenario():
+            iq = IQOption("dummy", "dummy")
+            iq.dispatcher.add_listener(EV_BALANCE_CHANGED, iq._on_balance_changed)
+            sent = []
+
+            async def fake_send(data):
+                sent.append(data)
+                asyncio.get_running_loop().call_soon(iq.dispatcher.dispatch, {
+                    "name": "balances", "request_id": data["request_id"],
+                    "msg": [{"id": 1, "type": 1, "amount": 50.0, "currency": "USD"},
+                            {"id": 2, "type": 4, "amount": 10000.0, "currency": "USD"}]
+                })
+            iq.ws.send = fake_send
+
+            await iq.get_balances()
+            await iq.change_balance(2)
+            self.assertEqual(iq.get_balance().amount, 10000.0)
+
+            iq.dispatcher.dispatch({
+                "name": "balance-changed", "microserviceName": "internal-billing",
+                "msg": {"id": 99, "current_balance": {"id": 2, "type": 4, "amount": 10001.7, "currency": "USD", "bonus_amount": 0}}
+            })
+            self.assertEqual(iq.get_balance().amount, 10001.7)
+
+            # Cache fresco: nenhuma ida ao servidor
+            bals = await iq.get_balances(max_age=60)
+            self.assertEqual(len(sent), 1)
+            self.assertEqual({b.id: b.amount for b in bals}, {1: 50.0, 2: 10001.7})
+
+            # Cache velho (ex: após reconexão): refresh
+            iq._balances_refreshed_at = None
+            await iq.get_balances(max_age=60)
+            self.assertEqual(len(sent), 2)
+            self.assertEqual(iq.get_balance().amount, 10000.0)
+
+        asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import sys
+import os
+import time
+import asyncio
+import unittest
+# Adiciona o diretório raiz ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from myiq import IQOption
+from myiq.core.constants import EV_CANDLE_CLOSED, EV_CANDLE_GENERATED
+
+
+def _tick(start, size, close, candle_id):
+    return {"name": EV_CANDLE_GENERATED, "msg": {
+        "id": candle_id, "active_id": 76, "size": size, "from": start, "to": start + size,
+        "open": 1.0, "close": close, "min": 1.0, "max": close, "volume": 0
+    }}
+
+
+class TestCandleClose(unittest.TestCase):
+    def test_timer_close_and_late_tick_correction(self):
+        async def scenario():
+            iq = IQOption("dummy", "dummy")
+            async def fake_send(data):
+                pass
+            iq.ws.send = fake_send
+            iq._on_ws_message({"name": "timeSync", "msg": time.time() * 1000})
+
+            closed, events, ticks = [], [], []
+            iq.dispatcher.add_listener(EV_CANDLE_CLOSED, lambda m: events.append(m["msg"]))
+            await iq.start_candles_stream(76, 1, ticks.append, on_close=closed.append)
+
+            # Candle de 1 s que termina daqui a ~50 ms (hora do servidor)
+            start = iq.clock.now() + 0.05 - 1
+            iq.dispatcher.dispatch(_tick(start, 1, 1.1, 1))
+            iq.dispatcher.dispatch(_tick(start, 1, 1.2, 1))
+            await iq.clock.sleep_until(start + 1.02)
+            self.assertEqual([(c["id"], c["close"]) for c in closed], [(1, 1.2)])
+            self.assertEqual(events, closed)
+
+            # Tick atrasado do candle fechado: correção
+            iq.dispatcher.dispatch(_tick(start, 1, 1.25, 1))
+            self.assertEqual((closed[-1]["close"], closed[-1]["is_correction"]), (1.25, True))
+
+            # Tick do candle seguinte antes do timer disparar: fecha na hora
+            iq.dispatcher.dispatch(_tick(start + 1, 1, 1.3, 2))
+            iq.dispatcher.dispatch(_tick(start + 2, 1, 1.4, 3))
+            self.assertEqual(closed[-1]["id"], 2)
+            self.assertEqual(len(ticks), 5)
+
+            # Re-inscrever o mesmo ativo/timeframe não duplica callbacks
+            await iq.start_candles_stream(76, 1, ticks.append, on_close=closed.append)
+            iq.dispatcher.dispatch(_tick(start + 3, 1, 1.5, 4))
+            self.assertEqual(len(ticks), 6)
+
+            # Segundo consumidor se soma ao primeiro (sem desconectá-lo)
+            other_ticks, other_closed = [], []
+            await iq.start_candles_stream(76, 1, other_ticks.append, on_close=other_closed.append)
+            iq.dispatcher.dispatch(_tick(start + 4, 1, 1.6, 5))
+            self.assertEqual((len(ticks), len(other_ticks)), (7, 1))
+            self.assertEqual(closed[-1]["id"], 4)
+            self.assertEqual(other_closed[-1]["id"], 4)
+            self.assertEqual(len(iq.dispatcher._listeners[EV_CANDLE_GENERATED]), 1)
+            for tracker, *_ in iq._candle_streams.values():
+                tracker.stop()
+
+        asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import sys
+import os
+import asyncio
+import unittest
+import structlog
+# Adiciona o diretório raiz ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from myiq import IQOption
+from myiq.testing import FakeIQServer
+
+
+async def _until(predicate, timeout: float = 5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        if asyncio.get_running_loop().time() > deadline:
+            raise TimeoutError("condição não atingida")
+        await asyncio.sleep(0.01)
+
+
+class TestFakeServer(unittest.TestCase):
+    """Cliente real contra o servidor local (sem credenciais nem corretora)."""
+
+    @classmethod
+    def setUpClass(cls):
+        structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(40))
+
+    @classmethod
+    def tearDownClass(cls):
+        structlog.reset_defaults()
+
+    def test_session_end_to_end(self):
+        async def scenario():
+            async with FakeIQServer(latency="lan", tick_rate=20, result_delay=0.2, win_rate=1.0, seed=1,
+                                    credentials={"a@b.c": "pw"}) as server:
+                iq = IQOption("a@b.c", "pw", ws_url=server.ws_url, http_url=server.http_url)
+                await iq.start()
+                try:
+                    await _until(lambda: iq.get_profit_percent(76) == 87)
+                    await _until(lambda: iq.clock.synced)
+
+                    balances = await iq.get_balances()
+                    self.assertEqual({b.id for b in balances}, {1001, 1004})
+                    await iq.change_balance(1004)
+
+                    handle = await iq.open_blitz(76, "call", 10.0)
+                    result = await asyncio.wait_for(handle.result, 5)
+                    self.assertEqual(result["result"], "win")
+                    self.assertAlmostEqual(result["pnl"], 8.7)
+                    await _until(lambda: iq.get_balance().amount == 10008.7)
+
+                    candles = await iq.get_candles(76, 60, 50)
+                    self.assertEqual(len(candles), 50)
+                    self.assertEqual(candles[-1].to_time - candles[0].from_time, 50 * 60)
+
+                    ticks, closes = [], []
+                    await iq.start_candles_stream(1, 1, ticks.append, on_close=closes.append)
+                    await _until(lambda: closes)
+                    self.assertEqual(closes[0]["active_id"], 1)
+                    self.assertTrue(ticks)
+                    self.assertEqual(server.received["binary-options.open-option"], 1)
+                finally:
+                    await iq.close()
+
+        asyncio.run(scenario())
+
+    def test_wrong_password_rejected(self):
+        async def scenario():
+            async with FakeIQServer(credentials={"a@b.c": "pw"}) as server:
+                iq = IQOption("a@b.c", "errada", ws_url=server.ws_url, http_url=server.http_url)
+                with self.assertRaises(PermissionError):
+                    await iq.start()
+                await iq.auth.aclose()
+
+        asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import sys
+import os
+import asyncio
+import unittest
+# Adiciona o diretório raiz ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from myiq import IQOption
+from myiq.core.cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTTLCache(unittest.TestCase):
+    def test_lru_and_expiry(self):
+        clock = FakeClock()
+        cache = TTLCache(maxsize=2, ttl=10, clock=clock)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        self.assertEqual(cache.get("a"), 1) # "a" passa a ser o mais recente
+        cache.set("c", 3)
+        self.assertIsNone(cache.get("b"))
+        clock.now = 11
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats(), {"size": 1, "hits": 1, "misses": 2, "hit_ratio": 0.333})
+
+
+class TestFinancialInfo(unittest.TestCase):
+    def test_batched_fetch_with_fallback_and_cache(self):
+        async def scenario():
+            iq = IQOption("dummy", "dummy")
+            sent = []
+
+            async def fake_send(data):
+                body = data["msg"]["body"]
+                sent.append(body["operationName"])
+                if body["operationName"] == "GetAssetsProfileInfo":
+                    # Servidor não devolve o ativo 3 no lote
+                    ids = [v for k, v in body["variables"].items() if k.startswith("id") and v != 3]
+                    msg = {"data": {f"a{a}": {"id": a} for a in ids}}
+                else:
+                    msg = {"data": {"active": {"id": body["variables"]["activeId"]}}}
+                asyncio.get_running_loop().call_soon(iq.dispatcher.dispatch, {
+                    "name": "financial-information", "request_id": data["request_id"], "msg": msg
+                })
+            iq.ws.send = fake_send
+
+            self.assertEqual(await iq.get_financial_info(5), {"id": 5})
+            res = await iq.get_financial_info_many([1, 2, 3, 5, 1], batch_size=10)
+            self.assertEqual(list(res), [1, 2, 3, 5])
+            self.assertTrue(all(info == {"id": a} for a, info in res.items()))
+            self.assertEqual(sent, ["GetAssetProfileInfo", "GetAssetsProfileInfo", "GetAssetProfileInfo"])
+
+            # Tudo em cache agora: nenhuma requisição nova
+            await iq.get_financial_info_many([1, 2, 3])
+            self.assertEqual(len(sent), 3)
+            self.assertEqual(iq.financial_cache.stats()["hits"], 4)
+
+        asyncio.run(scenario())
+
+    def test_rejected_batch_does_not_slow_down_graphql(self):
+        async def scenario():
+            iq = IQOption("dummy", "dummy")
+
+            async def fake_send(data):
+                body = data["msg"]["body"]
+                if body["operationName"] == "GetAssetsProfileInfo":
+                    msg = {"errors": [{"message": "query too complex"}]}
+                else:
+                    msg = {"data": {"active": {"id": body["variables"]["activeId"]}}}
+                asyncio.get_running_loop().call_soon(iq.dispatcher.dispatch, {
+                    "name": "financial-information", "request_id": data["request_id"], "msg": msg
+                })
+            iq.ws.send = fake_send
+
+            res = await iq.get_financial_info_many([1, 2, 3], batch_size=10)
+            self.assertEqual(res, {a: {"id": a} for a in (1, 2, 3)})
+            self.assertEqual(iq.limiter.stats()["get-financial-information"]["factor"], 1.0)
+
+        asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import sys
+import os
+import json
+import asyncio
+import unittest
+# Adiciona o diretório raiz ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import websockets
+from myiq import IQOption
+
+
+class TestLatencyMonitor(unittest.TestCase):
+    def test_rtt_histogram_and_timeout_suggestion(self):
+        iq = IQOption("dummy", "dummy")
+        for rtt in (0.02, 0.03, 0.2, 0.04):
+            iq.latency.observe(rtt)
+        hist = iq.latency.histogram()
+        self.assertEqual(hist["count"], 4)
+        self.assertEqual(hist["buckets"][0.05], 3)
+        self.assertEqual(hist["buckets"][float("inf")], 4)
+        self.assertEqual(iq.latency.suggest_timeout(20.0), 5.0)  # p99 baixo -> piso
+        self.assertEqual(iq.latency.suggest_timeout(3.0), 5.0)
+
+    def test_dead_connection_triggers_reconnect(self):
+        async def scenario():
+            state = {"answer": True}
+
+            async def handler(ws):
+                async for raw in ws:
+                    msg = json.loads(raw)
+                    if state["answer"]:
+                        await ws.send(json.dumps({"name": "balances", "request_id": msg["request_id"], "msg": []}))
+
+            async with websockets.serve(handler, "127.0.0.1", 0) as server:
+                port = list(server.sockets)[0].getsockname()[1]
+                iq = IQOption("dummy", "dummy")
+                iq.latency.probe_name = "internal-billing.get-balances" # sonda por requisição (mede RTT)
+                iq.ws.url = f"ws://127.0.0.1:{port}"
+                iq.ws.backoff = 0.01
+                await iq.ws.connect()
+
+                self.assertIsNotNone(await iq.latency.probe())
+                self.assertEqual(iq.latency.count, 1)
+
+                # Servidor para de responder (half-open do ponto de vista da aplicação)
+                state["answer"] = False
+                iq.latency.interval = 0.01
+                iq.latency.deadline = 0.05
+                reconnected = asyncio.Event()
+                iq.ws.on_reconnect = reconnected.set
+                iq.latency.start()
+                await asyncio.wait_for(reconnected.wait(), timeout=2.0)
+
+                iq.latency.stop()
+                await asyncio.sleep(0)
+                self.assertEqual(iq.latency.dead_count, 1)
+                self.assertEqual(iq.ws.reconnect_count, 1)
+                self.assertEqual(iq.dispatcher._futures, {})
+                await iq.ws.close()
+
+        asyncio.run(scenario())
+
+    def test_default_probe_waits_for_time_sync(self):
+        async def scenario():
+            state = {"push": True}
+
+            async def handler(ws):
+                async def push():
+                    while state["push"]:
+                        await ws.send(json.dumps({"name": "timeSync", "msg": 1700000000000}))
+                        await asyncio.sleep(0.01)
+                task = asyncio.create_task(push())
+                await ws.wait_closed()
+                task.cancel()
+
+            async with websockets.serve(handler, "127.0.0.1", 0) as server:
+                port = list(server.sockets)[0].getsockname()[1]
+                iq = IQOption("dummy", "dummy")
+                iq.ws.url = f"ws://127.0.0.1:{port}"
+                iq.ws.backoff = 0.01
+                sent = []
+                await iq.ws.connect()
+                real_send = iq.ws.send
+                async def spy_send(data):
+                    sent.append(data)
+                    await real_send(data)
+                iq.ws.send = spy_send
+
+                self.assertIsNotNone(await iq.latency.probe())
+                self.assertEqual(sent, []) # nenhuma requisição ao servidor
+                self.assertEqual(iq.latency.count, 0)
+
+                state["push"] = False
+                iq.latency.interval = 0.01
+                iq.latency.deadline = 0.05
+                reconnected = asyncio.Event()
+                iq.ws.on_reconnect = reconnected.set
+                iq.latency.start()
+                await asyncio.wait_for(reconnected.wait(), timeout=2.0)
+                iq.latency.stop()
+                self.assertEqual(iq.latency.dead_count, 1)
+                self.assertEqual(iq.dispatcher._listeners.get("timeSync", []), []) # listener da sonda removido
+                await iq.ws.close()
+
+        asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    unittest.main()
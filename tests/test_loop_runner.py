@@ -0,0 +1,25 @@
+import sys
+import os
+import asyncio
+import unittest
+# Adiciona o diretório raiz ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from myiq import run
+from myiq.core.loop import loop_name, UVLOOP_AVAILABLE
+
+
+async def _which_loop():
+    await asyncio.sleep(0)
+    return loop_name()
+
+
+class TestLoopRunner(unittest.TestCase):
+    def test_run_selects_loop(self):
+        self.assertEqual(run(_which_loop(), use_uvloop=False), "asyncio")
+        # Sem uvloop instalado, cai no loop padrão
+        self.assertEqual(run(_which_loop()), "uvloop" if UVLOOP_AVAILABLE else "asyncio")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import sys
+import os
+import asyncio
+import unittest
+import structlog
+from websockets.exceptions import ConnectionClosedOK
+# Adiciona o diretório raiz ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from myiq import IQOption
+from myiq.core.metrics import MetricsRegistry
+from myiq.core.connection import WSConnection
+from myiq.core.dispatcher import Dispatcher
+from myiq.testing import FakeIQServer
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    def test_counter_gauge_histogram(self):
+        reg = MetricsRegistry()
+        frames = reg.counter("frames_total", "frames")
+        frames.inc()
+        frames.inc(2)
+        self.assertEqual(frames.value, 3)
+        self.assertIs(reg.counter("frames_total"), frames)
+        with self.assertRaises(ValueError):
+            reg.gauge("frames_total")
+
+        pending = {"a": 1, "b": 2}
+        reg.gauge("pending").set_function(lambda: len(pending))
+        self.assertEqual(reg.get("pending").value, 2)
+
+        rtt = reg.histogram("rtt_seconds", "rtt", ("operation",), buckets=(0.01, 0.1, 1.0))
+        for v in (0.005, 0.05, 0.05, 0.5):
+            rtt.labels("get-candles").observe(v)
+        child = rtt.labels("get-candles")
+        self.assertEqual(child.count, 4)
+        self.assertEqual(child.cumulative(), [1, 3, 4, 4])
+        self.assertAlmostEqual(child.quantile(0.5), 0.055)
+        with self.assertRaises(ValueError):
+            rtt.labels("a", "b")
+
+        sample = reg.snapshot()["myiq_rtt_seconds"]["samples"][0]
+        self.assertEqual(sample["labels"], {"operation": "get-candles"})
+        self.assertEqual(sample["buckets"]["+Inf"], 4)
+
+    def test_prometheus_text_and_endpoint(self):
+        reg = MetricsRegistry()
+        reg.counter("frames_total", "frames").inc(5)
+        reg.histogram("rtt_seconds", "rtt", ("operation",), buckets=(0.1,)).labels('say "hi"').observe(0.05)
+        text = reg.render()
+        self.assertIn("# TYPE myiq_frames_total counter\nmyiq_frames_total 5\n", text)
+        self.assertIn('myiq_rtt_seconds_bucket{operation="say \\"hi\\"",le="0.1"} 1', text)
+        self.assertIn('myiq_rtt_seconds_bucket{operation="say \\"hi\\"",le="+Inf"} 1', text)
+        self.assertIn('myiq_rtt_seconds_count{operation="say \\"hi\\""} 1', text)
+
+        async def scrape():
+            server = await reg.serve(port=0)
+            port = server.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"GET /metrics HTTP/1.1\r\nHost: x\r\n\r\n")
+            response = await reader.read()
+            writer.close()
+            await reg.stop()
+            return response.decode()
+
+        response = asyncio.run(scrape())
+        self.assertTrue(response.startswith("HTTP/1.1 200 OK"))
+        self.assertIn("myiq_frames_total 5", response)
+
+
+class TestClientMetrics(unittest.TestCase):
+    def setUp(self):
+        structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(40))
+
+    def tearDown(self):
+        structlog.reset_defaults()
+
+    def test_hot_paths_are_recorded(self):
+        async def scenario():
+            async with FakeIQServer(result_delay=60) as server:
+                iq = IQOption("a@b.c", "pw", ws_url=server.ws_url, http_url=server.http_url)
+                await iq.start()
+                try:
+                    await iq.get_balances()
+                    await iq.change_balance(1004)
+                    await iq.open_blitz(76, "call", 1.0)
+                    return iq.metrics.snapshot()
+                finally:
+                    await iq.close()
+
+        snap = asyncio.run(scenario())
+        value = lambda name: snap[name]["samples"][0]
+        self.assertGreater(value("myiq_ws_frames_received_total")["value"], 0)
+        self.assertGreater(value("myiq_ws_bytes_received_total")["value"], 0)
+        self.assertGreater(value("myiq_ws_decode_seconds")["count"], 0)
+        self.assertEqual(value("myiq_order_ack_seconds")["count"], 1)
+        self.assertEqual(value("myiq_pending_futures")["value"], 0)
+        rtt_ops = {s["labels"]["operation"] for s in snap["myiq_request_rtt_seconds"]["samples"]}
+        self.assertIn("internal-billing.get-balances", rtt_ops)
+        events = {s["labels"]["event"] for s in snap["myiq_dispatch_seconds"]["samples"]}
+        self.assertTrue({"authenticated", "timeSync", "option"} <= events)
+        self.assertIn("myiq_listener_seconds", snap)
+        self.assertEqual(value("myiq_ws_reconnects_total")["value"], 0)
+
+    def test_bytes_counted_from_raw_frames(self):
+        class FakeSocket:
+            def __init__(self, frames):
+                self.frames = list(frames)
+
+            async def recv(self, decode=None):
+                assert decode is False # sem decodificar/recodificar o payload
+                if not self.frames:
+                    raise ConnectionClosedOK(None, None)
+                return self.frames.pop(0)
+
+        frames = ['{"name":"a","msg":"cotação"}'.encode("utf-8"), b'{"name":"b","msg":"x"}', b'\xff']
+        reg = MetricsRegistry()
+        conn = WSConnection(Dispatcher(), metrics=reg)
+        conn.ws = FakeSocket(frames)
+        asyncio.run(conn._loop())
+        self.assertEqual(reg.get("ws_frames_received_total").value, 2)
+        self.assertEqual(reg.get("ws_bytes_received_total").value, len(frames[0]) + len(frames[1]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,237 @@
+import sys
+import os
+import json
+import asyncio
+import unittest
+# Adiciona o diretório raiz ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from myiq import IQOption
+from myiq.core.constants import EV_POSITION_CHANGED
+
+
+def _position(order_id, result=None, status="open", pnl=0):
+    return {
+        "name": EV_POSITION_CHANGED,
+        "msg": {
+            "id": f"pos-{order_id}",
+            "external_id": order_id,
+            "status": status,
+            "pnl": pnl,
+            "raw_event": {"binary_options_option_changed1": {
+                "active_id": 76, "direction": "call", "result": result or "opened"
+            }}
+        }
+    }
+
+
+class TestOrderTracker(unittest.TestCase):
+    def test_same_asset_same_direction_orders_resolve_independently(self):
+        async def scenario():
+            iq = IQOption("dummy", "dummy")
+            iq.active_balance_id = 1
+            next_id = iter([101, 102])
+
+            async def fake_send(data):
+                if data["msg"]["name"] == "binary-options.open-option":
+                    order_id = next(next_id)
+                    loop = asyncio.get_running_loop()
+                    # 'opened' chega ANTES do ACK (corrida real do servidor)
+                    loop.call_soon(iq.dispatcher.dispatch, _position(order_id))
+                    loop.call_soon(iq.dispatcher.dispatch, {
+                        "name": "option", "request_id": data["request_id"], "status": 2000, "msg": {"id": order_id}
+                    })
+            iq.ws.send = fake_send
+
+            t1 = asyncio.create_task(iq.buy_blitz(76, "call", 1.0, 30))
+            t2 = asyncio.create_task(iq.buy_blitz(76, "call", 1.0, 30))
+            while len(iq.orders) < 2:
+                await asyncio.sleep(0)
+
+            self.assertTrue(iq.orders.get(101).opened.done())
+            iq.dispatcher.dispatch(_position(102, "win", "closed", pnl=0.86))
+            iq.dispatcher.dispatch(_position(101, "loose", "closed", pnl=-1.0))
+
+            r1, r2 = await asyncio.gather(t1, t2)
+            self.assertEqual((r1["order_id"], r1["result"], r1["pnl"]), (101, "loose", -1.0))
+            self.assertEqual((r2["order_id"], r2["result"], r2["pnl"]), (102, "win", 0.86))
+            self.assertEqual(len(iq.orders), 0)
+            # Apenas um listener de position-changed, independente do número de ordens
+            self.assertEqual(len(iq.dispatcher._listeners[EV_POSITION_CHANGED]), 1)
+
+        asyncio.run(scenario())
+
+    def test_open_blitz_returns_handle_and_session_results(self):
+        async def scenario():
+            iq = IQOption("dummy", "dummy")
+            iq.active_balance_id = 1
+
+            async def fake_send(data):
+                if data["msg"]["name"] == "binary-options.open-option":
+                    asyncio.get_running_loop().call_soon(iq.dispatcher.dispatch, {
+                        "name": "option", "request_id": data["request_id"], "status": 2000, "msg": {"id": 7}
+                    })
+            iq.ws.send = fake_send
+
+            results = iq.trade_results()
+            first_result = asyncio.ensure_future(results.__anext__())
+            await asyncio.sleep(0)
+
+            handle = await iq.open_blitz(76, "PUT", 2.0, 30)
+            self.assertEqual((handle.order_id, handle.direction, handle.amount), (7, "put", 2.0))
+            self.assertFalse(handle.done())
+
+            iq.dispatcher.dispatch(_position(7))
+            self.assertEqual((await handle.opened)["external_id"], 7)
+            iq.dispatcher.dispatch(_position(7, "win", "closed", pnl=1.7))
+
+            self.assertEqual(await handle.pnl, 1.7)
+            self.assertEqual((await handle.result)["result"], "win")
+            self.assertEqual((await first_result)["order_id"], 7)
+            await results.aclose()
+
+        asyncio.run(scenario())
+
+    def test_results_subscribed_before_first_iteration(self):
+        async def scenario():
+            iq = IQOption("dummy", "dummy")
+            results = iq.trade_results()
+            # Ordem fecha antes do primeiro __anext__
+            iq.orders.track(5, active_id=76, direction="call", amount=1.0)
+            iq.dispatcher.dispatch(_position(5, "win", "closed", pnl=0.9))
+            self.assertEqual((await results.__anext__())["order_id"], 5)
+            await results.aclose()
+            self.assertEqual(len(iq.orders._subscribers), 0)
+            with self.assertRaises(StopAsyncIteration):
+                await results.__anext__()
+
+        asyncio.run(scenario())
+
+    def test_open_blitz_send_failure_releases_future_and_trace(self):
+        async def scenario():
+            iq = IQOption("dummy", "dummy")
+            iq.active_balance_id = 1
+            iq.enable_tracing(None, sample_rate=1.0)
+
+            async def fake_send(data):
+                raise ConnectionError("socket closed")
+            iq.ws.send = fake_send
+
+            with self.assertRaises(ConnectionError):
+                await iq.open_blitz(76, "call", 1.0, 30)
+            self.assertEqual(len(iq.dispatcher._futures), 0)
+            self.assertEqual(len(iq.tracer._pending), 0)
+            self.assertEqual(iq.tracer.recent[-1]["status"], "error")
+
+        asyncio.run(scenario())
+
+    def test_backlog_replay_keyed_by_position_id(self):
+        async def scenario():
+            iq = IQOption("dummy", "dummy")
+            # Evento chega antes do track, indexado pelo 'id' da posição (external_id diferente)
+            iq.dispatcher.dispatch({"name": EV_POSITION_CHANGED, "msg": {
+                "id": 555, "external_id": 999, "status": "closed", "pnl": 0.5,
+                "raw_event": {"binary_options_option_changed1": {"active_id": 76, "result": "win"}}
+            }})
+            handle = iq.orders.track(555, active_id=76, direction="call", amount=1.0)
+            self.assertTrue(handle.opened.done())
+            self.assertEqual((await asyncio.wait_for(handle.result, 1))["result"], "win")
+            # Fechamento gravado no registro da ordem, não numa chave paralela
+            self.assertEqual(iq.positions.open_exposure(), {})
+            self.assertEqual(iq.positions.get(555)["status"], "closed")
+            self.assertEqual(len(iq.positions.closed_positions()), 1)
+
+        asyncio.run(scenario())
+
+    def test_close_without_external_id_resolves_same_record(self):
+        async def scenario():
+            iq = IQOption("dummy", "dummy")
+            handle = iq.orders.track(7, active_id=76, direction="call", amount=2.0)
+            iq.dispatcher.dispatch(_position(7))
+            self.assertEqual(iq.positions.open_exposure(), {76: 2.0})
+
+            # Fechamento só com o 'id' da posição
+            iq.dispatcher.dispatch({"name": EV_POSITION_CHANGED, "msg": {
+                "id": "pos-7", "status": "closed", "pnl": 1.7,
+                "raw_event": {"binary_options_option_changed1": {"active_id": 76, "result": "win"}}
+            }})
+            self.assertEqual((await asyncio.wait_for(handle.result, 1))["pnl"], 1.7)
+            self.assertEqual(iq.positions.open_exposure(), {})
+            self.assertEqual(iq.positions.get(7)["status"], "closed")
+            self.assertEqual(iq.positions.get("pos-7")["order_id"], 7)
+            self.assertEqual(len(iq.positions.closed_positions()), 1)
+
+        asyncio.run(scenario())
+
+    def test_expire_removes_order_from_open_exposure(self):
+        async def scenario():
+            iq = IQOption("dummy", "dummy")
+            handle = iq.orders.track(41, active_id=76, direction="call", amount=2.0)
+            iq.orders.track(42, active_id=76, direction="put", amount=1.0)
+            iq.orders.expire(41)
+            self.assertEqual((await handle.result)["result"], "timeout")
+            self.assertEqual(iq.positions.open_exposure(), {76: 1.0})
+            self.assertEqual(iq.positions.get(41)["status"], "expired")
+
+            # Resultado atrasado ainda atualiza o registro
+            iq.dispatcher.dispatch(_position(41, "win", "closed", pnl=1.7))
+            self.assertEqual((iq.positions.get(41)["status"], iq.positions.get(41)["pnl"]), ("closed", 1.7))
+            self.assertEqual(iq.positions.open_exposure(), {76: 1.0})
+
+        asyncio.run(scenario())
+
+    def test_place_orders_batch(self):
+        async def scenario():
+            iq = IQOption("dummy", "dummy")
+            iq.active_balance_id = 1
+            sent = []
+            ids = iter([1, 2, 3])
+
+            async def fake_send_raw(text):
+                data = json.loads(text)
+                sent.append(data["msg"]["name"])
+                order_id = next(ids)
+                status = 4100 if order_id == 2 else 2000
+                asyncio.get_running_loop().call_soon(iq.dispatcher.dispatch, {
+                    "name": "option", "request_id": data["request_id"], "status": status,
+                    "msg": {"id": order_id, "message": "active is suspended"}
+                })
+
+            iq.ws.send_raw = fake_send_raw
+
+            res = await iq.place_orders([
+                {"active_id": 76, "direction": "call", "amount": 1.0},
+                {"active_id": 77, "direction": "put", "amount": 1.0},
+                {"active_id": 78, "direction": "call", "amount": 1.0, "duration": 60},
+            ])
+            self.assertEqual(res[0].order_id, 1)
+            self.assertIsInstance(res[1], RuntimeError)
+            self.assertEqual((res[2].order_id, res[2].duration), (3, 60))
+            # 3 frames em rajada, sem inscrição de posições por ordem
+            self.assertEqual(sent, ["binary-options.open-option"] * 3)
+            self.assertEqual(sorted(iq.positions.open_exposure().items()), [(76, 1.0), (78, 1.0)])
+
+        asyncio.run(scenario())
+
+    def test_place_orders_send_failure_releases_unsent_futures(self):
+        async def scenario():
+            iq = IQOption("dummy", "dummy")
+            iq.active_balance_id = 1
+            sent = []
+
+            async def fake_send_raw(text):
+                if sent:
+                    raise ConnectionError("socket closed")
+                sent.append(json.loads(text)["request_id"])
+            iq.ws.send_raw = fake_send_raw
+
+            with self.assertRaises(ConnectionError):
+                await iq.place_orders([{"active_id": 76, "direction": "call", "amount": 1.0}] * 3)
+            # Só o future da ordem que saiu continua aguardando o ACK
+            self.assertEqual(list(iq.dispatcher._futures), sent)
+
+        asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    unittest.main()
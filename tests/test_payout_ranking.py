@@ -0,0 +1,90 @@
+import sys
+import os
+import unittest
+# Adiciona o diretório raiz ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from myiq import IQOption
+from myiq.core.constants import EV_BEST_ACTIVE_CHANGED
+
+
+def _active(a_id, commission, suspended=False, enabled=True):
+    return {
+        "id": a_id,
+        "name": f"front.A{a_id}",
+        "enabled": enabled,
+        "is_suspended": suspended,
+        "option": {"profit": {"commission": commission}},
+    }
+
+
+def _listed(a_id, suspended=False):
+    # Item de underlying-list-changed (lista completa do tipo, sem payout no item)
+    return {"active_id": a_id, "enabled": True, "is_suspended": suspended}
+
+
+class TestPayoutRanking(unittest.TestCase):
+    def setUp(self):
+        self.iq = IQOption("dummy", "dummy")
+        self.events = []
+        self.iq.dispatcher.add_listener(EV_BEST_ACTIVE_CHANGED, self.events.append)
+        self.iq._on_initialization_data({
+            "name": "initialization-data",
+            "msg": {
+                "blitz": {
+                    "actives": {
+                        "1": _active(1, 14),          # 86%
+                        "2": _active(2, 8),           # 92%
+                        "3": _active(3, 5, True),     # 95% mas suspenso
+                        "4": _active(4, 20),          # 80%
+                    }
+                }
+            }
+        })
+
+    def test_best_actives_order_and_filters(self):
+        best = self.iq.best_actives("blitz", 3)
+        self.assertEqual([b["active_id"] for b in best], [2, 1, 4])
+        self.assertEqual(best[0]["profit_percent"], 92)
+
+        best = self.iq.best_actives("blitz-option", 5, min_payout=85, exclude={2})
+        self.assertEqual([b["active_id"] for b in best], [1])
+
+    def test_top_change_event(self):
+        self.assertEqual(len(self.events), 1)
+        self.assertEqual(self.events[0]["msg"]["new"]["active_id"], 2)
+
+        # Reabertura do ativo 3 (95%) via underlying-list-changed sem payout no item
+        self.iq._on_underlying_list_changed({
+            "name": "underlying-list-changed",
+            "msg": {
+                "name": "blitz-option-instruments.underlying-list-changed",
+                "underlying": [_listed(1), _listed(2), _listed(3), _listed(4)]
+            }
+        })
+        self.assertEqual(len(self.events), 2)
+        self.assertEqual(self.events[1]["msg"]["old"]["active_id"], 2)
+        self.assertEqual(self.events[1]["msg"]["new"]["active_id"], 3)
+        self.assertEqual(self.events[1]["msg"]["new"]["profit_percent"], 95)
+
+        # Mudança fora do topo não gera evento
+        self.iq._on_underlying_list_changed({
+            "name": "underlying-list-changed",
+            "msg": {
+                "name": "blitz-option-instruments.underlying-list-changed",
+                "underlying": [_listed(1), _listed(2), _listed(3), _listed(4, suspended=True)]
+            }
+        })
+        self.assertEqual(len(self.events), 2)
+        self.assertNotIn(4, [b["active_id"] for b in self.iq.best_actives("blitz", 10)])
+
+    def test_clear_and_refill_reports_top_again(self):
+        self.iq.ranking.clear()
+        self.assertIsNone(self.iq.ranking.top("blitz"))
+        self.iq._on_initialization_data({"msg": {"blitz": {"actives": {"2": _active(2, 8)}}}})
+        self.assertEqual(len(self.events), 2)
+        self.assertEqual(self.events[1]["msg"]["new"]["active_id"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import sys
+import os
+import unittest
+# Adiciona o diretório raiz ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from myiq.core.positions import PositionsStore
+
+
+def _raw(order_id, active_id=76, amount=1.0, result="opened", status="open", pnl=0):
+    return {
+        "id": f"pos-{order_id}",
+        "external_id": order_id,
+        "status": status,
+        "pnl": pnl,
+        "raw_event": {"binary_options_option_changed1": {
+            "active_id": active_id, "direction": "call", "amount": amount, "result": result
+        }}
+    }
+
+
+class TestPositionsStore(unittest.TestCase):
+    def test_open_close_exposure_and_pnl(self):
+        store = PositionsStore()
+        store.register(1, active_id=76, direction="call", amount=2.0)
+        # Posição aberta fora desta sessão (ex: pela plataforma web)
+        store.apply(_raw(2, active_id=76, amount=1.0))
+        store.apply(_raw(3, active_id=77, amount=5.0))
+        self.assertEqual(store.open_exposure(), {76: 3.0, 77: 5.0})
+        self.assertEqual(len(store.open_positions(76)), 2)
+
+        store.apply(_raw(1, amount=2.0, result="win", status="closed", pnl=1.7))
+        store.apply(_raw(3, active_id=77, amount=5.0, result="loose", status="closed", pnl=-5.0))
+        self.assertEqual(store.open_exposure(), {76: 1.0})
+        self.assertEqual(store.get(1)["result"], "win")
+        self.assertEqual([p["order_id"] for p in store.closed_positions()], [1, 3])
+        self.assertAlmostEqual(store.total_pnl(), -3.3)
+
+    def test_event_before_register_and_bounded_history(self):
+        store = PositionsStore(max_closed=2)
+        raw = _raw(10)
+        del raw["raw_event"]["binary_options_option_changed1"]["amount"]
+        store.apply(raw)
+        store.register(10, active_id=76, direction="call", amount=3.0)
+        self.assertEqual(store.open_exposure(), {76: 3.0})
+
+        for order_id in (10, 11, 12):
+            store.apply(_raw(order_id, result="equal", status="closed"))
+        self.assertEqual([p["order_id"] for p in store.closed_positions()], [11, 12])
+        self.assertEqual(store.closed_positions(limit=1)[0]["order_id"], 12)
+
+
+if __name__ == "__main__":
+    unittest.main()
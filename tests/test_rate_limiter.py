@@ -0,0 +1,66 @@
+import sys
+import os
+import asyncio
+import unittest
+# Adiciona o diretório raiz ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from myiq.core.ratelimit import RateLimiter
+from myiq.core.constants import OP_GET_CANDLES, OP_OPEN_OPTION
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestRateLimiter(unittest.TestCase):
+    def test_trading_reserve_survives_backfill(self):
+        clock = FakeClock()
+        limiter = RateLimiter(quotas={OP_GET_CANDLES: (100.0, 100.0), OP_OPEN_OPTION: (10.0, 5.0)},
+                              global_quota=(10.0, 20.0), reserve=5.0, clock=clock)
+        # Backfill drena o bucket global até o limite da reserva
+        taken = 0
+        while limiter.try_acquire(OP_GET_CANDLES):
+            taken += 1
+        self.assertEqual(taken, 15)
+        # Ordens ainda usam a reserva sem esperar
+        self.assertTrue(all(limiter.try_acquire(OP_OPEN_OPTION) for _ in range(5)))
+        self.assertFalse(limiter.try_acquire(OP_OPEN_OPTION))
+        clock.now += 0.1
+        self.assertTrue(limiter.try_acquire(OP_OPEN_OPTION))
+
+    def test_aimd_backoff_and_recovery(self):
+        clock = FakeClock()
+        limiter = RateLimiter(quotas={OP_GET_CANDLES: (4.0, 4.0), OP_OPEN_OPTION: (10.0, 10.0)}, cooldown=1.0, clock=clock)
+        limiter.record(OP_GET_CANDLES, False)
+        limiter.record(OP_GET_CANDLES, False) # mesma rajada de erros: ignorado (cooldown)
+        self.assertEqual(limiter.stats()[OP_GET_CANDLES]["rate"], 2.0)
+        clock.now += 1.0
+        limiter.record(OP_GET_CANDLES, False)
+        self.assertEqual(limiter.stats()[OP_GET_CANDLES]["rate"], 1.0)
+        for _ in range(100):
+            limiter.record(OP_GET_CANDLES, True)
+        self.assertEqual(limiter.stats()[OP_GET_CANDLES]["factor"], 1.0)
+        # Trading nunca é desacelerado
+        limiter.record(OP_OPEN_OPTION, False)
+        self.assertEqual(limiter.stats()[OP_OPEN_OPTION]["factor"], 1.0)
+
+    def test_acquire_waits_for_refill(self):
+        async def scenario():
+            limiter = RateLimiter(quotas={OP_GET_CANDLES: (50.0, 1.0)}, reserve=0)
+            loop = asyncio.get_running_loop()
+            t0 = loop.time()
+            for _ in range(3):
+                await limiter.acquire(OP_GET_CANDLES)
+            self.assertGreaterEqual(loop.time() - t0, 0.035)
+            self.assertGreaterEqual(limiter.stats()[OP_GET_CANDLES]["throttled"], 2)
+
+        asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    unittest.main()
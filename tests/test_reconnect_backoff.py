@@ -0,0 +1,49 @@
+import sys
+import os
+import asyncio
+import unittest
+# Adiciona o diretório raiz ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import websockets
+from myiq.core.dispatcher import Dispatcher
+from myiq.core.reconnect import ReconnectingWS
+
+
+class TestReconnectBackoff(unittest.TestCase):
+    def test_backoff_is_capped_and_jittered(self):
+        rws = ReconnectingWS(Dispatcher(), "ws://unused", backoff=1.0, max_backoff=8.0)
+        delays = [rws._backoff_delay(attempt) for attempt in range(1, 20) for _ in range(20)]
+        self.assertTrue(all(0 <= d <= 8.0 for d in delays))
+        self.assertGreater(len(set(delays)), 1)
+
+    def test_drop_is_detected_without_polling(self):
+        async def scenario():
+            server_conns = []
+
+            async def handler(ws):
+                server_conns.append(ws)
+                await ws.wait_closed()
+
+            async with websockets.serve(handler, "127.0.0.1", 0) as server:
+                port = list(server.sockets)[0].getsockname()[1]
+                reconnected = asyncio.Event()
+                rws = ReconnectingWS(Dispatcher(), f"ws://127.0.0.1:{port}", backoff=0.01)
+                rws.on_reconnect = reconnected.set
+                await rws.connect()
+
+                # Servidor derruba a conexão
+                await server_conns[0].close()
+                await asyncio.wait_for(reconnected.wait(), timeout=2.0)
+
+                stats = rws.stats()
+                self.assertEqual(stats["reconnect_count"], 1)
+                self.assertTrue(stats["connected"])
+                self.assertLess(stats["total_downtime"], 0.9) # antes: até 1s só para perceber a queda
+                await rws.close()
+
+        asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import sys
+import os
+import asyncio
+import unittest
+# Adiciona o diretório raiz ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from myiq import IQOption
+from myiq.core.clock import ServerClock
+
+
+class FakeTime:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestServerClock(unittest.TestCase):
+    def test_tracks_drift_and_ignores_wall_clock_jumps(self):
+        mono, wall = FakeTime(100.0), FakeTime(1_700_000_000.0)
+        clock = ServerClock(monotonic=mono, wall=wall)
+        self.assertAlmostEqual(clock.now(), wall.now) # sem sincronização: relógio local
+        # Servidor 2.5 s à frente e adiantando 1 ms a cada segundo (1000 ppm)
+        for i in range(200):
+            mono.now = 100.0 + i
+            clock.update(1_700_000_002_500.0 + i * 1001.0)
+        mono.now = 100.0 + 210
+        expected = 1_700_000_002_500.0 + 210 * 1001.0
+        self.assertLess(abs(clock.now_ms() - expected), 2.0)
+        self.assertAlmostEqual(clock.drift, 0.001, places=4)
+
+        wall.now += 3600 # salto de NTP no relógio de parede
+        self.assertLess(abs(clock.now_ms() - expected), 2.0)
+
+        clock.update(expected + 60_000) # relógio do servidor "pulou": reinicia o modelo
+        self.assertEqual(clock.drift, 0.0)
+        self.assertAlmostEqual(clock.now_ms(), expected + 60_000)
+
+    def test_schedule_at_server_time(self):
+        async def scenario():
+            iq = IQOption("dummy", "dummy")
+            iq._on_ws_message({"name": "timeSync", "msg": 1_700_000_000_000})
+            self.assertEqual(iq.get_server_timestamp(), 1_700_000_000)
+            self.assertIsInstance(iq.server_time_offset, float)
+
+            fired = []
+            target = iq.clock.now() + 0.05
+            iq.schedule_at(target, fired.append, "a")
+            cancelled = iq.schedule_at(target, fired.append, "b")
+            cancelled.cancel()
+            await iq.clock.sleep_until(target + 0.01)
+            self.assertEqual(fired, ["a"])
+            self.assertGreaterEqual(iq.clock.now(), target)
+
+        asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    unittest.main()
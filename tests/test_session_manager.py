@@ -0,0 +1,67 @@
+import sys
+import os
+import asyncio
+import unittest
+# Adiciona o diretório raiz ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from myiq import SessionManager
+from myiq.core.constants import EV_PAYOUT_CHANGED
+
+
+def _offline(client, sent):
+    async def get_ssid(force_login=False):
+        return "ssid"
+    async def noop(*args, **kwargs):
+        return True
+    async def fake_send(data):
+        sent.append(data["msg"]["name"])
+    client.auth.get_ssid = get_ssid
+    client.ws.connect = noop
+    client._authenticate_or_login = noop
+    client.ws.send = fake_send
+
+
+class TestSessionManager(unittest.TestCase):
+    def test_accounts_share_market_feed(self):
+        async def scenario():
+            session = SessionManager("md", "md")
+            acc = session.add_account("a@x.com", "pw")
+            session.add_account("b@x.com", "pw", name="b")
+            self.assertEqual(len(session), 2)
+            with self.assertRaises(ValueError):
+                session.add_account("a@x.com", "pw")
+
+            md_sent, acc_sent = [], []
+            _offline(session.market, md_sent)
+            _offline(acc, acc_sent)
+            _offline(session["b"], [])
+            await session.start()
+
+            # Conta de trading: sem initialization-data nem lista de ativos
+            self.assertIn("get-initialization-data", md_sent)
+            self.assertNotIn("get-initialization-data", acc_sent)
+            underlying = lambda sent: [n for n in sent if n.endswith("-instruments.underlying-list-changed")]
+            self.assertEqual(len(underlying(md_sent)), 4)
+            self.assertEqual(underlying(acc_sent), [])
+            self.assertIn("portfolio.position-changed", acc_sent)
+
+            # Cache e ranking do feed de mercado visíveis pela conta
+            session.market.actives_cache["blitz"]["76"] = {"id": 76, "option": {"profit": {"commission": 12}}}
+            self.assertEqual(acc.get_profit_percent(76), 88)
+            self.assertIs(acc.ranking, session.market.ranking)
+
+            # Eventos locais de mercado chegam ao dispatcher da conta
+            got = []
+            acc.dispatcher.add_listener(EV_PAYOUT_CHANGED, got.append)
+            session.market._emit_event(EV_PAYOUT_CHANGED, {"active_id": 76, "old": 85, "new": 88})
+            self.assertEqual(got[0]["msg"]["new"], 88)
+
+            for client in [session.market, *session]:
+                client.latency.stop()
+
+        asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+import sys
+import os
+import asyncio
+import unittest
+import multiprocessing
+# Adiciona o diretório raiz ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from myiq import IQOption
+from myiq.core.constants import EV_CANDLE_GENERATED
+from myiq.core.shm import CandleRingWriter, CandleRingReader, OrderChannel, SharedMarketData
+
+PREFIX = f"myiqtest{os.getpid()}"
+
+
+def _candle(candle_id, start, close):
+    return {"id": candle_id, "from": start, "to": start + 60, "open": 1.0, "close": close, "min": 0.9, "max": 1.2, "volume": 0}
+
+
+def _reader_process(out):
+    reader = CandleRingReader(76, 60, prefix=PREFIX)
+    out.put([(c["id"], c["close"], c["sequence"]) for c in reader.last(10)])
+    reader.close()
+
+
+class TestSharedMemoryRing(unittest.TestCase):
+    def test_ring_writes_and_cross_process_read(self):
+        writer = CandleRingWriter(76, 60, capacity=3, prefix=PREFIX)
+        try:
+            reader = CandleRingReader(76, 60, prefix=PREFIX)
+            self.assertIsNone(reader.latest())
+            writer.write(_candle(1, 0, 1.0))
+            seq = reader.seq
+            writer.write(_candle(1, 0, 1.1)) # tick do candle em formação: mesmo slot
+            self.assertTrue(reader.wait_for_update(seq, timeout=0.1))
+            self.assertEqual((reader.count, reader.latest()["close"]), (1, 1.1))
+
+            for i in range(2, 6):
+                writer.write(_candle(i, i * 60, float(i)))
+            writer.write(_candle(99, 60, 9.9)) # candle antigo: ignorado
+            self.assertEqual([c["id"] for c in reader.last(10)], [3.0, 4.0, 5.0]) # capacidade 3
+            self.assertEqual(reader.buffer.readonly, True)
+            with self.assertRaises(TypeError):
+                reader.buffer[0] = 1.0
+            reader.close()
+
+            ctx = multiprocessing.get_context("fork")
+            out = ctx.Queue()
+            proc = ctx.Process(target=_reader_process, args=(out,))
+            proc.start()
+            self.assertEqual(out.get(timeout=5), [(3.0, 3.0, 3), (4.0, 4.0, 4), (5.0, 5.0, 5)])
+            proc.join(5)
+        finally:
+            writer.close()
+
+    def test_two_timeframes_of_same_active_stay_separate(self):
+        async def scenario():
+            iq = IQOption("dummy", "dummy")
+            async def fake_send(data):
+                pass
+            iq.ws.send = fake_send
+            market = SharedMarketData(iq, capacity=4, prefix=PREFIX)
+            try:
+                await market.add_stream(76, 60)
+                await market.add_stream(76, 300)
+                for size, close in ((60, 1.1), (300, 3.3), (60, 1.2)):
+                    iq.dispatcher.dispatch({"name": EV_CANDLE_GENERATED, "msg": dict(_candle(1, 0, close), active_id=76, size=size)})
+
+                for size, closes in ((60, [1.2]), (300, [3.3])):
+                    reader = CandleRingReader(76, size, prefix=PREFIX)
+                    self.assertEqual([c["close"] for c in reader.last(10)], closes)
+                    reader.close()
+            finally:
+                for tracker, *_ in iq._candle_streams.values():
+                    tracker.stop()
+                market.close()
+
+        asyncio.run(scenario())
+
+    def test_order_channel_round_trip(self):
+        class FakeHandle:
+            def __init__(self, order_id):
+                self.order_id = order_id
+                self.result = asyncio.get_running_loop().create_future()
+                if order_id == 501:
+                    self.result.set_exception(ConnectionError("socket closed"))
+                else:
+                    self.result.set_result({"result": "win", "pnl": 0.87, "order_id": order_id})
+
+        class FakeIQ:
+            async def open_blitz(self, active_id, direction, amount, duration=30):
+                if active_id == 0:
+                    raise RuntimeError("active is suspended")
+                return FakeHandle(500 + active_id)
+
+        async def scenario():
+            channel = OrderChannel()
+            endpoint = channel.endpoint("w1")
+            server = asyncio.create_task(channel.serve(FakeIQ()))
+            ok_id = endpoint.submit(76, "call", 1.0)
+            bad_id = endpoint.submit(0, "put", 1.0)
+            failed_id = endpoint.submit(1, "call", 1.0)
+            loop = asyncio.get_running_loop()
+            replies = [await loop.run_in_executor(None, endpoint.get_reply, 5) for _ in range(5)]
+            channel.stop()
+            await server
+
+            by_status = {(r["request_id"], r["status"]): r for r in replies}
+            self.assertEqual(by_status[(ok_id, "accepted")]["order_id"], 576)
+            self.assertEqual(by_status[(ok_id, "closed")]["result"]["pnl"], 0.87)
+            self.assertIn("suspended", by_status[(bad_id, "error")]["error"])
+            # Resultado que falha depois do ACK ainda gera a resposta final
+            self.assertEqual(by_status[(failed_id, "accepted")]["order_id"], 501)
+            self.assertIn("socket closed", by_status[(failed_id, "error")]["error"])
+
+        asyncio.run(scenario())
+
+    def test_cancelled_serve_releases_executor_thread(self):
+        async def scenario():
+            channel = OrderChannel()
+            server = asyncio.create_task(channel.serve(None, poll_interval=0.05))
+            await asyncio.sleep(0.1)
+            server.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await server
+
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(scenario())
+            t0 = loop.time()
+            # Sem stop(): o thread bloqueado no get() precisa sair sozinho
+            loop.run_until_complete(loop.shutdown_default_executor())
+            self.assertLess(loop.time() - t0, 1.0)
+        finally:
+            loop.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
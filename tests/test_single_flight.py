@@ -0,0 +1,70 @@
+import sys
+import os
+import asyncio
+import unittest
+# Adiciona o diretório raiz ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from myiq import IQOption
+from myiq.core.singleflight import SingleFlight, request_key
+from myiq.core.constants import OP_GET_BALANCES, OP_OPEN_OPTION
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_identical_requests_share_one_round_trip(self):
+        async def scenario():
+            iq = IQOption("dummy", "dummy")
+            sent = []
+
+            async def fake_send(data):
+                sent.append(data)
+                asyncio.get_running_loop().call_later(0.01, iq.dispatcher.dispatch, {
+                    "name": "balances", "request_id": data["request_id"], "status": 0,
+                    "msg": [{"id": 1, "type": 4, "amount": 10.0, "currency": "USD"}]
+                })
+            iq.ws.send = fake_send
+
+            results = await asyncio.gather(*(iq.get_balances() for _ in range(5)))
+            self.assertEqual(len(sent), 1)
+            self.assertTrue(all(r[0].amount == 10.0 for r in results))
+            self.assertEqual(iq.single_flight.stats()["coalesced"], 4)
+
+            # Sem TTL configurado, a próxima chamada vai ao servidor
+            await iq.get_balances()
+            self.assertEqual(len(sent), 2)
+            iq.single_flight.ttls[OP_GET_BALANCES] = 60
+            await iq.get_balances()
+            await iq.get_balances()
+            self.assertEqual(len(sent), 3)
+            self.assertEqual(iq.single_flight.cache_hits, 1)
+
+        asyncio.run(scenario())
+
+    def test_cancelled_caller_and_never_coalesced_ops(self):
+        async def scenario():
+            flight = SingleFlight()
+            calls = []
+
+            async def slow():
+                calls.append(1)
+                await asyncio.sleep(0.01)
+                return "ok"
+
+            key = request_key("get-candles", "2.0", {"b": 1, "a": 2})
+            self.assertEqual(key, request_key("get-candles", "2.0", {"a": 2, "b": 1}))
+            first = asyncio.ensure_future(flight.do("get-candles", key, slow))
+            second = asyncio.ensure_future(flight.do("get-candles", key, slow))
+            await asyncio.sleep(0)
+            first.cancel()
+            self.assertEqual(await second, "ok")
+            self.assertEqual(len(calls), 1)
+
+            key = request_key(OP_OPEN_OPTION, "2.0", {})
+            await asyncio.gather(flight.do(OP_OPEN_OPTION, key, slow), flight.do(OP_OPEN_OPTION, key, slow))
+            self.assertEqual(len(calls), 3)
+
+        asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    unittest.main()
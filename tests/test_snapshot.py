@@ -0,0 +1,106 @@
+import sys
+import os
+import json
+import asyncio
+import tempfile
+import unittest
+# Adiciona o diretório raiz ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from myiq import IQOption
+from myiq.core.snapshot import build_snapshot, save_snapshot
+
+
+def _init_data(actives: dict) -> dict:
+    return {"name": "initialization-data", "msg": {"blitz": {"actives": actives}}}
+
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "snap.json")
+
+        iq = IQOption("dummy", "dummy")
+        iq._on_initialization_data(_init_data({
+            "1": {"id": 1, "name": "front.A", "enabled": True, "is_suspended": False,
+                  "option": {"profit": {"commission": 10}, "bet_close_time": 30}},
+            "2": {"id": 2, "name": "front.B", "enabled": True, "is_suspended": False,
+                  "option": {"profit": {"commission": 20}}},
+        }))
+        iq.features["blitz"] = "enabled"
+        save_snapshot(self.path, build_snapshot(iq))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_snapshot_is_compact(self):
+        with open(self.path) as f:
+            data = json.load(f)
+        self.assertEqual(data["actives"]["blitz"]["1"]["option"], {"profit": {"commission": 10}})
+        self.assertEqual(data["features"], {"blitz": "enabled"})
+
+    def test_warm_start_and_reconcile(self):
+        iq = IQOption("dummy", "dummy", snapshot_path=self.path)
+        self.assertTrue(iq.load_snapshot())
+        self.assertTrue(iq.is_stale)
+        self.assertEqual(iq.get_profit_percent(1), 90)
+        self.assertEqual(iq.best_actives("blitz", 1)[0]["active_id"], 1)
+
+        # Dado fresco: ativo 1 sumiu, ativo 2 continua
+        iq._on_initialization_data(_init_data({
+            "2": {"id": 2, "name": "front.B", "enabled": True, "is_suspended": False,
+                  "option": {"profit": {"commission": 12}}},
+        }))
+        self.assertFalse(iq.is_stale)
+        self.assertEqual(iq.check_active(1), {})
+        self.assertEqual([b["active_id"] for b in iq.best_actives("blitz", 5)], [2])
+
+    def test_option_categories_are_reconciled(self):
+        iq = IQOption("dummy", "dummy")
+        iq._on_underlying_list_changed({"msg": {
+            "name": "blitz-option-instruments.underlying-list-changed",
+            "underlying": [{"active_id": a, "enabled": True, "is_suspended": False, "profit_percent": 85} for a in (1, 2, 3)]
+        }})
+        save_snapshot(self.path, build_snapshot(iq))
+
+        iq = IQOption("dummy", "dummy", snapshot_path=self.path)
+        self.assertTrue(iq.load_snapshot())
+        self.assertIn("3", iq.actives_cache["blitz-option"])
+        # initialization-data ('blitz') não lista mais o ativo 3
+        iq._on_initialization_data(_init_data({
+            str(a): {"id": a, "enabled": True, "is_suspended": False, "option": {"profit": {"commission": 15}}} for a in (1, 2)
+        }))
+        self.assertEqual(sorted(iq.actives_cache["blitz-option"]), ["1", "2"])
+        self.assertEqual(iq._stale_actives, {})
+
+    def test_concurrent_saves_are_coalesced(self):
+        async def scenario():
+            iq = IQOption("dummy", "dummy", snapshot_path=self.path)
+            iq.features["x"] = "enabled"
+            for _ in range(5):
+                iq._schedule_snapshot_save()
+            task = iq._snapshot_task
+            iq.features["y"] = "enabled"
+            iq._schedule_snapshot_save() # durante a escrita: só marca para regravar
+            self.assertIs(iq._snapshot_task, task)
+            await task
+
+        asyncio.run(scenario())
+        with open(self.path) as f:
+            self.assertEqual(json.load(f)["features"], {"x": "enabled", "y": "enabled"})
+        self.assertEqual(os.listdir(self.tmp.name), ["snap.json"]) # nenhum .tmp sobrando
+
+    def test_non_object_snapshot_is_rejected(self):
+        with open(self.path, "w") as f:
+            json.dump([1, 2], f)
+        iq = IQOption("dummy", "dummy", snapshot_path=self.path)
+        self.assertFalse(iq.load_snapshot())
+
+    def test_missing_file(self):
+        iq = IQOption("dummy", "dummy", snapshot_path=os.path.join(self.tmp.name, "nope.json"))
+        self.assertFalse(iq.load_snapshot())
+        self.assertFalse(iq.is_stale)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import sys
+import os
+import time
+import json
+import asyncio
+import tempfile
+import unittest
+# Adiciona o diretório raiz ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from myiq import IQOption, IQAuth, AuthRejected
+
+
+class TestSsidCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "ssid.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_cache_roundtrip_and_expiry(self):
+        auth = IQAuth("a@b.com", "x", ssid_cache_path=self.path, ssid_max_age=60)
+        auth._store_ssid("abc")
+        self.assertEqual(auth.get_cached_ssid(), "abc")
+        self.assertEqual(oct(os.stat(self.path).st_mode & 0o777), "0o600")
+
+        # Outra conta não enxerga o SSID
+        self.assertIsNone(IQAuth("c@d.com", "x", ssid_cache_path=self.path).get_cached_ssid())
+
+        with open(self.path) as f:
+            data = json.load(f)
+        data["a@b.com"]["created_at"] = time.time() - 120
+        with open(self.path, "w") as f:
+            json.dump(data, f)
+        self.assertIsNone(auth.get_cached_ssid())
+
+    def test_rejected_cached_ssid_falls_back_to_login(self):
+        async def scenario():
+            iq = IQOption("a@b.com", "x", ssid_cache_path=self.path)
+            iq.auth._store_ssid("old")
+            logins = []
+
+            async def fake_login():
+                logins.append(1)
+                return "new"
+            iq.auth._login = fake_login
+
+            async def fake_send(data):
+                if data["name"] == "authenticate":
+                    ok = data["msg"]["ssid"] == "new"
+                    asyncio.get_running_loop().call_soon(iq.dispatcher.dispatch, {
+                        "name": "authenticated", "request_id": data["request_id"], "msg": ok
+                    })
+            iq.ws.send = fake_send
+
+            iq.ssid = await iq.auth.get_ssid()
+            self.assertEqual(iq.ssid, "old")
+            self.assertTrue(await iq._authenticate_or_login())
+            self.assertEqual(iq.ssid, "new")
+            self.assertEqual(len(logins), 1)
+            self.assertEqual(iq.auth.get_cached_ssid(), "new")
+
+        asyncio.run(scenario())
+
+    def test_transport_error_keeps_cached_ssid(self):
+        async def scenario():
+            iq = IQOption("a@b.com", "x", ssid_cache_path=self.path)
+            iq.auth._store_ssid("old")
+            logins = []
+
+            async def fake_login():
+                logins.append(1)
+                return "new"
+            iq.auth._login = fake_login
+
+            async def fake_send(data):
+                raise ConnectionError("WS not connected")
+            iq.ws.send = fake_send
+
+            iq.ssid = await iq.auth.get_ssid()
+            with self.assertRaises(ConnectionError) as ctx:
+                await iq._authenticate_or_login(relogin_on_reject=True)
+            self.assertNotIsInstance(ctx.exception, AuthRejected)
+            self.assertEqual(logins, [])
+            self.assertEqual(iq.auth.get_cached_ssid(), "old")
+            self.assertEqual(len(iq.dispatcher._futures), 0)
+
+        asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    unittest.main()
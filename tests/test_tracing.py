@@ -0,0 +1,139 @@
+import sys
+import os
+import json
+import random
+import asyncio
+import tempfile
+import unittest
+import structlog
+# Adiciona o diretório raiz ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from myiq import IQOption
+from myiq.core.tracing import Tracer, SPANS
+from myiq.testing import FakeIQServer
+
+
+class FakeClock:
+    def __init__(self):
+        self.t = 100.0
+
+    def __call__(self):
+        return self.t
+
+
+class TestTracer(unittest.TestCase):
+    def test_spans_from_marks(self):
+        clock = FakeClock()
+        tracer = Tracer(clock=clock)
+        trace = tracer.start("get-candles", "42", attempt=1)
+        clock.t += 0.001; trace.mark("enqueue")
+        clock.t += 0.002; trace.mark("wire_send")
+        frame_at = clock.t + 0.030
+        clock.t += 0.031
+        tracer.resolved("42", frame_at)
+        clock.t += 0.004
+        tracer.finish(trace, 2000)
+
+        record = tracer.recent[-1]
+        self.assertEqual(record["request_id"], "42")
+        self.assertEqual(record["status"], 2000)
+        self.assertEqual(record["attrs"], {"attempt": 1})
+        self.assertEqual(list(record["spans"]), list(SPANS))
+        self.assertAlmostEqual(record["spans"]["first_response"], 30.0)
+        self.assertAlmostEqual(record["spans"]["future_resolved"], 1.0)
+        self.assertAlmostEqual(record["spans"]["caller_resumed"], 4.0)
+        self.assertAlmostEqual(record["total_ms"], 38.0)
+        tracer.resolved("42", clock.t) # já finalizado: ignorado
+
+    def test_sampling_and_pending_bound(self):
+        self.assertIsNone(Tracer(sample_rate=0).start("op", "1"))
+        tracer = Tracer(sample_rate=0.25, rng=random.Random(7))
+        sampled = sum(tracer.start("op", str(i)) is not None for i in range(4000))
+        self.assertTrue(800 < sampled < 1200)
+        self.assertLessEqual(len(tracer._pending), tracer.max_pending)
+
+        tracer = Tracer(max_pending=2)
+        for i in range(3):
+            tracer.start("op", str(i))
+        self.assertEqual(list(tracer._pending), ["1", "2"])
+
+    def test_jsonl_export(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "traces.jsonl")
+            tracer = Tracer(path)
+            for i in range(3):
+                tracer.finish(tracer.start("op", str(i)))
+            tracer.close()
+            with open(path, encoding="utf-8") as f:
+                lines = [json.loads(l) for l in f]
+        self.assertEqual([l["request_id"] for l in lines], ["0", "1", "2"])
+
+
+class TestClientTracing(unittest.TestCase):
+    def setUp(self):
+        structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(40))
+
+    def tearDown(self):
+        structlog.reset_defaults()
+
+    def test_requests_traced_end_to_end(self):
+        async def scenario(path):
+            async with FakeIQServer(latency=(0.02, 0), result_delay=60) as server:
+                iq = IQOption("a@b.c", "pw", ws_url=server.ws_url, http_url=server.http_url)
+                iq.enable_tracing(path, sample_rate=1.0)
+                await iq.start()
+                try:
+                    await iq.get_balances()
+                    await iq.change_balance(1004)
+                    handle = await iq.open_blitz(76, "call", 1.0)
+                    await iq.get_financial_info(76)
+                    return handle.order_id
+                finally:
+                    await iq.close()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "traces.jsonl")
+            asyncio.run(scenario(path))
+            with open(path, encoding="utf-8") as f:
+                records = [json.loads(l) for l in f]
+
+        by_op = {r["operation"]: r for r in records}
+        for op in ("authenticate", "internal-billing.get-balances", "binary-options.open-option", "get-financial-information"):
+            self.assertIn(op, by_op)
+            record = by_op[op]
+            self.assertEqual(list(record["spans"]), list(SPANS), op)
+            self.assertGreaterEqual(record["spans"]["first_response"], 15.0, op) # latência do servidor
+        self.assertEqual(by_op["binary-options.open-option"]["status"], 2000)
+        self.assertEqual(by_op["authenticate"]["status"], "ok")
+        self.assertEqual(by_op["get-financial-information"]["attrs"], {"active_id": 76})
+
+    def test_failed_requests_release_futures(self):
+        async def scenario():
+            iq = IQOption("dummy", "dummy")
+            iq.enable_tracing(None, sample_rate=1.0)
+
+            async def failing_send(data):
+                raise ConnectionError("socket closed")
+            iq.ws.send = failing_send
+            with self.assertRaises(ConnectionError):
+                await iq._send_with_retry("internal-billing.get-balances", {}, retries=1)
+            self.assertIsNone(await iq._graphql_request({"query": "x"}))
+            self.assertEqual(len(iq.dispatcher._futures), 0)
+
+            # 'status' null na resposta é tratado como sucesso
+            async def null_status_send(data):
+                asyncio.get_running_loop().call_soon(iq.dispatcher.dispatch, {
+                    "name": "balances", "request_id": data["request_id"], "status": None, "msg": []
+                })
+            iq.ws.send = null_status_send
+            res = await iq._send_with_retry("internal-billing.get-balances", {}, retries=1)
+            self.assertEqual(res["msg"], [])
+            self.assertEqual(iq.tracer.recent[-1]["status"], 2000)
+            self.assertEqual(len(iq.dispatcher._futures), 0)
+
+        asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    unittest.main()
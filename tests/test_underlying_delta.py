@@ -0,0 +1,88 @@
+import sys
+import os
+import unittest
+# Adiciona o diretório raiz ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from myiq import IQOption
+from myiq.core.constants import EV_ACTIVE_OPENED, EV_ACTIVE_CLOSED, EV_PAYOUT_CHANGED
+
+
+def _push(iq, *items):
+    iq._on_underlying_list_changed({
+        "name": "underlying-list-changed",
+        "msg": {"name": "turbo-option-instruments.underlying-list-changed", "underlying": list(items)}
+    })
+
+
+class TestUnderlyingDelta(unittest.TestCase):
+    def setUp(self):
+        self.iq = IQOption("dummy", "dummy")
+        self.events = []
+        for ev in (EV_ACTIVE_OPENED, EV_ACTIVE_CLOSED, EV_PAYOUT_CHANGED):
+            self.iq.dispatcher.add_listener(ev, self.events.append)
+
+    def test_raw_items_are_not_mutated(self):
+        item = {"active_id": 76, "enabled": True, "is_suspended": False, "profit_percent": 85}
+        _push(self.iq, item)
+        self.assertNotIn("active_type", item)
+        self.assertEqual(self.iq.actives_cache["turbo-option"]["76"]["active_type"], "turbo-option")
+
+    def test_fine_grained_events(self):
+        base = {"active_id": 76, "enabled": True, "is_suspended": False, "profit_percent": 85}
+        other = {"active_id": 77, "enabled": True, "is_suspended": False, "profit_percent": 80}
+        _push(self.iq, base, other)
+        self.assertEqual([e["name"] for e in self.events], [EV_ACTIVE_OPENED, EV_ACTIVE_OPENED])
+        self.events.clear()
+
+        # Push idêntico: nenhum evento
+        _push(self.iq, dict(base), dict(other))
+        self.assertEqual(self.events, [])
+
+        # Só o 76 muda (fecha e payout cai)
+        _push(self.iq, dict(base, is_suspended=True, profit_percent=82), dict(other))
+        names = [e["name"] for e in self.events]
+        self.assertEqual(names, [EV_ACTIVE_CLOSED, EV_PAYOUT_CHANGED])
+        self.assertEqual(self.events[1]["msg"]["old"], 85)
+        self.assertEqual(self.events[1]["msg"]["new"], 82)
+        self.assertTrue(self.iq.actives_cache["turbo-option"]["76"]["enabled"])
+        self.assertTrue(self.iq.actives_cache["turbo-option"]["76"]["is_suspended"])
+
+    def test_first_push_diffs_against_initialization_data(self):
+        self.iq._on_initialization_data({"msg": {"turbo": {"actives": {
+            "76": {"enabled": True, "is_suspended": False, "option": {"profit": {"commission": 15}}},
+            "77": {"enabled": True, "is_suspended": False, "option": {"profit": {"commission": 20}}},
+        }}}})
+        _push(self.iq,
+              {"active_id": 76, "enabled": True, "is_suspended": False, "profit_percent": 85},
+              {"active_id": 77, "enabled": True, "is_suspended": False, "profit_percent": 82})
+        # 76 igual ao init-data: nada; 77 só mudou o payout (sem active-opened)
+        self.assertEqual([e["name"] for e in self.events], [EV_PAYOUT_CHANGED])
+        self.assertEqual((self.events[0]["msg"]["active_id"], self.events[0]["msg"]["old"], self.events[0]["msg"]["new"]),
+                         (77, 80, 82))
+        # Cópia: o registro do initialization-data não é alterado
+        self.assertNotIn("profit_percent", self.iq.actives_cache["turbo"]["77"])
+
+    def test_full_list_closes_absent_actives(self):
+        self.iq._on_initialization_data({"msg": {"turbo": {"actives": {
+            "78": {"enabled": True, "is_suspended": False, "option": {"profit": {"commission": 10}}},
+        }}}})
+        base = {"active_id": 76, "enabled": True, "is_suspended": False, "profit_percent": 85}
+        other = {"active_id": 77, "enabled": True, "is_suspended": False, "profit_percent": 80}
+        _push(self.iq, base, other, {"active_id": 78, "enabled": True, "is_suspended": False, "profit_percent": 90})
+        self.events.clear()
+
+        # 77 (visto antes) e 78 (init-data) somem da lista
+        _push(self.iq, dict(base))
+        closed = sorted(e["msg"]["active_id"] for e in self.events if e["name"] == EV_ACTIVE_CLOSED)
+        self.assertEqual(closed, [77, 78])
+        self.assertEqual([b["active_id"] for b in self.iq.best_actives("turbo", 5)], [76])
+
+        # Já fechados: novo push sem eles não repete o evento
+        self.events.clear()
+        _push(self.iq, dict(base))
+        self.assertEqual(self.events, [])
+
+
+if __name__ == "__main__":
+    unittest.main()